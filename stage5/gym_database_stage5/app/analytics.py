@@ -0,0 +1,248 @@
+# analytics.py - In-memory, column-oriented snapshot of shift, pay and supply data
+#
+# ShiftAnalytics.load() reads shift, hourly, monthly and equipment_supplier
+# once and keeps them as NumPy columns: dates as days since 1970-01-01,
+# clock times as seconds since midnight, and workers as categorical codes
+# (an index into `pids`). Every summary is then a vectorized group-by over
+# those columns, so what-if questions (another overtime threshold, a raise,
+# a different overtime rate) are answered in-process without touching SQL:
+#
+#     snapshot = ShiftAnalytics.load()
+#     workers = snapshot.worker_summary(threshold=7.5, wage_factor=1.05)
+#     months = snapshot.monthly_rollup(threshold=7.5, wage_factor=1.05)
+#
+# Summaries are dicts of equally long arrays, one entry per column. NumPy is
+# only needed by this module; the rest of the application runs without it.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from app.database import db_manager
+
+# Hours over 8 in a shift are overtime, as in get_worker_shift_summaries. Pay
+# intentionally differs from that function: it prices every worker at a flat
+# 15.00/h and 22.50/h overtime, while this module uses each worker's own
+# hourly.salaryph and overtimerate and falls back to these rates only for
+# workers without an hourly row. The pay scenario and the payroll report
+# therefore give different totals.
+OVERTIME_THRESHOLD = 8.0
+DEFAULT_WAGE = 15.00
+DEFAULT_OVERTIME_RATE = 1.5
+
+
+def group_sum(codes, weights=None, size=0):
+    """Per-group sum of `weights` (or row count when None) for integer group codes 0..size-1"""
+    return np.bincount(codes, weights=weights, minlength=size)
+
+
+def top(summary, by, n=10):
+    """The n largest rows of a summary as tuples, in the summary's column order"""
+    order = np.argsort(-summary[by], kind='stable')[:n]
+    columns = list(summary.values())
+    return [tuple(column[i] for column in columns) for i in order]
+
+
+def _columns(rows, count, dtype):
+    """Split fetched rows into `count` arrays of the given dtype"""
+    table = np.array(rows, dtype=dtype).reshape(-1, count)
+    return [table[:, i] for i in range(count)]
+
+
+def _months(days):
+    """Months since 1970-01 for an array of days since 1970-01-01"""
+    return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+
+class ShiftAnalytics:
+    """Column arrays for every shift, worker pay rate and delivery"""
+
+    def __init__(self, workers, shifts, hourly, monthly, supplies):
+        shift_pid, day, clock_in, clock_out = _columns(shifts, 4, np.int64)
+        worker_pid = np.array([pid for pid, _, _ in workers], dtype=np.int64)
+
+        # Categorical worker codes; shift pids are included in case a
+        # shift outlives its worker row
+        self.pids = np.unique(np.concatenate([worker_pid, shift_pid]))
+        names = {pid: (name, job) for pid, name, job in workers}
+        self.names = [names.get(pid, ("Unknown", ""))[0] for pid in self.pids.tolist()]
+        self.jobs = [names.get(pid, ("Unknown", ""))[1] for pid in self.pids.tolist()]
+
+        self.worker = np.searchsorted(self.pids, shift_pid)
+        self.day = day
+        self.month = _months(day)
+        self.hours = (clock_out - clock_in) / 3600.0
+
+        # Per-worker pay columns, indexed by worker code
+        size = len(self.pids)
+        self.wage = np.full(size, DEFAULT_WAGE)
+        self.overtime_rate = np.full(size, DEFAULT_OVERTIME_RATE)
+        self.bonus = np.zeros(size)
+        self.salary = np.zeros(size)
+        self.salaried = np.zeros(size, dtype=bool)
+
+        pid, wage, bonus, overtime_rate = _columns(hourly, 4, np.float64)
+        codes, known = self._codes(pid)
+        self.wage[codes] = wage[known]
+        self.bonus[codes] = bonus[known]
+        self.overtime_rate[codes] = overtime_rate[known]
+
+        pid, salary = _columns(monthly, 2, np.float64)
+        codes, known = self._codes(pid)
+        self.salary[codes] = salary[known]
+        self.salaried[codes] = True
+
+        equipment_id, supplier, quantity, supply_day = _columns(supplies, 4, np.int64)
+        self.supply_equipment = equipment_id
+        self.supply_pid = supplier
+        self.supply_quantity = quantity
+        self.supply_day = supply_day
+        self.supply_month = _months(supply_day)
+
+    def _codes(self, pid):
+        """Worker codes of the pids that are workers, and the mask selecting them"""
+        pid = pid.astype(np.int64)
+        codes = np.searchsorted(self.pids, pid).clip(max=max(len(self.pids) - 1, 0))
+        known = self.pids[codes] == pid if len(self.pids) else np.zeros(len(pid), dtype=bool)
+        return codes[known], known
+
+    @classmethod
+    def load(cls):
+        """Read the four tables (one query each) into a new snapshot"""
+        if np is None:
+            raise RuntimeError("Shift analytics need NumPy (pip install numpy)")
+
+        workers = db_manager.execute_query("""
+            SELECT w.pid, p.firstname || ' ' || p.lastname, w.job
+            FROM worker w JOIN person p ON p.pid = w.pid
+        """, fetch='all')
+        shifts = db_manager.execute_query("""
+            SELECT pid, date - DATE '1970-01-01',
+                   EXTRACT(EPOCH FROM clock_in)::integer, EXTRACT(EPOCH FROM clock_out)::integer
+            FROM shift
+        """, fetch='all')
+        hourly = db_manager.execute_query(
+            "SELECT pid, salaryph::float8, bonus::float8, overtimerate::float8 FROM hourly", fetch='all')
+        monthly = db_manager.execute_query(
+            'SELECT pid, "salaryPM" FROM monthly WHERE pid IS NOT NULL AND "salaryPM" IS NOT NULL', fetch='all')
+        # Undated deliveries belong to no month, so they are left out
+        supplies = db_manager.execute_query("""
+            SELECT equipment_id, pid, COALESCE(quantity, 0), supply_date - DATE '1970-01-01'
+            FROM equipment_supplier
+            WHERE supply_date IS NOT NULL
+        """, fetch='all')
+        return cls(workers, shifts, hourly, monthly, supplies)
+
+    @property
+    def shift_count(self):
+        return len(self.day)
+
+    def _mask(self, day, start=None, end=None):
+        """Rows whose day falls in [start, end) (dates, both optional)"""
+        mask = np.ones(len(day), dtype=bool)
+        if start is not None:
+            mask &= day >= np.datetime64(start, 'D').astype(np.int64)
+        if end is not None:
+            mask &= day < np.datetime64(end, 'D').astype(np.int64)
+        return mask
+
+    def overtime(self, threshold=OVERTIME_THRESHOLD):
+        """Overtime hours of every shift: the part of the shift beyond `threshold` hours"""
+        return np.maximum(self.hours - threshold, 0.0)
+
+    def shift_pay(self, threshold=OVERTIME_THRESHOLD, wage_factor=1.0, overtime_rate=None):
+        """Pay earned by every shift; zero for salaried (monthly) workers.
+
+        wage_factor scales every hourly wage (1.05 = a 5% raise); overtime_rate,
+        when given, replaces each worker's own overtime multiplier.
+        """
+        overtime = self.overtime(threshold)
+        rate = self.overtime_rate[self.worker] if overtime_rate is None else overtime_rate
+        wage = self.wage[self.worker] * wage_factor
+        pay = wage * (self.hours - overtime + overtime * rate)
+        return np.where(self.salaried[self.worker], 0.0, pay)
+
+    def _salary_months(self, mask, wage_factor):
+        """(worker codes, month numbers, salary) for each month a salaried worker has shifts"""
+        months = self.month[mask]
+        if not len(months):
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0)
+        first = months.min()
+        span = months.max() - first + 1
+        pairs = np.unique(self.worker[mask] * span + (months - first))
+        worker, month = pairs // span, pairs % span + first
+        salary = np.where(self.salaried[worker], self.salary[worker] * wage_factor, 0.0)
+        return worker, month, salary
+
+    def worker_summary(self, threshold=OVERTIME_THRESHOLD, wage_factor=1.0, overtime_rate=None,
+                       start=None, end=None):
+        """Shifts, hours, overtime and pay per worker, for shifts in [start, end).
+
+        Salaried workers are paid their monthly salary (times wage_factor) for
+        every month in which they worked a shift. Bonuses are not included.
+        """
+        mask = self._mask(self.day, start, end)
+        worker, size = self.worker[mask], len(self.pids)
+        pay = group_sum(worker, self.shift_pay(threshold, wage_factor, overtime_rate)[mask], size)
+        salary_worker, _, salary = self._salary_months(mask, wage_factor)
+        pay += group_sum(salary_worker, salary, size)
+        return {
+            'pid': self.pids,
+            'name': np.array(self.names, dtype=object),
+            'job': np.array(self.jobs, dtype=object),
+            'shifts': group_sum(worker, size=size),
+            'hours': group_sum(worker, self.hours[mask], size),
+            'overtime': group_sum(worker, self.overtime(threshold)[mask], size),
+            'pay': pay,
+        }
+
+    def monthly_rollup(self, threshold=OVERTIME_THRESHOLD, wage_factor=1.0, overtime_rate=None,
+                       start=None, end=None):
+        """Shifts, hours, overtime, pay and active workers per calendar month"""
+        mask = self._mask(self.day, start, end)
+        month = self.month[mask]
+        if not len(month):
+            return {key: np.zeros(0) for key in ('month', 'shifts', 'workers', 'hours', 'overtime', 'pay')}
+        first = month.min()
+        code, size = month - first, month.max() - first + 1
+
+        salary_worker, salary_month, salary = self._salary_months(mask, wage_factor)
+        pay = group_sum(code, self.shift_pay(threshold, wage_factor, overtime_rate)[mask], size)
+        pay += group_sum(salary_month - first, salary, size)
+        active = np.unique(self.worker[mask] * size + code) % size
+
+        rollup = {
+            'month': (np.arange(size) + first).astype('datetime64[M]'),
+            'shifts': group_sum(code, size=size),
+            'workers': group_sum(active, size=size),
+            'hours': group_sum(code, self.hours[mask], size),
+            'overtime': group_sum(code, self.overtime(threshold)[mask], size),
+            'pay': pay,
+        }
+        # Only months with shifts
+        keep = rollup['shifts'] > 0
+        return {key: column[keep] for key, column in rollup.items()}
+
+    def supply_by_month(self, start=None, end=None):
+        """Deliveries, units, distinct equipment and distinct suppliers per calendar month"""
+        mask = self._mask(self.supply_day, start, end)
+        month = self.supply_month[mask]
+        if not len(month):
+            return {key: np.zeros(0) for key in ('month', 'deliveries', 'equipment', 'suppliers', 'quantity')}
+        first = month.min()
+        code, size = month - first, month.max() - first + 1
+
+        def distinct(values):
+            _, values = np.unique(values, return_inverse=True)
+            return group_sum(np.unique(values.reshape(-1) * size + code) % size, size=size)
+
+        rollup = {
+            'month': (np.arange(size) + first).astype('datetime64[M]'),
+            'deliveries': group_sum(code, size=size),
+            'equipment': distinct(self.supply_equipment[mask]),
+            'suppliers': distinct(self.supply_pid[mask]),
+            'quantity': group_sum(code, self.supply_quantity[mask].astype(np.float64), size),
+        }
+        keep = rollup['deliveries'] > 0
+        return {key: column[keep] for key, column in rollup.items()}
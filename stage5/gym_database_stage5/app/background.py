@@ -0,0 +1,165 @@
+# background.py - Runs database work off the Tk main loop
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from app.database import db_manager
+
+# Task currently executing on each worker thread (used by BackgroundExecutor.post)
+_current = threading.local()
+
+
+def current_task():
+    """The Task running on the calling worker thread, or None (e.g. on the Tk thread)"""
+    return getattr(_current, 'task', None)
+
+
+class Task:
+    """Handle for one unit of background work"""
+
+    def __init__(self, fn, args, kwargs, on_success, on_error, scope, cancellable):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.on_success = on_success
+        self.on_error = on_error
+        self.scope = scope
+        self.cancellable = cancellable
+
+        self.cancelled = False
+        self.future = None
+
+    def cancel(self):
+        """Cancel the task: drop its result and interrupt its query if already running"""
+        self.cancelled = True
+        if self.future is not None and self.future.cancel():
+            return
+        # Keyed on the task, not the thread: once this task is done, nothing is cancelled
+        db_manager.cancel_session(self)
+
+    def run(self):
+        """Executed on a worker thread"""
+        if self.cancelled:
+            return None, None
+        _current.task = self
+        try:
+            # The task's database calls share one session; its connection is released at the end
+            with db_manager.session(token=self):
+                return self.fn(*self.args, **self.kwargs), None
+        except Exception as e:
+            return None, e
+        finally:
+            _current.task = None
+
+
+class BackgroundExecutor:
+    """Thread pool whose results are delivered back on the Tk thread via root.after"""
+
+    def __init__(self, root, max_workers=4, poll_ms=50, on_busy_change=None):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.on_busy_change = on_busy_change
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+        self._results = queue.Queue()
+        self._tasks = set()
+        self._scope = 0
+        self._poll_job = None
+
+    @property
+    def scope(self):
+        return self._scope
+
+    def new_scope(self):
+        """Start a new scope (e.g. a screen switch); results of older tasks are dropped"""
+        self._scope += 1
+        for task in list(self._tasks):
+            if task.cancellable:
+                task.cancel()
+        return self._scope
+
+    def submit(self, fn, *args, on_success=None, on_error=None, cancellable=True, scoped=True, **kwargs):
+        """Run fn(*args, **kwargs) on a worker thread.
+
+        on_success(result) / on_error(exception) are called on the Tk thread,
+        unless the task was cancelled or the scope changed in the meantime.
+        Writes should pass cancellable=False so leaving a screen never aborts them;
+        screen-independent work passes scoped=False as well so its callbacks
+        survive scope changes.
+        """
+        task = Task(fn, args, kwargs, on_success, on_error, self._scope if scoped else None, cancellable)
+        self._tasks.add(task)
+        task.future = self._pool.submit(self._run, task)
+        # A future cancelled before it started never reaches _run; still report it done
+        task.future.add_done_callback(
+            lambda f, t=task: f.cancelled() and self._results.put((t, None, None, False)))
+        self._notify_busy()
+        self._schedule_poll()
+        return task
+
+    def post(self, callback, *args):
+        """Called from inside a running task: schedule callback(*args) on the Tk thread.
+
+        Posted callbacks are dropped together with the task if it goes stale.
+        """
+        self._results.put((current_task(), callback, args, True))
+
+    def _run(self, task):
+        result, error = task.run()
+        self._results.put((task, result, error, False))
+
+    def _schedule_poll(self):
+        if self._poll_job is None:
+            self._poll_job = self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self._poll_job = None
+        while True:
+            try:
+                task, result, error, posted = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            stale = task is not None and (task.cancelled or task.scope not in (None, self._scope))
+            if posted:
+                # Intermediate callback: `result` is the callable, `error` its args
+                if not stale:
+                    self._deliver(result, *error)
+                continue
+
+            self._tasks.discard(task)
+            if stale:
+                continue
+            if error is not None:
+                if task.on_error:
+                    self._deliver(task.on_error, error)
+                else:
+                    print(f"Background task error: {error}")
+            elif task.on_success:
+                self._deliver(task.on_success, result)
+
+        self._notify_busy()
+        if self._tasks or not self._results.empty():
+            self._schedule_poll()
+
+    def _deliver(self, callback, *args):
+        """Run a UI callback without letting its errors stop the polling loop"""
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"Background callback error: {e}")
+            traceback.print_exc()
+
+    def _notify_busy(self):
+        if self.on_busy_change:
+            self.on_busy_change(len(self._tasks))
+
+    def shutdown(self):
+        """Cancel outstanding work and stop the worker threads"""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._poll_job is not None:
+            self.root.after_cancel(self._poll_job)
+            self._poll_job = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
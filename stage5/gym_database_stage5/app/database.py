@@ -1,9 +1,276 @@
 # database_config.py - Focused on Equipment, Workers, Suppliers, Equipment_Supplier
+import functools
+import itertools
+import operator
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
 import psycopg2
-from psycopg2 import Error
+from psycopg2 import Error, sql
+from psycopg2.extras import execute_values
 import tkinter.messagebox as messagebox
 
 
+# Maximum rows a live-search query returns
+SEARCH_LIMIT = 200
+
+# Prepared statements kept per connection before the least recently used is deallocated
+STATEMENT_CACHE_SIZE = 100
+
+# Rows per INSERT/UPDATE/DELETE statement sent by execute_batch
+BATCH_PAGE_SIZE = 500
+
+# psycopg2 placeholders: %(name)s, %s, and the %% escape
+_PLACEHOLDER = re.compile(r"%\((\w+)\)s|%s|%%")
+
+
+def server_placeholders(query):
+    """Rewrite a psycopg2 query for PREPARE.
+
+    Returns (text, names): text uses $1, $2, ... and `names` lists the
+    parameter names in $n order, or is None for positional (%s) queries.
+    """
+    names = []
+    positional = []
+
+    def replace(match):
+        if match.group(0) == '%%':
+            return '%'
+        if match.group(1):
+            if match.group(1) not in names:
+                names.append(match.group(1))
+            return f"${names.index(match.group(1)) + 1}"
+        positional.append(None)
+        return f"${len(positional)}"
+
+    text = _PLACEHOLDER.sub(replace, query)
+    return text, (None if positional else names)
+
+
+@functools.lru_cache(maxsize=256)
+def record_maker(row_type, names):
+    """Function turning a row with columns `names` into a `row_type` NamedTuple.
+
+    Columns are matched to fields by name, so the SELECT list may be in any
+    order (and carry extra columns). Cached per (row_type, column names).
+    """
+    fields = row_type._fields
+    if names == fields:
+        return row_type._make
+    missing = [f for f in fields if f not in names]
+    if missing:
+        raise ValueError(f"{row_type.__name__} needs column(s): {', '.join(missing)}")
+    positions = [names.index(f) for f in fields]
+    if len(positions) == 1:
+        return lambda row: row_type(row[positions[0]])
+    getter = operator.itemgetter(*positions)
+    return lambda row: row_type._make(getter(row))
+
+
+def _maker(cursor, row_type):
+    return record_maker(row_type, tuple(column[0] for column in cursor.description))
+
+
+def contains_pattern(text):
+    """ILIKE pattern matching `text` anywhere, with LIKE wildcards in it escaped"""
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+class PoolTimeoutError(Error):
+    """Raised when no pooled connection becomes free within the checkout timeout"""
+
+
+class BatchError(Error):
+    """A batch write failed and was rolled back.
+
+    `row_errors` lists (row index, message) for every row that fails on its own;
+    `label` names a row by its index in the summary (e.g. "Worker 42").
+    """
+
+    def __init__(self, message, row_errors, label=None):
+        super().__init__(message)
+        self.row_errors = row_errors
+        self.label = label or (lambda index: f"Row {index + 1}")
+
+    def summary(self, label=None, limit=10):
+        """Multi-line description of the failing rows for an error dialog"""
+        if not self.row_errors:
+            return str(self)
+        label = label or self.label
+        lines = [f"{label(index)}: {message}" for index, message in self.row_errors[:limit]]
+        if len(self.row_errors) > limit:
+            lines.append(f"... and {len(self.row_errors) - limit} more")
+        return "\n".join(lines)
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of psycopg2 connections"""
+
+    def __init__(self, db_params, min_size=1, max_size=5, timeout=10.0):
+        self.db_params = db_params
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+
+        self._idle = []
+        self._size = 0
+        self._stats = {}
+        self._statements = {}
+        self._closed = False
+        self._lock = threading.Condition()
+
+    def open(self):
+        """Create the minimum number of connections up front"""
+        with self._lock:
+            self._closed = False
+            while self._size < self.min_size:
+                self._idle.append(self._create())
+
+    def close(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.pop())
+            self._lock.notify_all()
+
+    def _create(self):
+        """Open a new connection and start tracking it (lock must be held)"""
+        conn = psycopg2.connect(**self.db_params)
+        conn.autocommit = False
+        self._size += 1
+        self._track(conn)
+        return conn
+
+    def _track(self, conn):
+        self._statements[id(conn)] = OrderedDict()
+        self._stats[id(conn)] = {
+            'created': time.time(),
+            'checkouts': 0,
+            'last_checkout': None,
+            'failed_health_checks': 0
+        }
+
+    def _discard(self, conn):
+        """Close a connection and stop tracking it (lock must be held)"""
+        try:
+            conn.close()
+        except Error:
+            pass
+        self._size -= 1
+        self._stats.pop(id(conn), None)
+        self._statements.pop(id(conn), None)
+
+    def _is_healthy(self, conn):
+        """Cheap liveness check run on every checkout"""
+        if conn.closed:
+            return False
+        try:
+            if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except Error:
+            return False
+
+    def getconn(self):
+        """Check out a healthy connection, waiting up to `timeout` seconds"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._lock:
+                conn = self._wait_for_slot(deadline)
+                if conn is None:
+                    # Reserve the slot, then connect without holding the lock
+                    self._size += 1
+
+            if conn is None:
+                try:
+                    conn = psycopg2.connect(**self.db_params)
+                    conn.autocommit = False
+                except Error:
+                    with self._lock:
+                        self._size -= 1
+                        self._lock.notify()
+                    raise
+                with self._lock:
+                    self._track(conn)
+                    return self._mark_checkout(conn)
+
+            # Health check runs outside the lock so a slow server doesn't stall other threads
+            if self._is_healthy(conn):
+                with self._lock:
+                    return self._mark_checkout(conn)
+
+            with self._lock:
+                self._stats[id(conn)]['failed_health_checks'] += 1
+                self._discard(conn)
+
+    def _wait_for_slot(self, deadline):
+        """Pop an idle connection, or return None when a new one may be opened (lock must be held)"""
+        while True:
+            if self._closed:
+                raise Error("Connection pool is closed")
+            if self._idle:
+                return self._idle.pop()
+            if self._size < self.max_size:
+                return None
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise PoolTimeoutError(
+                    f"No database connection available after {self.timeout:.1f}s "
+                    f"(pool size {self.max_size})")
+            self._lock.wait(remaining)
+
+    def _mark_checkout(self, conn):
+        stats = self._stats[id(conn)]
+        stats['checkouts'] += 1
+        stats['last_checkout'] = time.time()
+        return conn
+
+    def putconn(self, conn):
+        """Return a connection to the pool, rolling back any open transaction"""
+        reusable = not conn.closed
+        if reusable:
+            try:
+                conn.rollback()
+            except Error:
+                reusable = False
+
+        with self._lock:
+            if self._closed or not reusable:
+                self._discard(conn)
+            else:
+                self._idle.append(conn)
+            self._lock.notify()
+
+    def statements(self, conn):
+        """Prepared statements of one connection: query text -> statement name, oldest use first.
+
+        Only the thread holding the connection touches it, so no lock is needed.
+        """
+        return self._statements[id(conn)]
+
+    def stats(self):
+        """Pool-wide counters plus per-connection reuse statistics"""
+        with self._lock:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'connections': [dict(s) for s in self._stats.values()]
+            }
+
+
 class DatabaseManager:
     def __init__(self):
         # PostgreSQL connection parameters
@@ -14,13 +281,35 @@ class DatabaseManager:
             'user': 'nsolow',
             'password': 'noam2004'
         }
-        self.connection = None
+        # Pool sizing - one connection per concurrently running screen/report is plenty
+        self.pool_params = {
+            'min_size': 1,
+            'max_size': 5,
+            'timeout': 10.0
+        }
+        self.pool = None
+
+        # Connection held by each thread's session between its first query and commit/rollback
+        self._local = threading.local()
+        # Session token -> connection it currently holds (for cancel_session)
+        self._bound = {}
+        self._bound_lock = threading.Lock()
+        # Names for server-side cursors and prepared statements, unique within every connection
+        self._cursor_ids = itertools.count(1)
+        self._statement_ids = itertools.count(1)
+        self._statement_counts = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._statement_lock = threading.Lock()
+
+    @property
+    def connection(self):
+        """Connection currently bound to the calling thread (None if idle)"""
+        return getattr(self._local, 'connection', None)
 
     def connect(self):
-        """Establish connection to PostgreSQL database"""
+        """Create the connection pool"""
         try:
-            self.connection = psycopg2.connect(**self.db_params)
-            self.connection.autocommit = False
+            self.pool = ConnectionPool(self.db_params, **self.pool_params)
+            self.pool.open()
             print("Database connection successful!")
             return True
         except Error as e:
@@ -30,16 +319,109 @@ class DatabaseManager:
             return False
 
     def disconnect(self):
-        """Close database connection"""
-        if self.connection:
-            self.connection.close()
+        """Close all pooled connections"""
+        if self.pool:
+            self.release()
+            self.pool.close()
+            self.pool = None
             print("Database connection closed")
 
-    def execute_query(self, query, params=None, fetch=False):
-        """Execute a database query"""
+    @contextmanager
+    def checkout(self):
+        """Check out a dedicated connection for the duration of a `with` block.
+
+        The transaction is committed when the block exits normally and rolled
+        back if it raises.
+        """
+        conn = self.pool.getconn()
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(query, params)
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn)
+
+    @contextmanager
+    def session(self, token=None):
+        """Share one connection and transaction between all calls made inside the block.
+
+        The calls run in the calling thread's transaction until commit() or
+        rollback(); whatever is still open when the outermost block exits is
+        rolled back and the connection goes back to the pool. `token` names
+        the session for cancel_session() (background tasks pass themselves).
+
+        Outside any session every call is its own transaction, committed and
+        released at once, so a thread that only reads (e.g. the Tk thread
+        filling a dialog) never keeps a connection idle in transaction.
+        """
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            self._local.token = token if token is not None else object()
+        self._local.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            if depth == 0:
+                self.release()
+                self._local.token = None
+
+    def _in_session(self):
+        return getattr(self._local, 'depth', 0) > 0
+
+    def _thread_connection(self):
+        """Return the calling thread's connection, checking one out if needed"""
+        conn = self.connection
+        if conn is None:
+            conn = self.pool.getconn()
+            self._local.connection = conn
+            with self._bound_lock:
+                self._bound[self._local.token] = conn
+        return conn
+
+    def release(self):
+        """Give the calling thread's connection back to the pool (rolls back open work)"""
+        conn = self.connection
+        if conn is not None:
+            self._local.connection = None
+            # Unbound before it is pooled, so a late cancel_session cannot reach its next user
+            with self._bound_lock:
+                self._bound.pop(self._local.token, None)
+            self.pool.putconn(conn)
+
+    def cancel_session(self, token):
+        """Ask the server to cancel the query a session is running, if it is still running one"""
+        with self._bound_lock:
+            conn = self._bound.get(token)
+            if conn is not None and not conn.closed:
+                try:
+                    conn.cancel()
+                except Error as e:
+                    print(f"Cancel error: {e}")
+
+    def execute_query(self, query, params=None, fetch=False, prepared=False, row_type=None):
+        """Execute a database query.
+
+        prepared=True runs it as a server-side prepared statement, parsed and
+        planned once per connection (for hot statements with a fixed text).
+        row_type (a NamedTuple from app.models) makes fetched rows records of
+        that type, filled by column name.
+        """
+        if not self._in_session():
+            with self.session():
+                result = self.execute_query(query, params, fetch, prepared, row_type)
+                self.commit()
+            return result
+
+        conn = self._thread_connection()
+        try:
+            cursor = conn.cursor()
+            if prepared:
+                self._execute_prepared(conn, cursor, query, params)
+            else:
+                cursor.execute(query, params)
 
             if fetch:
                 if fetch == 'one':
@@ -48,6 +430,9 @@ class DatabaseManager:
                     result = cursor.fetchall()
                 else:
                     result = cursor.fetchmany(fetch)
+                if row_type is not None and result:
+                    make = _maker(cursor, row_type)
+                    result = make(result) if fetch == 'one' else [make(row) for row in result]
                 cursor.close()
                 return result
             else:
@@ -56,26 +441,184 @@ class DatabaseManager:
 
         except Error as e:
             print(f"Database query error: {e}")
-            self.connection.rollback()
+            self.rollback()
             raise e
 
+    def _execute_prepared(self, conn, cursor, query, params):
+        """EXECUTE the connection's prepared statement for `query`, PREPAREing it on first use"""
+        statements = self.pool.statements(conn)
+        entry = statements.get(query)
+        if entry is None:
+            text, names = server_placeholders(query)
+            name = f"stmt_{next(self._statement_ids)}"
+            cursor.execute(f"PREPARE {name} AS {text}")
+            entry = statements[query] = (name, names)
+            self._count_statement('misses')
+            if len(statements) > STATEMENT_CACHE_SIZE:
+                old_name, _ = statements.popitem(last=False)[1]
+                cursor.execute(f"DEALLOCATE {old_name}")
+                self._count_statement('evictions')
+        else:
+            statements.move_to_end(query)
+            self._count_statement('hits')
+
+        name, names = entry
+        values = [params[n] for n in names] if names is not None else list(params or ())
+        if values:
+            cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(values))})", values)
+        else:
+            cursor.execute(f"EXECUTE {name}")
+
+    def execute_batch(self, query, rows, template=None, fetch=False, page_size=BATCH_PAGE_SIZE, row_type=None,
+                      row_label=None):
+        """Run a statement with a single `VALUES %s` for many rows (execute_values).
+
+        Runs in the calling thread's transaction, a page of rows per statement;
+        the caller commits. Returns the RETURNING rows (as `row_type` records,
+        if given) when fetch is true.
+        If any row fails, everything is rolled back and BatchError reports
+        which rows are at fault, naming them with row_label(index) if given.
+        """
+        if not self._in_session():
+            with self.session():
+                result = self.execute_batch(query, rows, template, fetch, page_size, row_type, row_label)
+                self.commit()
+            return result
+
+        conn = self._thread_connection()
+        cursor = conn.cursor()
+        try:
+            result = execute_values(cursor, query, rows, template, page_size, fetch=bool(fetch))
+            if not fetch:
+                return True
+            if row_type is not None and result:
+                make = _maker(cursor, row_type)
+                result = [make(row) for row in result]
+            return result
+        except Error as e:
+            print(f"Database batch error: {e}")
+            self.rollback()
+            raise BatchError(str(e).strip(), self._row_errors(query, rows, template), row_label)
+        finally:
+            if not cursor.closed:
+                cursor.close()
+
+    def _row_errors(self, query, rows, template):
+        """(index, message) for each row that fails when applied one at a time; nothing is kept"""
+        conn = self._thread_connection()
+        row_errors = []
+        try:
+            cursor = conn.cursor()
+            for index, row in enumerate(rows):
+                cursor.execute("SAVEPOINT batch_row")
+                try:
+                    execute_values(cursor, query, [row], template)
+                    cursor.execute("RELEASE SAVEPOINT batch_row")
+                except Error as e:
+                    cursor.execute("ROLLBACK TO SAVEPOINT batch_row")
+                    row_errors.append((index, (e.diag.message_primary or str(e)).strip()))
+        except Error as e:
+            print(f"Batch diagnosis error: {e}")
+        finally:
+            self.rollback()
+        return row_errors
+
+    def _count_statement(self, key):
+        with self._statement_lock:
+            self._statement_counts[key] += 1
+
+    def statement_cache_stats(self):
+        """Prepared-statement cache hits, misses and evictions across all connections"""
+        with self._statement_lock:
+            return dict(self._statement_counts)
+
+    @contextmanager
+    def _server_cursor(self, name=None, itersize=2000):
+        """Named (server-side) cursor on the calling thread's connection; closed on exit"""
+        conn = self._thread_connection()
+        cursor = conn.cursor(name=name or f"stream_{next(self._cursor_ids)}")
+        cursor.itersize = itersize
+        try:
+            yield cursor
+        except Error as e:
+            print(f"Database query error: {e}")
+            self.rollback()
+            raise e
+        finally:
+            if not cursor.closed and not conn.closed:
+                try:
+                    cursor.close()
+                except Error:
+                    pass
+
+    def iter_query(self, query, params=None, itersize=2000, row_type=None):
+        """Yield result rows one at a time, fetching `itersize` rows per round trip.
+
+        The rows are read through a server-side cursor, so memory use does not
+        grow with the result. Runs in the calling thread's session (its own
+        one outside a session), which stays open until the generator is
+        exhausted or closed. row_type works as in execute_query.
+        """
+        with self.session(), self._server_cursor(itersize=itersize) as cursor:
+            cursor.execute(query, params)
+            if row_type is None:
+                yield from cursor
+            else:
+                # A named cursor only has a description after its first fetch
+                make = None
+                for row in cursor:
+                    if make is None:
+                        make = _maker(cursor, row_type)
+                    yield make(row)
+
+    def iter_refcursor(self, open_query, params=None, itersize=2000):
+        """Like iter_query, for a function returning a REFCURSOR (e.g. "SELECT some_function()")"""
+        with self.session():
+            cursor_name = self.execute_query(open_query, params, fetch='one')[0]
+            with self._server_cursor(cursor_name, itersize) as cursor:
+                for row in cursor:
+                    yield row
+
     def commit(self):
         """Commit current transaction"""
+        conn = self.connection
+        if conn is None:
+            return
         try:
-            self.connection.commit()
+            conn.commit()
         except Error as e:
             print(f"Commit error: {e}")
-            self.connection.rollback()
+            conn.rollback()
             raise e
+        finally:
+            self.release()
 
     def rollback(self):
         """Rollback current transaction"""
+        conn = self.connection
+        if conn is None:
+            return
         try:
-            self.connection.rollback()
+            conn.rollback()
         except Error as e:
             print(f"Rollback error: {e}")
             raise e
+        finally:
+            self.release()
+
+    def estimate_row_count(self, table):
+        """Planner row estimate from pg_class; falls back to COUNT(*) for never-analyzed tables"""
+        result = self.execute_query("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                                    (table,), fetch='one')
+        if result and result[0] is not None and result[0] >= 0:
+            return result[0]
+        count_query = sql.SQL("SELECT COUNT(*) FROM {}").format(sql.Identifier(table))
+        return self.execute_query(count_query, fetch='one')[0]
+
+    def pool_stats(self):
+        """Connection pool statistics (empty when not connected)"""
+        return self.pool.stats() if self.pool else {}
 
 
 # Global database manager instance
-db_manager = DatabaseManager()
\ No newline at end of file
+db_manager = DatabaseManager()
@@ -0,0 +1,111 @@
+# lookups.py - Shared cache for the pick lists the dialogs show
+#
+# The equipment, supplier and worker combo boxes are filled from
+# lookup_cache, so a dialog only queries when its list is missing or stale.
+# Entries are dropped:
+#   - by the *Operations write methods, through lookup_changed(), as soon as
+#     this client changes a table a list is built from;
+#   - by LookupListener when any client commits such a change, if migration
+#     007 (NOTIFY triggers) is installed;
+#   - after LOOKUP_TTL seconds regardless, as a backstop.
+# Dialogs fill their lists through lookup_loader, so a missing list is
+# loaded on a worker thread instead of blocking the Tk thread.
+import select
+import threading
+
+import psycopg2
+
+from app.cache import TTLCache
+
+LOOKUP_TTL = 300
+LOOKUP_CACHE_SIZE = 16
+LOOKUP_CHANNEL = 'lookup_changed'
+
+# Lists built from each table (the payload of a LOOKUP_CHANNEL notification is a table name)
+LOOKUP_TABLES = {
+    'equipment': ('equipment',),
+    'person': ('suppliers', 'workers'),
+    'supplier': ('suppliers',),
+    'worker': ('workers',),
+}
+
+lookup_cache = TTLCache(ttl=LOOKUP_TTL, max_size=LOOKUP_CACHE_SIZE)
+
+
+def lookup_changed(*tables):
+    """Drop the cached lists built from any of `tables`"""
+    for table in tables:
+        for key in LOOKUP_TABLES.get(table, ()):
+            lookup_cache.invalidate(key)
+
+
+class LookupLoader:
+    """Delivers a pick list to a dialog: at once when cached, else after loading it in the background"""
+
+    def __init__(self):
+        # Set by the application to its BackgroundExecutor.submit
+        self.submit = None
+
+    def load(self, key, get_list, on_loaded, on_error):
+        """Call on_loaded(rows) with the `key` list; get_list() (which fills lookup_cache) runs on a worker.
+
+        Call on the Tk thread; the callbacks run there too. Without an
+        executor (e.g. the command-line tools) get_list() runs in place.
+        """
+        rows = lookup_cache.get(key)
+        if rows is not None:
+            on_loaded(rows)
+        elif self.submit is None:
+            try:
+                rows = get_list()
+            except Exception as e:
+                on_error(e)
+                return
+            on_loaded(rows)
+        else:
+            self.submit(get_list, on_success=on_loaded, on_error=on_error)
+
+
+# Global loader instance
+lookup_loader = LookupLoader()
+
+
+class LookupListener:
+    """Keeps lookup_cache in step with other clients via LISTEN on a dedicated connection"""
+
+    def __init__(self, db_params, poll_seconds=1.0, reconnect_seconds=10.0):
+        self.db_params = db_params
+        self.poll_seconds = poll_seconds
+        self.reconnect_seconds = reconnect_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="lookup-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_seconds * 2)
+
+    def _run(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(**self.db_params)
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {LOOKUP_CHANNEL}")
+                # Changes made while no one was listening are unknown
+                lookup_cache.invalidate()
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], self.poll_seconds)[0]:
+                        conn.poll()
+                        while conn.notifies:
+                            lookup_changed(conn.notifies.pop(0).payload)
+            except (psycopg2.Error, OSError) as e:
+                print(f"Lookup listener disconnected: {e}")
+                self._stop.wait(self.reconnect_seconds)
+            finally:
+                if conn is not None:
+                    conn.close()
@@ -5,7 +5,10 @@ import traceback
 from datetime import datetime
 
 # Import our real modules
-from app.database import db_manager
+from app.database import db_manager, BatchError
+from app.background import BackgroundExecutor
+from app.pid_allocator import pid_allocator
+from app.lookups import LookupListener, lookup_loader
 
 # Import screen modules
 from screens.dashboard_screen import DashboardScreen
@@ -37,6 +40,20 @@ class SportsInstituteApp:
         # Create main interface (but don't show welcome screen yet)
         self.create_main_interface_structure()
 
+        # Database work runs on worker threads; results come back through root.after
+        self.executor = BackgroundExecutor(self.root, on_busy_change=self.set_loading)
+
+        # Reserve a block of person IDs up front so Add dialogs open without a query
+        pid_allocator.submit = self.executor.submit
+        pid_allocator.refill_in_background()
+
+        # Dialogs load missing pick lists on the executor too
+        lookup_loader.submit = self.executor.submit
+
+        # Drop cached pick lists when another client changes them (needs migration 007)
+        self.lookup_listener = LookupListener(db_manager.db_params)
+        self.lookup_listener.start()
+
         # Initialize screen classes after the content frame is created
         self.dashboard_screen = DashboardScreen(self)
         self.workers_screen = WorkersScreen(self)
@@ -179,6 +196,13 @@ class SportsInstituteApp:
                                      fg="#2c3e50", bg="#ecf0f1")
         self.status_label.pack(side="left", padx=10, pady=5)
 
+        # Background work indicator
+        self.loading_label = tk.Label(status_frame,
+                                      text="",
+                                      font=("Arial", 9, "italic"),
+                                      fg="#e67e22", bg="#ecf0f1")
+        self.loading_label.pack(side="left", padx=10, pady=5)
+
         # Database connection status
         self.db_status_label = tk.Label(status_frame,
                                         text="Database: Connected",
@@ -215,8 +239,25 @@ class SportsInstituteApp:
         self.status_label.config(text=message)
         self.root.after(3000, lambda: self.status_label.config(text="Ready"))
 
+    def set_loading(self, pending):
+        """Show a loading indicator while background tasks are pending"""
+        self.loading_label.config(text=f"⏳ Loading... ({pending})" if pending else "")
+
+    def run_in_background(self, fn, *args, **kwargs):
+        """Run a database call off the Tk thread (see BackgroundExecutor.submit)"""
+        return self.executor.submit(fn, *args, **kwargs)
+
+    def show_error(self, message, error):
+        """Error dialog for a failed background call (an on_error, so on the Tk thread)"""
+        if isinstance(error, BatchError):
+            messagebox.showerror("Error", f"{message}:\n\n{error.summary()}")
+        else:
+            messagebox.showerror("Error", f"{message}: {str(error)}")
+
     def clear_content(self):
         """Clear the content area"""
+        # Results still in flight for the previous screen are no longer wanted
+        self.executor.new_scope()
         for widget in self.content_frame.winfo_children():
             widget.destroy()
 
@@ -249,7 +290,9 @@ class SportsInstituteApp:
         """Exit the application"""
         if messagebox.askyesno("Exit", "Are you sure you want to exit?"):
             try:
-                if db_manager.connection:
+                self.executor.shutdown()
+                self.lookup_listener.stop()
+                if db_manager.pool:
                     db_manager.disconnect()
             except:
                 pass
@@ -264,7 +307,9 @@ class SportsInstituteApp:
             traceback.print_exc()
         finally:
             try:
-                if db_manager.connection:
+                self.executor.shutdown()
+                self.lookup_listener.stop()
+                if db_manager.pool:
                     db_manager.disconnect()
             except:
                 pass
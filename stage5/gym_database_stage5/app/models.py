@@ -0,0 +1,69 @@
+# models.py - Typed rows for the managed tables
+#
+# NamedTuples: as compact as the plain tuples psycopg2 returns (no per-row
+# __dict__), still indexable and sliceable by the grids, but read by field
+# name everywhere else. DatabaseManager fills them by column name (see
+# execute_query's row_type), so reordering a SELECT list cannot shift fields.
+from datetime import date
+from decimal import Decimal
+from typing import NamedTuple, Optional
+
+
+class Equipment(NamedTuple):
+    """One equipment row, in equipment grid column order"""
+    equipment_id: int
+    name: str
+    category: str
+    purchase_date: Optional[date]
+    warranty_expiry: Optional[date]
+    brand: Optional[str]
+
+
+class Worker(NamedTuple):
+    """A worker as the workers grid shows it"""
+    pid: int
+    firstname: str
+    lastname: str
+    job: str
+    contract: str
+    dateofeployment: date
+
+
+class WorkerDetails(NamedTuple):
+    """A worker with the person fields, in WorkerDialog field order"""
+    pid: int
+    firstname: str
+    lastname: str
+    dateofb: date
+    address: str
+    phone: Decimal
+    email: str
+    job: str
+    contract: str
+    dateofeployment: date
+
+
+class Supplier(NamedTuple):
+    """A supplier with the person fields, in suppliers grid column order"""
+    pid: int
+    firstname: str
+    lastname: str
+    dateofb: date
+    address: str
+    phone: Decimal
+    email: str
+
+
+class EquipmentSupply(NamedTuple):
+    """An equipment_supplier row joined to its equipment and person names"""
+    equipment_id: int
+    equipment_name: str
+    category: str
+    pid: int
+    person_name: str
+    quantity: Optional[int]
+    supply_date: Optional[date]
+
+    @property
+    def key(self):
+        return self.equipment_id, self.pid
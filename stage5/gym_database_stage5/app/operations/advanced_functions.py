@@ -1,7 +1,8 @@
 # advanced_functions.py
 from app.database import db_manager
+from app.lookups import lookup_cache, lookup_changed, lookup_loader
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox
 
 
 class AdvancedFunctions:
@@ -10,113 +11,81 @@ class AdvancedFunctions:
 
     def get_workers_with_most_hours(self):
         """Query workers with most working hours"""
-        try:
-            query = """
-                SELECT p.firstname || ' ' || p.lastname as worker_name,
-                       w.job,
-                       COUNT(s.pid) as total_shifts,
-                       SUM(EXTRACT(EPOCH FROM (s.clock_out - s.clock_in)) / 3600) as total_hours
-                FROM person p
-                JOIN worker w ON p.pid = w.pid
-                LEFT JOIN shift s ON p.pid = s.pid
-                GROUP BY p.pid, p.firstname, p.lastname, w.job
-                HAVING SUM(EXTRACT(EPOCH FROM (s.clock_out - s.clock_in)) / 3600) > 0
-                ORDER BY total_hours DESC
-                LIMIT 10
-            """
-            return db_manager.execute_query(query, fetch='all')
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to execute query: {str(e)}")
-            return []
+        query = """
+            SELECT p.firstname || ' ' || p.lastname as worker_name,
+                   w.job,
+                   COUNT(s.pid) as total_shifts,
+                   SUM(EXTRACT(EPOCH FROM (s.clock_out - s.clock_in)) / 3600) as total_hours
+            FROM person p
+            JOIN worker w ON p.pid = w.pid
+            LEFT JOIN shift s ON p.pid = s.pid
+            GROUP BY p.pid, p.firstname, p.lastname, w.job
+            HAVING SUM(EXTRACT(EPOCH FROM (s.clock_out - s.clock_in)) / 3600) > 0
+            ORDER BY total_hours DESC
+            LIMIT 10
+        """
+        return db_manager.execute_query(query, fetch='all')
 
     def get_equipment_maintenance_needs(self):
         """Query equipment that needs maintenance"""
-        try:
-            query = """
-                SELECT e.name, e.category, e.brand, e.warranty_expiry,
-                       CASE 
-                           WHEN e.warranty_expiry < CURRENT_DATE THEN 'Expired'
-                           WHEN e.warranty_expiry < CURRENT_DATE + INTERVAL '30 days' THEN 'Expiring Soon'
-                           ELSE 'Valid'
-                       END as warranty_status,
-                       COUNT(m.contract_id) as maintenance_count
-                FROM equipment e
-                LEFT JOIN maintenance m ON e.equipment_id = m.equipment_id
-                GROUP BY e.equipment_id, e.name, e.category, e.brand, e.warranty_expiry
-                ORDER BY e.warranty_expiry ASC
-            """
-            return db_manager.execute_query(query, fetch='all')
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to execute query: {str(e)}")
-            return []
+        query = """
+            SELECT e.name, e.category, e.brand, e.warranty_expiry,
+                   CASE 
+                       WHEN e.warranty_expiry < CURRENT_DATE THEN 'Expired'
+                       WHEN e.warranty_expiry < CURRENT_DATE + INTERVAL '30 days' THEN 'Expiring Soon'
+                       ELSE 'Valid'
+                   END as warranty_status,
+                   COUNT(m.contract_id) as maintenance_count
+            FROM equipment e
+            LEFT JOIN maintenance m ON e.equipment_id = m.equipment_id
+            GROUP BY e.equipment_id, e.name, e.category, e.brand, e.warranty_expiry
+            ORDER BY e.warranty_expiry ASC
+        """
+        return db_manager.execute_query(query, fetch='all')
 
     def get_worker_shift_summary(self, worker_id):
         """Execute worker shift summary function"""
-        try:
-            query = "SELECT * FROM get_worker_shift_summary(%s)"
-            result = db_manager.execute_query(query, (worker_id,), fetch='one')
-            return result
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to execute function: {str(e)}")
-            return None
+        query = "SELECT * FROM get_worker_shift_summary(%s)"
+        return db_manager.execute_query(query, (worker_id,), fetch='one')
+
+    def get_worker_shift_summaries(self, worker_ids=None):
+        """Shift summaries for the given worker IDs (all workers when None) in one call"""
+        query = "SELECT * FROM get_worker_shift_summaries(%s::integer[])"
+        return db_manager.execute_query(query, (worker_ids,), fetch='all')
 
     def get_equipment_maintenance_status(self):
         """Execute equipment maintenance status function"""
-        try:
-            # Execute the function that returns a cursor
-            cursor_query = "SELECT get_equipment_maintenance_status()"
-            cursor_name = db_manager.execute_query(cursor_query, fetch='one')[0]
-
-            # Fetch all results from the cursor
-            fetch_query = f'FETCH ALL IN "{cursor_name}"'
-            results = db_manager.execute_query(fetch_query, fetch='all')
-            return results
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to execute function: {str(e)}")
-            return []
+        # The function returns a cursor; read it in batches rather than FETCH ALL
+        return list(db_manager.iter_refcursor("SELECT get_equipment_maintenance_status()"))
 
     def update_worker_contract(self, worker_id, job_title, contract_type, wage_increase):
         """Execute update worker contract procedure"""
-        try:
-            query = "CALL update_worker_contract(%s, %s, %s, %s)"
-            db_manager.execute_query(query, (worker_id, job_title, contract_type, wage_increase))
-            db_manager.commit()
-            return True
-        except Exception as e:
-            db_manager.rollback()
-            messagebox.showerror("Error", f"Failed to execute procedure: {str(e)}")
-            return False
+        query = "CALL update_worker_contract(%s, %s, %s, %s)"
+        db_manager.execute_query(query, (worker_id, job_title, contract_type, wage_increase))
+        db_manager.commit()
+        lookup_changed('worker')
+        return True
 
-    def process_equipment_orders(self, supplier_id, order_date):
-        """Execute process equipment orders procedure"""
-        try:
-            query = "CALL process_equipment_orders(%s, %s)"
-            db_manager.execute_query(query, (supplier_id, order_date))
-            db_manager.commit()
-            return True
-        except Exception as e:
-            db_manager.rollback()
-            messagebox.showerror("Error", f"Failed to execute procedure: {str(e)}")
-            return False
+    def process_equipment_orders(self, supplier_ids, order_date, end_date=None):
+        """Priced order lines plus one summary row per supplier (all suppliers when supplier_ids is None)"""
+        query = "SELECT * FROM price_equipment_orders(%s::integer[], %s, %s)"
+        return db_manager.execute_query(query, (supplier_ids, order_date, end_date), fetch='all')
 
     def get_workers_for_contract_update(self):
-        """Get list of workers for contract updates"""
-        try:
-            query = """
-                SELECT p.pid, p.firstname || ' ' || p.lastname as full_name, w.job, w.contract
-                FROM person p
-                JOIN worker w ON p.pid = w.pid
-                ORDER BY p.firstname
-            """
-            return db_manager.execute_query(query, fetch='all')
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to get workers: {str(e)}")
-            return []
+        """Get list of workers for contract updates (shared lookup_cache entry)"""
+        query = """
+            SELECT p.pid, p.firstname || ' ' || p.lastname as full_name, w.job, w.contract
+            FROM person p
+            JOIN worker w ON p.pid = w.pid
+            ORDER BY p.firstname
+        """
+        return lookup_cache.get_or_load('workers', lambda: db_manager.execute_query(query, fetch='all'))
 
 
 class ContractUpdateDialog:
     def __init__(self, parent):
         self.result = None
+        self.workers = None
 
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("Update Worker Contract")
@@ -163,15 +132,15 @@ class ContractUpdateDialog:
                   bg="#e74c3c", fg="white", width=10).pack(side="right", padx=5)
 
     def load_workers(self):
-        """Load workers into combobox"""
-        try:
-            adv_func = AdvancedFunctions()
-            self.workers = adv_func.get_workers_for_contract_update()
-
-            worker_names = [f"{worker[1]} (ID: {worker[0]}) - {worker[2]}" for worker in self.workers]
-            self.worker_combo['values'] = worker_names
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load workers: {str(e)}")
+        """Load workers into combobox (in the background when the list is not cached)"""
+        lookup_loader.load('workers', AdvancedFunctions().get_workers_for_contract_update, self._show_workers,
+                           lambda e: messagebox.showerror("Error", f"Failed to load workers: {str(e)}"))
+
+    def _show_workers(self, workers):
+        if not self.dialog.winfo_exists():
+            return
+        self.workers = workers
+        self.worker_combo['values'] = [f"{worker[1]} (ID: {worker[0]}) - {worker[2]}" for worker in workers]
 
     def save(self):
         try:
@@ -1,8 +1,36 @@
 # real_equipment_operations.py - Equipment Management for actual database schema
-from app.database import db_manager
+from app.models import Equipment
+from app.database import db_manager, contains_pattern, SEARCH_LIMIT
+from app.lookups import lookup_changed
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+# Keyset pages of the equipment grid: the first page, and the pages after an equipment_id
+EQUIPMENT_FIRST_PAGE_QUERY = """
+    SELECT equipment_id, name, category, purchase_date, warranty_expiry, brand
+    FROM equipment
+    ORDER BY equipment_id
+    LIMIT %(limit)s
+"""
+EQUIPMENT_NEXT_PAGE_QUERY = """
+    SELECT equipment_id, name, category, purchase_date, warranty_expiry, brand
+    FROM equipment
+    WHERE equipment_id > %(after_id)s
+    ORDER BY equipment_id
+    LIMIT %(limit)s
+"""
+
+# Search box of the equipment grid (trigram-indexed ILIKE)
+EQUIPMENT_SEARCH_QUERY = """
+    SELECT equipment_id, name, category, purchase_date, warranty_expiry, brand
+    FROM equipment
+    WHERE name ILIKE %(pattern)s
+       OR category ILIKE %(pattern)s
+       OR brand ILIKE %(pattern)s
+    ORDER BY equipment_id
+    LIMIT %(limit)s
+"""
+
 
 class EquipmentOperations:
     def __init__(self):
@@ -10,83 +38,126 @@ class EquipmentOperations:
 
     def get_all_equipment(self):
         """Retrieve all equipment from existing equipment table"""
-        try:
-            query = """
-                SELECT equipment_id, name, category, purchase_date, warranty_expiry, brand
-                FROM equipment
-                ORDER BY equipment_id
-            """
-            return db_manager.execute_query(query, fetch='all')
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to retrieve equipment: {str(e)}")
-            return []
+        query = """
+            SELECT equipment_id, name, category, purchase_date, warranty_expiry, brand
+            FROM equipment
+            ORDER BY equipment_id
+        """
+        return db_manager.execute_query(query, fetch='all', row_type=Equipment)
+
+    def get_equipment_page(self, after_row=None, limit=100):
+        """Retrieve one page of equipment, keyed on equipment_id (pass the last row of the previous page)"""
+        query, params = EQUIPMENT_FIRST_PAGE_QUERY, {'limit': limit}
+        if after_row is not None:
+            query, params = EQUIPMENT_NEXT_PAGE_QUERY, {'after_id': after_row.equipment_id, 'limit': limit}
+        return db_manager.execute_query(query, params, fetch='all', prepared=True, row_type=Equipment)
+
+    def estimate_equipment_count(self):
+        """Fast (approximate) number of equipment items"""
+        return db_manager.estimate_row_count('equipment')
+
+    def search_equipment(self, text, limit=SEARCH_LIMIT):
+        """Equipment whose name, category or brand contains `text` (trigram-indexed ILIKE)"""
+        query = EQUIPMENT_SEARCH_QUERY
+        params = {'pattern': contains_pattern(text), 'limit': limit}
+        return db_manager.execute_query(query, params, fetch='all', prepared=True, row_type=Equipment)
 
     def add_equipment(self, equipment_data):
-        """Add new equipment to database"""
-        try:
-            query = """
-                INSERT INTO equipment (name, category, purchase_date, warranty_expiry, brand)
-                VALUES (%(name)s, %(category)s, %(purchase_date)s, %(warranty_expiry)s, %(brand)s)
-            """
-            db_manager.execute_query(query, equipment_data)
-            db_manager.commit()
-            return True
-
-        except Exception as e:
-            db_manager.rollback()
-            messagebox.showerror("Error", f"Failed to add equipment: {str(e)}")
-            return False
+        """Add new equipment to database; returns the inserted row"""
+        query = """
+            INSERT INTO equipment (name, category, purchase_date, warranty_expiry, brand)
+            VALUES (%(name)s, %(category)s, %(purchase_date)s, %(warranty_expiry)s, %(brand)s)
+            RETURNING equipment_id, name, category, purchase_date, warranty_expiry, brand
+        """
+        row = db_manager.execute_query(query, equipment_data, fetch='one', prepared=True, row_type=Equipment)
+        db_manager.commit()
+        lookup_changed('equipment')
+        return row
 
     def update_equipment(self, equipment_id, equipment_data):
-        """Update existing equipment"""
-        try:
-            query = """
-                UPDATE equipment 
-                SET name=%(name)s, category=%(category)s, purchase_date=%(purchase_date)s, 
-                    warranty_expiry=%(warranty_expiry)s, brand=%(brand)s
-                WHERE equipment_id=%(equipment_id)s
-            """
-            equipment_data['equipment_id'] = equipment_id
-            db_manager.execute_query(query, equipment_data)
-            db_manager.commit()
-            return True
-
-        except Exception as e:
-            db_manager.rollback()
-            messagebox.showerror("Error", f"Failed to update equipment: {str(e)}")
-            return False
+        """Update existing equipment; returns the updated row (None if it no longer exists)"""
+        query = """
+            UPDATE equipment 
+            SET name=%(name)s, category=%(category)s, purchase_date=%(purchase_date)s, 
+                warranty_expiry=%(warranty_expiry)s, brand=%(brand)s
+            WHERE equipment_id=%(equipment_id)s
+            RETURNING equipment_id, name, category, purchase_date, warranty_expiry, brand
+        """
+        equipment_data['equipment_id'] = equipment_id
+        row = db_manager.execute_query(query, equipment_data, fetch='one', prepared=True, row_type=Equipment)
+        db_manager.commit()
+        lookup_changed('equipment')
+        return row
 
     def delete_equipment(self, equipment_id):
         """Delete equipment from database"""
-        try:
-            # First delete related equipment_supplier records
-            delete_relations_query = "DELETE FROM equipment_supplier WHERE equipment_id = %s"
-            db_manager.execute_query(delete_relations_query, (equipment_id,))
-
-            # Then delete the equipment
-            delete_equipment_query = "DELETE FROM equipment WHERE equipment_id = %s"
-            db_manager.execute_query(delete_equipment_query, (equipment_id,))
-
-            db_manager.commit()
-            return True
-
-        except Exception as e:
-            db_manager.rollback()
-            messagebox.showerror("Error", f"Failed to delete equipment: {str(e)}")
-            return False
+        # First delete related equipment_supplier records
+        delete_relations_query = "DELETE FROM equipment_supplier WHERE equipment_id = %s"
+        db_manager.execute_query(delete_relations_query, (equipment_id,), prepared=True)
+
+        # Then delete the equipment
+        delete_equipment_query = "DELETE FROM equipment WHERE equipment_id = %s"
+        db_manager.execute_query(delete_equipment_query, (equipment_id,), prepared=True)
+
+        db_manager.commit()
+        lookup_changed('equipment')
+        return True
+
+    def add_many(self, equipment_list):
+        """Add many equipment items in one transaction; returns the inserted rows"""
+        query = """
+            INSERT INTO equipment (name, category, purchase_date, warranty_expiry, brand)
+            VALUES %s
+            RETURNING equipment_id, name, category, purchase_date, warranty_expiry, brand
+        """
+        template = "(%(name)s, %(category)s, %(purchase_date)s, %(warranty_expiry)s, %(brand)s)"
+        rows = db_manager.execute_batch(query, equipment_list, template, fetch=True, row_type=Equipment)
+        db_manager.commit()
+        lookup_changed('equipment')
+        return rows
+
+    def update_many(self, equipment_list):
+        """Update many equipment items (each dict carries its equipment_id); returns the updated rows"""
+        query = """
+            UPDATE equipment e
+            SET name=v.name, category=v.category, purchase_date=v.purchase_date,
+                warranty_expiry=v.warranty_expiry, brand=v.brand
+            FROM (VALUES %s) AS v (equipment_id, name, category, purchase_date, warranty_expiry, brand)
+            WHERE e.equipment_id = v.equipment_id
+            RETURNING e.equipment_id, e.name, e.category, e.purchase_date, e.warranty_expiry, e.brand
+        """
+        template = ("(%(equipment_id)s::integer, %(name)s, %(category)s, %(purchase_date)s::date, "
+                    "%(warranty_expiry)s::date, %(brand)s)")
+        rows = db_manager.execute_batch(query, equipment_list, template, fetch=True, row_type=Equipment)
+        db_manager.commit()
+        lookup_changed('equipment')
+        return rows
+
+    def delete_many(self, equipment_ids):
+        """Delete many equipment items and their supplier relationships; returns the deleted IDs"""
+        query = """
+            WITH v (equipment_id) AS (VALUES %s),
+            relations AS (
+                DELETE FROM equipment_supplier es USING v WHERE es.equipment_id = v.equipment_id
+            )
+            DELETE FROM equipment e USING v
+            WHERE e.equipment_id = v.equipment_id
+            RETURNING e.equipment_id
+        """
+        rows = db_manager.execute_batch(query, [(i,) for i in equipment_ids], fetch=True,
+                                        row_label=lambda i: f"Equipment {equipment_ids[i]}")
+        db_manager.commit()
+        lookup_changed('equipment')
+        return [row[0] for row in rows]
 
     def get_equipment_details(self, equipment_id):
         """Get detailed equipment information"""
-        try:
-            query = """
-                SELECT equipment_id, name, category, purchase_date, warranty_expiry, brand
-                FROM equipment
-                WHERE equipment_id = %s
-            """
-            return db_manager.execute_query(query, (equipment_id,), fetch='one')
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to get equipment details: {str(e)}")
-            return None
+        query = """
+            SELECT equipment_id, name, category, purchase_date, warranty_expiry, brand
+            FROM equipment
+            WHERE equipment_id = %s
+        """
+        return db_manager.execute_query(query, (equipment_id,), fetch='one', prepared=True, row_type=Equipment)
 
 
 class EquipmentDialog:
@@ -131,13 +202,7 @@ class EquipmentDialog:
 
         # Fill data if editing
         if equipment_data:
-            field_mapping = {
-                'name': equipment_data[1] if len(equipment_data) > 1 else '',
-                'category': equipment_data[2] if len(equipment_data) > 2 else '',
-                'purchase_date': str(equipment_data[3]) if len(equipment_data) > 3 and equipment_data[3] else '',
-                'warranty_expiry': str(equipment_data[4]) if len(equipment_data) > 4 and equipment_data[4] else '',
-                'brand': equipment_data[5] if len(equipment_data) > 5 else ''
-            }
+            field_mapping = equipment_data._asdict()
 
             for field_name, value in field_mapping.items():
                 if field_name in self.entries and value:
@@ -1,8 +1,93 @@
 # real_equipment_supplier_operations.py - Equipment-Supplier Relationship Management for actual schema
-from app.database import db_manager
+from app.models import EquipmentSupply
+from app.database import db_manager, contains_pattern, SEARCH_LIMIT
+from app.lookups import lookup_cache, lookup_loader
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+# Keyset pages of the relationships grid, newest supply first: the first page,
+# and the pages after a (supply date, equipment_id, pid) key. Migration 008
+# indexes this order.
+RELATIONSHIPS_FIRST_PAGE_QUERY = """
+    SELECT
+        es.equipment_id,
+        e.name as equipment_name,
+        e.category,
+        es.pid,
+        p.firstname || ' ' || p.lastname as person_name,
+        es.quantity,
+        es.supply_date
+    FROM equipment_supplier es
+    JOIN equipment e ON es.equipment_id = e.equipment_id
+    JOIN person p ON es.pid = p.pid
+    ORDER BY COALESCE(es.supply_date, 'infinity'::date) DESC, es.equipment_id DESC, es.pid DESC
+    LIMIT %(limit)s
+"""
+RELATIONSHIPS_NEXT_PAGE_QUERY = """
+    SELECT
+        es.equipment_id,
+        e.name as equipment_name,
+        e.category,
+        es.pid,
+        p.firstname || ' ' || p.lastname as person_name,
+        es.quantity,
+        es.supply_date
+    FROM equipment_supplier es
+    JOIN equipment e ON es.equipment_id = e.equipment_id
+    JOIN person p ON es.pid = p.pid
+    WHERE (COALESCE(es.supply_date, 'infinity'::date), es.equipment_id, es.pid)
+          < (%(after_date)s::date, %(after_equipment_id)s, %(after_pid)s)
+    ORDER BY COALESCE(es.supply_date, 'infinity'::date) DESC, es.equipment_id DESC, es.pid DESC
+    LIMIT %(limit)s
+"""
+
+# Search box of the relationships grid, in the same order as the pages
+RELATIONSHIPS_SEARCH_QUERY = """
+    SELECT
+        es.equipment_id,
+        e.name as equipment_name,
+        e.category,
+        es.pid,
+        p.firstname || ' ' || p.lastname as person_name,
+        es.quantity,
+        es.supply_date
+    FROM equipment_supplier es
+    JOIN equipment e ON es.equipment_id = e.equipment_id
+    JOIN person p ON es.pid = p.pid
+    WHERE es.equipment_id::text ILIKE %(pattern)s
+       OR e.name ILIKE %(pattern)s
+       OR e.category ILIKE %(pattern)s
+       OR es.pid::text ILIKE %(pattern)s
+       OR p.firstname || ' ' || p.lastname ILIKE %(pattern)s
+       OR es.quantity::text ILIKE %(pattern)s
+       OR date_text(es.supply_date) ILIKE %(pattern)s
+    ORDER BY COALESCE(es.supply_date, 'infinity'::date) DESC, es.equipment_id DESC, es.pid DESC
+    LIMIT %(limit)s
+"""
+
+# Supply rows of one person, removed before the person stops being a worker/supplier
+PERSON_SUPPLIES_DELETE_QUERY = "DELETE FROM equipment_supplier WHERE pid = %s"
+
+
+def merge_deliveries(es_list):
+    """Combine rows for the same (equipment_id, pid): quantities add up, the latest date wins.
+
+    ON CONFLICT DO UPDATE may not touch one row twice in a statement, so a
+    batch must not repeat a key.
+    """
+    merged = {}
+    for es in es_list:
+        key = (es['equipment_id'], es['pid'])
+        if key not in merged:
+            merged[key] = dict(es)
+            continue
+        row = merged[key]
+        if es['quantity'] is not None:
+            row['quantity'] = (row['quantity'] or 0) + es['quantity']
+        if es['supply_date'] and (not row['supply_date'] or str(es['supply_date']) > str(row['supply_date'])):
+            row['supply_date'] = es['supply_date']
+    return list(merged.values())
+
 
 class EquipmentSupplierOperations:
     def __init__(self):
@@ -10,104 +95,189 @@ class EquipmentSupplierOperations:
 
     def get_all_equipment_suppliers(self):
         """Retrieve all equipment-supplier relationships with details"""
-        try:
-            query = """
-                 SELECT 
-                    es.equipment_id,
-                    e.name as equipment_name,
-                    e.category,
-                    es.pid,
-                    p.firstname || ' ' || p.lastname as person_name,
-                    es.quantity,
-                    es.supply_date
-
-                FROM equipment_supplier es
-                JOIN equipment e ON es.equipment_id = e.equipment_id
-                JOIN person p ON es.pid = p.pid
-                LEFT JOIN worker w ON es.pid = w.pid
-                LEFT JOIN supplier s ON es.pid = s.pid
-                ORDER BY es.supply_date DESC
-            """
-            return db_manager.execute_query(query, fetch='all')
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to retrieve equipment-supplier data: {str(e)}")
-            return []
+        query = """
+             SELECT 
+                es.equipment_id,
+                e.name as equipment_name,
+                e.category,
+                es.pid,
+                p.firstname || ' ' || p.lastname as person_name,
+                es.quantity,
+                es.supply_date
+
+            FROM equipment_supplier es
+            JOIN equipment e ON es.equipment_id = e.equipment_id
+            JOIN person p ON es.pid = p.pid
+            LEFT JOIN worker w ON es.pid = w.pid
+            LEFT JOIN supplier s ON es.pid = s.pid
+            ORDER BY es.supply_date DESC
+        """
+        return db_manager.execute_query(query, fetch='all', row_type=EquipmentSupply)
+
+    def get_equipment_suppliers_page(self, after_row=None, limit=100):
+        """Retrieve one page of relationships, newest supply first.
+
+        Keyed on (supply_date, equipment_id, pid) descending; rows without a
+        supply date sort first, as with the plain ORDER BY supply_date DESC.
+        """
+        query, params = RELATIONSHIPS_FIRST_PAGE_QUERY, {'limit': limit}
+        if after_row is not None:
+            query = RELATIONSHIPS_NEXT_PAGE_QUERY
+            params.update(after_date=after_row.supply_date or 'infinity',
+                          after_equipment_id=after_row.equipment_id, after_pid=after_row.pid)
+        return db_manager.execute_query(query, params, fetch='all', prepared=True, row_type=EquipmentSupply)
+
+    def estimate_equipment_supplier_count(self):
+        """Fast (approximate) number of equipment-supplier relationships"""
+        return db_manager.estimate_row_count('equipment_supplier')
+
+    def search_equipment_suppliers(self, text, limit=SEARCH_LIMIT):
+        """Relationships where any displayed column contains `text`, newest supply first"""
+        query = RELATIONSHIPS_SEARCH_QUERY
+        params = {'pattern': contains_pattern(text), 'limit': limit}
+        return db_manager.execute_query(query, params, fetch='all', prepared=True, row_type=EquipmentSupply)
 
     def add_equipment_supplier(self, es_data):
-        """Add new equipment-supplier relationship"""
-        try:
-            query = """
+        """Add an equipment-supplier relationship; returns the new grid row.
+
+        A repeat delivery of the same equipment from the same supplier adds to
+        the stored quantity and keeps the latest supply date.
+        """
+        query = """
+            WITH es AS (
                 INSERT INTO equipment_supplier (equipment_id, pid, quantity, supply_date)
                 VALUES (%(equipment_id)s, %(pid)s, %(quantity)s, %(supply_date)s)
-            """
-            db_manager.execute_query(query, es_data)
-            db_manager.commit()
-            return True
-
-        except Exception as e:
-            db_manager.rollback()
-            messagebox.showerror("Error", f"Failed to add equipment-supplier relationship: {str(e)}")
-            return False
+                ON CONFLICT (equipment_id, pid) DO UPDATE
+                SET quantity = COALESCE(equipment_supplier.quantity + EXCLUDED.quantity,
+                                        equipment_supplier.quantity, EXCLUDED.quantity),
+                    supply_date = GREATEST(equipment_supplier.supply_date, EXCLUDED.supply_date)
+                RETURNING equipment_id, pid, quantity, supply_date
+            )
+            SELECT es.equipment_id, e.name as equipment_name, e.category, es.pid,
+                   p.firstname || ' ' || p.lastname as person_name, es.quantity, es.supply_date
+            FROM es
+            JOIN equipment e ON es.equipment_id = e.equipment_id
+            JOIN person p ON es.pid = p.pid
+        """
+        row = db_manager.execute_query(query, es_data, fetch='one', prepared=True, row_type=EquipmentSupply)
+        db_manager.commit()
+        return row
 
     def update_equipment_supplier(self, original_data, es_data):
-        """Update existing equipment-supplier relationship"""
-        try:
-            query = """
+        """Update existing equipment-supplier relationship; returns the updated grid row (None if it no longer exists)"""
+        query = """
+            WITH es AS (
                 UPDATE equipment_supplier 
                 SET pid=%(pid)s, quantity=%(quantity)s, supply_date=%(supply_date)s
                 WHERE equipment_id=%(equipment_id)s AND pid=%(original_pid)s
-            """
-            es_data['equipment_id'] = original_data[0]
-            es_data['original_pid'] = original_data[3]
-            db_manager.execute_query(query, es_data)
-            db_manager.commit()
-            return True
-
-        except Exception as e:
-            db_manager.rollback()
-            messagebox.showerror("Error", f"Failed to update equipment-supplier relationship: {str(e)}")
-            return False
+                RETURNING equipment_id, pid, quantity, supply_date
+            )
+            SELECT es.equipment_id, e.name as equipment_name, e.category, es.pid,
+                   p.firstname || ' ' || p.lastname as person_name, es.quantity, es.supply_date
+            FROM es
+            JOIN equipment e ON es.equipment_id = e.equipment_id
+            JOIN person p ON es.pid = p.pid
+        """
+        es_data['equipment_id'] = original_data.equipment_id
+        es_data['original_pid'] = original_data.pid
+        row = db_manager.execute_query(query, es_data, fetch='one', prepared=True, row_type=EquipmentSupply)
+        db_manager.commit()
+        return row
 
     def delete_equipment_supplier(self, equipment_id, pid):
         """Delete equipment-supplier relationship"""
-        try:
-            query = "DELETE FROM equipment_supplier WHERE equipment_id = %s AND pid = %s"
-            db_manager.execute_query(query, (equipment_id, pid))
-            db_manager.commit()
-            return True
-
-        except Exception as e:
-            db_manager.rollback()
-            messagebox.showerror("Error", f"Failed to delete equipment-supplier relationship: {str(e)}")
-            return False
+        query = "DELETE FROM equipment_supplier WHERE equipment_id = %s AND pid = %s"
+        db_manager.execute_query(query, (equipment_id, pid), prepared=True)
+        db_manager.commit()
+        return True
+
+    def add_many(self, es_list):
+        """Add many equipment-supplier relationships in one transaction; returns the new grid rows.
+
+        Rows for a relationship that already exists (or repeats within the
+        batch) are merged as in add_equipment_supplier.
+        """
+        es_list = merge_deliveries(es_list)
+        query = """
+            WITH es AS (
+                INSERT INTO equipment_supplier (equipment_id, pid, quantity, supply_date)
+                VALUES %s
+                ON CONFLICT (equipment_id, pid) DO UPDATE
+                SET quantity = COALESCE(equipment_supplier.quantity + EXCLUDED.quantity,
+                                        equipment_supplier.quantity, EXCLUDED.quantity),
+                    supply_date = GREATEST(equipment_supplier.supply_date, EXCLUDED.supply_date)
+                RETURNING equipment_id, pid, quantity, supply_date
+            )
+            SELECT es.equipment_id, e.name as equipment_name, e.category, es.pid,
+                   p.firstname || ' ' || p.lastname as person_name, es.quantity, es.supply_date
+            FROM es
+            JOIN equipment e ON es.equipment_id = e.equipment_id
+            JOIN person p ON es.pid = p.pid
+        """
+        template = "(%(equipment_id)s, %(pid)s, %(quantity)s, %(supply_date)s)"
+        rows = db_manager.execute_batch(
+            query, es_list, template, fetch=True, row_type=EquipmentSupply,
+            row_label=lambda i: f"Equipment {es_list[i]['equipment_id']} / person {es_list[i]['pid']}")
+        db_manager.commit()
+        return rows
+
+    def update_many(self, es_list):
+        """Update quantity and supply date of many relationships, keyed by (equipment_id, pid)"""
+        query = """
+            WITH es AS (
+                UPDATE equipment_supplier es
+                SET quantity=v.quantity, supply_date=v.supply_date
+                FROM (VALUES %s) AS v (equipment_id, pid, quantity, supply_date)
+                WHERE es.equipment_id = v.equipment_id AND es.pid = v.pid
+                RETURNING es.equipment_id, es.pid, es.quantity, es.supply_date
+            )
+            SELECT es.equipment_id, e.name as equipment_name, e.category, es.pid,
+                   p.firstname || ' ' || p.lastname as person_name, es.quantity, es.supply_date
+            FROM es
+            JOIN equipment e ON es.equipment_id = e.equipment_id
+            JOIN person p ON es.pid = p.pid
+        """
+        template = "(%(equipment_id)s::integer, %(pid)s::integer, %(quantity)s::integer, %(supply_date)s::date)"
+        rows = db_manager.execute_batch(query, es_list, template, fetch=True, row_type=EquipmentSupply)
+        db_manager.commit()
+        return rows
+
+    def delete_many(self, keys):
+        """Delete many relationships given (equipment_id, pid) pairs; returns the deleted pairs"""
+        keys = list(keys)
+        query = """
+            DELETE FROM equipment_supplier es
+            USING (VALUES %s) AS v (equipment_id, pid)
+            WHERE es.equipment_id = v.equipment_id AND es.pid = v.pid
+            RETURNING es.equipment_id, es.pid
+        """
+        rows = db_manager.execute_batch(query, keys, fetch=True,
+                                        row_label=lambda i: f"Equipment {keys[i][0]} / person {keys[i][1]}")
+        db_manager.commit()
+        return [tuple(row) for row in rows]
 
     def get_equipment_list(self):
-        """Get list of available equipment"""
-        try:
-            query = "SELECT equipment_id, name, category FROM equipment ORDER BY name"
-            return db_manager.execute_query(query, fetch='all')
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to get equipment list: {str(e)}")
-            return []
+        """Get list of available equipment (shared lookup_cache entry)"""
+        query = "SELECT equipment_id, name, category FROM equipment ORDER BY name"
+        return lookup_cache.get_or_load('equipment', lambda: db_manager.execute_query(query, fetch='all'))
 
     def get_person_list(self):
-        """Get list of suppliers only"""
-        try:
-            query = """
-                SELECT p.pid, p.firstname, p.lastname
-                FROM person p
-                JOIN supplier s ON p.pid = s.pid
-                ORDER BY p.firstname
-            """
-            return db_manager.execute_query(query, fetch='all')
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to get supplier list: {str(e)}")
-            return []
+        """Get list of suppliers only (shared lookup_cache entry)"""
+        query = """
+            SELECT p.pid, p.firstname, p.lastname
+            FROM person p
+            JOIN supplier s ON p.pid = s.pid
+            ORDER BY p.firstname
+        """
+        return lookup_cache.get_or_load('suppliers', lambda: db_manager.execute_query(query, fetch='all'))
 
 
 class EquipmentSupplierDialog:
     def __init__(self, parent, title, es_data=None):
         self.result = None
+        self.es_data = es_data
+        self.equipment_list = None
+        self.person_list = None
 
         self.dialog = tk.Toplevel(parent)
         self.dialog.title(title)
@@ -149,7 +319,7 @@ class EquipmentSupplierDialog:
         self.supply_date_entry = tk.Entry(main_frame, font=("Arial", 10), width=37)
         self.supply_date_entry.grid(row=3, column=1, padx=5, pady=15)
 
-        # Fill data if editing
+        # Fill data if editing (the combo boxes are selected once their lists arrive)
         if es_data:
             self.fill_edit_data(es_data)
 
@@ -163,41 +333,43 @@ class EquipmentSupplierDialog:
                   bg="#e74c3c", fg="white", width=12).pack(side="right", padx=10)
 
     def load_equipment(self):
-        """Load equipment into combobox"""
-        try:
-            self.equipment_list = self.es_ops.get_equipment_list()
-            equipment_options = [f"{eq[1]} ({eq[2]}) - ID: {eq[0]}" for eq in self.equipment_list]
-            self.equipment_combo['values'] = equipment_options
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load equipment: {str(e)}")
-
-    def load_persons(self):
-        """Load suppliers into combobox"""
-        try:
-            self.person_list = self.es_ops.get_person_list()
-            person_options = [f"{person[1]} {person[2]} - ID: {person[0]}" for person in self.person_list]
-            self.person_combo['values'] = person_options
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load suppliers: {str(e)}")
-
-    def fill_edit_data(self, es_data):
-        """Fill form with existing data for editing"""
-        try:
-            # Find and select equipment
-            for i, eq in enumerate(self.equipment_list):
-                if eq[0] == es_data[0]:  # equipment_id
+        """Load equipment into combobox (in the background when the list is not cached)"""
+        lookup_loader.load('equipment', self.es_ops.get_equipment_list, self._show_equipment,
+                           lambda e: messagebox.showerror("Error", f"Failed to load equipment: {str(e)}"))
+
+    def _show_equipment(self, equipment_list):
+        if not self.dialog.winfo_exists():
+            return
+        self.equipment_list = equipment_list
+        self.equipment_combo['values'] = [f"{eq[1]} ({eq[2]}) - ID: {eq[0]}" for eq in equipment_list]
+        if self.es_data:
+            for i, eq in enumerate(equipment_list):
+                if eq[0] == self.es_data.equipment_id:
                     self.equipment_combo.current(i)
                     break
 
-            # Find and select person
-            for i, person in enumerate(self.person_list):
-                if person[0] == es_data[3]:  # pid
+    def load_persons(self):
+        """Load suppliers into combobox (in the background when the list is not cached)"""
+        lookup_loader.load('suppliers', self.es_ops.get_person_list, self._show_persons,
+                           lambda e: messagebox.showerror("Error", f"Failed to load suppliers: {str(e)}"))
+
+    def _show_persons(self, person_list):
+        if not self.dialog.winfo_exists():
+            return
+        self.person_list = person_list
+        self.person_combo['values'] = [f"{person[1]} {person[2]} - ID: {person[0]}" for person in person_list]
+        if self.es_data:
+            for i, person in enumerate(person_list):
+                if person[0] == self.es_data.pid:
                     self.person_combo.current(i)
                     break
 
+    def fill_edit_data(self, es_data):
+        """Fill form with existing data for editing"""
+        try:
             # Fill other fields
-            self.quantity_entry.insert(0, str(es_data[5]) if es_data[5] else '')
-            self.supply_date_entry.insert(0, str(es_data[6]) if es_data[6] else '')
+            self.quantity_entry.insert(0, str(es_data.quantity) if es_data.quantity else '')
+            self.supply_date_entry.insert(0, str(es_data.supply_date) if es_data.supply_date else '')
 
         except Exception as e:
             messagebox.showerror("Error", f"Error filling form data: {str(e)}")
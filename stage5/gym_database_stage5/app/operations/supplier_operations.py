@@ -1,7 +1,47 @@
 # real_supplier_operations.py - Supplier Management for actual database schema
-from app.database import db_manager
+from app.models import Supplier
+from app.database import db_manager, contains_pattern, BatchError, SEARCH_LIMIT
+from app.lookups import lookup_changed
+from app.operations.equipment_supplier_operations import PERSON_SUPPLIES_DELETE_QUERY
+from app.pid_allocator import pid_allocator
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import messagebox
+
+# Keyset pages of the suppliers grid: the first page, and the pages after a pid
+SUPPLIERS_FIRST_PAGE_QUERY = """
+    SELECT s.pid, p.firstname, p.lastname, p.dateofb,
+           p.address, p.phone, p.email
+    FROM supplier s
+    JOIN person p ON s.pid = p.pid
+    ORDER BY s.pid
+    LIMIT %(limit)s
+"""
+SUPPLIERS_NEXT_PAGE_QUERY = """
+    SELECT s.pid, p.firstname, p.lastname, p.dateofb,
+           p.address, p.phone, p.email
+    FROM supplier s
+    JOIN person p ON s.pid = p.pid
+    WHERE s.pid > %(after_pid)s
+    ORDER BY s.pid
+    LIMIT %(limit)s
+"""
+
+# Search box of the suppliers grid
+SUPPLIERS_SEARCH_QUERY = """
+    SELECT s.pid, p.firstname, p.lastname, p.dateofb,
+           p.address, p.phone, p.email
+    FROM supplier s
+    JOIN person p ON s.pid = p.pid
+    WHERE p.pid::text ILIKE %(pattern)s
+       OR p.firstname ILIKE %(pattern)s
+       OR p.lastname ILIKE %(pattern)s
+       OR date_text(p.dateofb) ILIKE %(pattern)s
+       OR p.address ILIKE %(pattern)s
+       OR p.phone::text ILIKE %(pattern)s
+       OR p.email ILIKE %(pattern)s
+    ORDER BY s.pid
+    LIMIT %(limit)s
+"""
 
 
 class SupplierOperations:
@@ -10,144 +50,221 @@ class SupplierOperations:
 
     def get_all_suppliers(self):
         """Retrieve all suppliers from existing supplier table"""
-        try:
-            query = """
+        query = """
 SELECT s.pid, p.firstname, p.lastname, p.dateofb, 
-                       p.address, p.phone, p.email
-                FROM supplier s
-                JOIN person p ON s.pid = p.pid
-                ORDER BY s.pid
-            """
-            return db_manager.execute_query(query, fetch='all')
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to retrieve suppliers: {str(e)}")
-            return []
+                   p.address, p.phone, p.email
+            FROM supplier s
+            JOIN person p ON s.pid = p.pid
+            ORDER BY s.pid
+        """
+        return db_manager.execute_query(query, fetch='all', row_type=Supplier)
+
+    def get_suppliers_page(self, after_row=None, limit=100):
+        """Retrieve one page of suppliers, keyed on pid (pass the last row of the previous page)"""
+        query, params = SUPPLIERS_FIRST_PAGE_QUERY, {'limit': limit}
+        if after_row is not None:
+            query, params = SUPPLIERS_NEXT_PAGE_QUERY, {'after_pid': after_row.pid, 'limit': limit}
+        return db_manager.execute_query(query, params, fetch='all', prepared=True, row_type=Supplier)
+
+    def estimate_supplier_count(self):
+        """Fast (approximate) number of suppliers"""
+        return db_manager.estimate_row_count('supplier')
+
+    def search_suppliers(self, text, limit=SEARCH_LIMIT):
+        """Suppliers whose id, name, birth date, address, phone or email contains `text`"""
+        query = SUPPLIERS_SEARCH_QUERY
+        params = {'pattern': contains_pattern(text), 'limit': limit}
+        return db_manager.execute_query(query, params, fetch='all', prepared=True, row_type=Supplier)
 
     def add_supplier(self, supplier_data):
-        """Add new supplier to database"""
-        try:
-            # First, check if person exists, if not create them
-            person_check_query = "SELECT pid FROM person WHERE pid = %(pid)s"
-            existing_person = db_manager.execute_query(person_check_query, {'pid': supplier_data['pid']}, fetch='one')
-
-            if not existing_person:
-                # Insert into person table first
-                person_query = """
-                    INSERT INTO person (pid, firstname, lastname, dateofb, address, phone, email)
-                    VALUES (%(pid)s, %(firstname)s, %(lastname)s, %(dateofb)s, %(address)s, %(phone)s, %(email)s)
-                """
-                db_manager.execute_query(person_query, supplier_data)
-
-            # Insert into supplier table
-            supplier_query = """
+        """Add a supplier, merging with an existing person/supplier of the same pid; returns the grid row.
+
+        Adding an existing person gives them the supplier role; adding an existing
+        supplier updates their details. If the pid belongs to a person with a
+        different name (e.g. a stale reserved PID) nothing is written and
+        ValueError says so.
+        """
+        # One statement: upsert the person (a new person without a reserved PID takes
+        # the next sequence value), then the supplier
+        query = """
+            WITH p AS (
+                INSERT INTO person (pid, firstname, lastname, dateofb, address, phone, email)
+                VALUES (COALESCE(%(pid)s, nextval('person_pid_seq')),
+                        %(firstname)s, %(lastname)s, %(dateofb)s, %(address)s, %(phone)s, %(email)s)
+                ON CONFLICT (pid) DO UPDATE
+                SET dateofb = EXCLUDED.dateofb,
+                    address = EXCLUDED.address,
+                    phone = EXCLUDED.phone,
+                    email = EXCLUDED.email
+                -- Same pid, different name: someone else's row, leave it alone
+                WHERE (person.firstname, person.lastname) = (EXCLUDED.firstname, EXCLUDED.lastname)
+                RETURNING pid, firstname, lastname, dateofb, address, phone, email
+            ), s AS (
                 INSERT INTO supplier (pid)
-                VALUES (%(pid)s)
-            """
-            db_manager.execute_query(supplier_query, supplier_data)
-
-            db_manager.commit()
-            return True
-
-        except Exception as e:
+                SELECT pid FROM p
+                ON CONFLICT (pid) DO NOTHING
+            )
+            SELECT p.pid, p.firstname, p.lastname, p.dateofb,
+                   p.address, p.phone, p.email
+            FROM p
+        """
+        row = db_manager.execute_query(query, supplier_data, fetch='one', prepared=True, row_type=Supplier)
+        if not row:
             db_manager.rollback()
-            messagebox.showerror("Error", f"Failed to add supplier: {str(e)}")
-            return False
-
-    def update_supplier(self, supplier_id, supplier_data):
-        """Update existing supplier"""
-        try:
-            # Get the PID for this supplier
-            pid_query = "SELECT pid FROM supplier WHERE pid = %s"
-            pid_result = db_manager.execute_query(pid_query, (supplier_id,), fetch='one')
-
-            if not pid_result:
-                messagebox.showerror("Error", "Supplier not found")
-                return False
+            pid = supplier_data['pid'] or "from person_pid_seq"
+            raise ValueError(f"Person ID {pid} already belongs to a person with another name; nothing was saved")
 
-            pid = pid_result[0]
+        db_manager.commit()
+        lookup_changed('person', 'supplier')
+        return row
 
-            # Update person table
-            person_query = """
-                UPDATE person 
-                SET firstname=%(firstname)s, lastname=%(lastname)s, dateofb=%(dateofb)s,
-                    address=%(address)s, phone=%(phone)s, email=%(email)s
-                WHERE pid=%(pid)s
-            """
-            supplier_data['pid'] = pid  # Ensure 'pid' is in the dict
+    def update_supplier(self, supplier_id, supplier_data):
+        """Update existing supplier; returns the updated grid row (None if the supplier no longer exists)"""
+        # Update the person row only if it belongs to a supplier
+        person_query = """
+            UPDATE person p
+            SET firstname=%(firstname)s, lastname=%(lastname)s, dateofb=%(dateofb)s,
+                address=%(address)s, phone=%(phone)s, email=%(email)s
+            FROM supplier s
+            WHERE s.pid = p.pid AND p.pid=%(pid)s
+            RETURNING p.pid, p.firstname, p.lastname, p.dateofb, p.address, p.phone, p.email
+        """
+        supplier_data['pid'] = supplier_id  # Ensure 'pid' is in the dict
+
+        row = db_manager.execute_query(person_query, supplier_data, fetch='one', prepared=True, row_type=Supplier)
+        if not row:
+            db_manager.rollback()
+            return None
 
-            db_manager.execute_query(person_query, supplier_data)
+        db_manager.commit()
+        lookup_changed('person', 'supplier')
+        return row
 
-            db_manager.commit()
-            return True
+    def delete_supplier(self, supplier_id):
+        """Delete supplier from database; returns False if the supplier no longer exists"""
+        # First delete related equipment_supplier records
+        db_manager.execute_query(PERSON_SUPPLIES_DELETE_QUERY, (supplier_id,), prepared=True)
 
-        except Exception as e:
+        # Delete from supplier table
+        delete_supplier_query = "DELETE FROM supplier WHERE pid = %s RETURNING pid"
+        if not db_manager.execute_query(delete_supplier_query, (supplier_id,), fetch='one', prepared=True):
             db_manager.rollback()
-            messagebox.showerror("Error", f"Failed to update supplier: {str(e)}")
             return False
 
-    def delete_supplier(self, supplier_id):
-        """Delete supplier from database"""
-        try:
-            # Get the PID for this supplier
-            pid_query = "SELECT pid FROM supplier WHERE pid = %s"
-            pid_result = db_manager.execute_query(pid_query, (supplier_id,), fetch='one')
-
-            if not pid_result:
-                messagebox.showerror("Error", "Supplier not found")
-                return False
-
-            pid = pid_result[0]
-
-            # First delete related equipment_supplier records
-            delete_relations_query = "DELETE FROM equipment_supplier WHERE pid = %s"
-            db_manager.execute_query(delete_relations_query, (pid,))
-
-            # Delete from supplier table
-            delete_supplier_query = "DELETE FROM supplier WHERE pid = %s"
-            db_manager.execute_query(delete_supplier_query, (supplier_id,))
-
-            # Optionally delete from person table (be careful with this)
-            # delete_person_query = "DELETE FROM person WHERE pid = %s"
-            # db_manager.execute_query(delete_person_query, (pid,))
-
-            db_manager.commit()
-            return True
-
-        except Exception as e:
+        # Optionally delete from person table (be careful with this)
+        # delete_person_query = "DELETE FROM person WHERE pid = %s"
+        # db_manager.execute_query(delete_person_query, (supplier_id,))
+
+        db_manager.commit()
+        lookup_changed('person', 'supplier')
+        return True
+
+    def add_many(self, supplier_list):
+        """Add many suppliers in one transaction, merging like add_supplier; returns the grid rows.
+
+        Rows without a pid take the next sequence value. If any pid belongs to
+        a person with another name, nothing is saved and BatchError lists them.
+        """
+        query = """
+            WITH v AS (
+                SELECT COALESCE(pid, nextval('person_pid_seq')) AS pid, firstname, lastname, dateofb,
+                       address, phone, email
+                FROM (VALUES %s) AS t (pid, firstname, lastname, dateofb, address, phone, email)
+            ), p AS (
+                INSERT INTO person (pid, firstname, lastname, dateofb, address, phone, email)
+                SELECT pid, firstname, lastname, dateofb, address, phone, email FROM v
+                ON CONFLICT (pid) DO UPDATE
+                SET dateofb = EXCLUDED.dateofb,
+                    address = EXCLUDED.address,
+                    phone = EXCLUDED.phone,
+                    email = EXCLUDED.email
+                WHERE (person.firstname, person.lastname) = (EXCLUDED.firstname, EXCLUDED.lastname)
+                RETURNING pid, firstname, lastname, dateofb, address, phone, email
+            ), s AS (
+                INSERT INTO supplier (pid)
+                SELECT pid FROM p
+                ON CONFLICT (pid) DO NOTHING
+            )
+            SELECT p.pid, p.firstname, p.lastname, p.dateofb,
+                   p.address, p.phone, p.email
+            FROM p
+        """
+        template = ("(%(pid)s::integer, %(firstname)s, %(lastname)s, %(dateofb)s::date, %(address)s, "
+                    "%(phone)s::numeric, %(email)s)")
+
+        def label(i):
+            pid = supplier_list[i]['pid']
+            return f"Supplier {pid}" if pid is not None else f"Row {i + 1}"
+
+        rows = db_manager.execute_batch(query, supplier_list, template, fetch=True, row_type=Supplier,
+                                        row_label=label)
+        if len(rows) < len(supplier_list):
+            saved = {row.pid for row in rows}
             db_manager.rollback()
-            messagebox.showerror("Error", f"Failed to delete supplier: {str(e)}")
-            return False
+            raise BatchError("Some person IDs already belong to a person with another name; nothing was saved",
+                             [(i, "belongs to a person with another name") for i, data in enumerate(supplier_list)
+                              if data['pid'] is not None and data['pid'] not in saved], label)
+
+        db_manager.commit()
+        lookup_changed('person', 'supplier')
+        return rows
+
+    def update_many(self, supplier_list):
+        """Update many suppliers (each dict carries its pid); returns the updated grid rows.
+
+        Pids that are not suppliers are skipped.
+        """
+        query = """
+            UPDATE person p
+            SET firstname = v.firstname, lastname = v.lastname, dateofb = v.dateofb,
+                address = v.address, phone = v.phone, email = v.email
+            FROM (VALUES %s) AS v (pid, firstname, lastname, dateofb, address, phone, email)
+            JOIN supplier s ON s.pid = v.pid
+            WHERE p.pid = v.pid
+            RETURNING p.pid, p.firstname, p.lastname, p.dateofb, p.address, p.phone, p.email
+        """
+        template = ("(%(pid)s::integer, %(firstname)s, %(lastname)s, %(dateofb)s::date, %(address)s, "
+                    "%(phone)s::numeric, %(email)s)")
+        rows = db_manager.execute_batch(query, supplier_list, template, fetch=True, row_type=Supplier,
+                                        row_label=lambda i: f"Supplier {supplier_list[i]['pid']}")
+        db_manager.commit()
+        lookup_changed('person', 'supplier')
+        return rows
+
+    def delete_many(self, pids):
+        """Delete many suppliers and their equipment relationships; returns the deleted pids"""
+        query = """
+            WITH v (pid) AS (VALUES %s),
+            relations AS (
+                DELETE FROM equipment_supplier es USING v WHERE es.pid = v.pid
+            )
+            DELETE FROM supplier s USING v
+            WHERE s.pid = v.pid
+            RETURNING s.pid
+        """
+        rows = db_manager.execute_batch(query, [(pid,) for pid in pids], fetch=True,
+                                        row_label=lambda i: f"Supplier {pids[i]}")
+        db_manager.commit()
+        lookup_changed('person', 'supplier')
+        return [row[0] for row in rows]
 
     def get_supplier_details(self, supplier_id):
         """Get detailed supplier information"""
-        try:
-            query = """
-                SELECT s.pid, s.pid, p.firstname, p.lastname, p.dateofb, 
-                       p.address, p.phone, p.email
-                FROM supplier s
-                JOIN person p ON s.pid = p.pid
-                WHERE s.pid = %s
-            """
-            return db_manager.execute_query(query, (supplier_id,), fetch='one')
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to get supplier details: {str(e)}")
-            return None
-
-    def get_next_pid(self):
-        """Get next available PID"""
-        try:
-            query = "SELECT COALESCE(MAX(pid), 0) + 1 FROM person"
-            result = db_manager.execute_query(query, fetch='one')
-            return result[0] if result else 1
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to get next PID: {str(e)}")
-            return 1
+        query = """
+            SELECT s.pid, p.firstname, p.lastname, p.dateofb,
+                   p.address, p.phone, p.email
+            FROM supplier s
+            JOIN person p ON s.pid = p.pid
+            WHERE s.pid = %s
+        """
+        return db_manager.execute_query(query, (supplier_id,), fetch='one', prepared=True, row_type=Supplier)
 
 
 class SupplierDialog:
     def __init__(self, parent, title, supplier_data=None):
         self.result = None
-        self.supplier_ops = SupplierOperations()
+        self.reserved_pid = None
+        self.is_new = not supplier_data
 
         self.dialog = tk.Toplevel(parent)
         self.dialog.title(title)
@@ -181,9 +298,9 @@ class SupplierDialog:
 
             if field_name == "pid":
                 entry = tk.Entry(main_frame, font=("Arial", 10), width=30)
-                if not supplier_data:  # New supplier - auto-generate PID
-                    next_pid = self.supplier_ops.get_next_pid()
-                    entry.insert(0, str(next_pid))
+                if not supplier_data:  # New supplier - use a reserved PID (no query while the dialog opens)
+                    self.reserved_pid = pid_allocator.take()
+                    entry.insert(0, str(self.reserved_pid) if self.reserved_pid else "(assigned on save)")
                     entry.config(state="readonly")
             else:
                 entry = tk.Entry(main_frame, font=("Arial", 10), width=30)
@@ -193,15 +310,7 @@ class SupplierDialog:
 
         # Fill data if editing
         if supplier_data:
-            field_mapping = {
-                'pid': supplier_data[1] if len(supplier_data) > 1 else '',
-                'firstname': supplier_data[2] if len(supplier_data) > 2 else '',
-                'lastname': supplier_data[3] if len(supplier_data) > 3 else '',
-                'dateofb': str(supplier_data[4]) if len(supplier_data) > 4 and supplier_data[4] else '',
-                'address': supplier_data[5] if len(supplier_data) > 5 else '',
-                'phone': str(supplier_data[6]) if len(supplier_data) > 6 and supplier_data[6] else '',
-                'email': supplier_data[7] if len(supplier_data) > 7 else ''
-            }
+            field_mapping = supplier_data._asdict()
 
             for field_name, value in field_mapping.items():
                 if field_name in self.entries and value:
@@ -216,6 +325,7 @@ class SupplierDialog:
                   bg="#27ae60", fg="white", width=10).pack(side="left", padx=5)
         tk.Button(button_frame, text="Cancel", command=self.cancel,
                   bg="#e74c3c", fg="white", width=10).pack(side="right", padx=5)
+        self.dialog.protocol("WM_DELETE_WINDOW", self.cancel)
 
     def save(self):
         try:
@@ -223,6 +333,10 @@ class SupplierDialog:
             required_fields = ['pid', 'firstname', 'lastname']
 
             for field_name, entry in self.entries.items():
+                if field_name == 'pid' and self.is_new:
+                    self.result['pid'] = self.reserved_pid
+                    continue
+
                 value = entry.get().strip()
                 if not value and field_name in required_fields:
                     messagebox.showerror("Error", f"Field '{field_name}' is required")
@@ -251,4 +365,6 @@ class SupplierDialog:
             messagebox.showerror("Error", f"Error saving data: {str(e)}")
 
     def cancel(self):
+        # Keep the reserved PID for the next dialog
+        pid_allocator.give_back(self.reserved_pid)
         self.dialog.destroy()
\ No newline at end of file
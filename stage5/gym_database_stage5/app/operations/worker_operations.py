@@ -1,6 +1,44 @@
-from app.database import db_manager
+from app.models import Worker, WorkerDetails
+from app.database import db_manager, contains_pattern, BatchError, SEARCH_LIMIT
+from app.lookups import lookup_changed
+from app.operations.equipment_supplier_operations import PERSON_SUPPLIES_DELETE_QUERY
+from app.pid_allocator import pid_allocator
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import messagebox
+
+# Keyset pages of the workers grid. The first page and the pages after it are
+# separate statements: a single prepared "%(after)s IS NULL OR pid > %(after)s"
+# can fall back to a generic plan that scans from the start of the index.
+WORKERS_FIRST_PAGE_QUERY = """
+    SELECT w.pid, p.firstname, p.lastname, w.job, w.contract, w.dateofeployment
+    FROM worker w
+    JOIN person p ON w.pid = p.pid
+    ORDER BY w.pid
+    LIMIT %(limit)s
+"""
+WORKERS_NEXT_PAGE_QUERY = """
+    SELECT w.pid, p.firstname, p.lastname, w.job, w.contract, w.dateofeployment
+    FROM worker w
+    JOIN person p ON w.pid = p.pid
+    WHERE w.pid > %(after_pid)s
+    ORDER BY w.pid
+    LIMIT %(limit)s
+"""
+
+# Search box of the workers grid
+WORKERS_SEARCH_QUERY = """
+    SELECT w.pid, p.firstname, p.lastname, w.job, w.contract, w.dateofeployment
+    FROM worker w
+    JOIN person p ON w.pid = p.pid
+    WHERE p.pid::text ILIKE %(pattern)s
+       OR p.firstname ILIKE %(pattern)s
+       OR p.lastname ILIKE %(pattern)s
+       OR w.job ILIKE %(pattern)s
+       OR w.contract ILIKE %(pattern)s
+       OR date_text(w.dateofeployment) ILIKE %(pattern)s
+    ORDER BY w.pid
+    LIMIT %(limit)s
+"""
 
 
 class WorkerOperations:
@@ -10,52 +48,83 @@ class WorkerOperations:
 
     def get_all_workers(self):
         """Retrieve all workers from existing worker table"""
-        try:
-            query = """
-                SELECT w.pid, p.firstname, p.lastname, w.job, w.contract, w.dateofeployment
-                FROM worker w
-                JOIN person p ON w.pid = p.pid
-                ORDER BY w.pid
-            """
-            return db_manager.execute_query(query, fetch='all')
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to retrieve workers: {str(e)}")
-            return []
+        query = """
+            SELECT w.pid, p.firstname, p.lastname, w.job, w.contract, w.dateofeployment
+            FROM worker w
+            JOIN person p ON w.pid = p.pid
+            ORDER BY w.pid
+        """
+        return db_manager.execute_query(query, fetch='all', row_type=Worker)
+
+    def get_workers_page(self, after_row=None, limit=100):
+        """Retrieve one page of workers, keyed on pid (pass the last row of the previous page)"""
+        query, params = WORKERS_FIRST_PAGE_QUERY, {'limit': limit}
+        if after_row is not None:
+            query, params = WORKERS_NEXT_PAGE_QUERY, {'after_pid': after_row.pid, 'limit': limit}
+        return db_manager.execute_query(query, params, fetch='all', prepared=True, row_type=Worker)
+
+    def estimate_worker_count(self):
+        """Fast (approximate) number of workers"""
+        return db_manager.estimate_row_count('worker')
+
+    def search_workers(self, text, limit=SEARCH_LIMIT):
+        """Workers whose id, name, job, contract or deployment date contains `text`"""
+        query = WORKERS_SEARCH_QUERY
+        params = {'pattern': contains_pattern(text), 'limit': limit}
+        return db_manager.execute_query(query, params, fetch='all', prepared=True, row_type=Worker)
 
     def add_worker(self, worker_data):
-        """Add new worker to database"""
-        try:
-            # Check if person exists
-            person_check_query = "SELECT pid FROM person WHERE pid = %(pid)s"
-            existing_person = db_manager.execute_query(person_check_query, {'pid': worker_data['pid']}, fetch='one')
-
-            if not existing_person:
-                person_query = """
-                    INSERT INTO person (pid, firstname, lastname, dateofb, address, phone, email)
-                    VALUES (%(pid)s, %(firstname)s, %(lastname)s, %(dateofb)s, %(address)s, %(phone)s, %(email)s)
-                """
-                db_manager.execute_query(person_query, worker_data)
-
-            # Insert into worker
-            worker_query = """
+        """Add a worker, merging with an existing person/worker of the same pid; returns the grid row.
+
+        Adding an existing person gives them the worker role; adding an existing
+        worker updates it. If the pid belongs to a person with a different name
+        (e.g. a stale reserved PID) nothing is written and ValueError says so.
+        """
+        # One statement: upsert the person (a new person without a reserved PID takes
+        # the next sequence value), then the worker
+        query = """
+            WITH p AS (
+                INSERT INTO person (pid, firstname, lastname, dateofb, address, phone, email)
+                VALUES (COALESCE(%(pid)s, nextval('person_pid_seq')),
+                        %(firstname)s, %(lastname)s, %(dateofb)s, %(address)s, %(phone)s, %(email)s)
+                ON CONFLICT (pid) DO UPDATE
+                SET dateofb = EXCLUDED.dateofb,
+                    address = EXCLUDED.address,
+                    phone = EXCLUDED.phone,
+                    email = EXCLUDED.email
+                -- Same pid, different name: someone else's row, leave it alone
+                WHERE (person.firstname, person.lastname) = (EXCLUDED.firstname, EXCLUDED.lastname)
+                RETURNING pid, firstname, lastname
+            ), w AS (
                 INSERT INTO worker (pid, job, contract, dateofeployment)
-                VALUES (%(pid)s, %(job)s, %(contract)s, %(dateofeployment)s)
-            """
-            db_manager.execute_query(worker_query, worker_data)
-
-            db_manager.commit()
-            return True
-        except Exception as e:
+                SELECT pid, %(job)s, %(contract)s, %(dateofeployment)s::date FROM p
+                ON CONFLICT (pid) DO UPDATE
+                SET job = EXCLUDED.job,
+                    contract = EXCLUDED.contract,
+                    dateofeployment = EXCLUDED.dateofeployment
+                RETURNING pid, job, contract, dateofeployment
+            )
+            SELECT w.pid, p.firstname, p.lastname, w.job, w.contract, w.dateofeployment
+            FROM w
+            JOIN p ON w.pid = p.pid
+        """
+        row = db_manager.execute_query(query, worker_data, fetch='one', prepared=True, row_type=Worker)
+        if not row:
             db_manager.rollback()
-            messagebox.showerror("Error", f"Failed to add worker: {str(e)}")
-            return False
+            pid = worker_data['pid'] or "from person_pid_seq"
+            raise ValueError(f"Person ID {pid} already belongs to a person with another name; nothing was saved")
+
+        db_manager.commit()
+        lookup_changed('person', 'worker')
+        return row
 
     def update_worker(self, worker_pid, worker_data):
-        """Update existing worker"""
-        try:
-            worker_data['pid'] = worker_pid
+        """Update existing worker; returns the updated grid row (None if the worker no longer exists)"""
+        worker_data['pid'] = worker_pid
 
-            person_query = """
+        # Both updates in one statement, returning the row as the workers grid shows it
+        query = """
+            WITH p AS (
                 UPDATE person 
                 SET firstname = %(firstname)s,
                     lastname = %(lastname)s,
@@ -64,68 +133,163 @@ class WorkerOperations:
                     phone = %(phone)s,
                     email = %(email)s
                 WHERE pid = %(pid)s
-            """
-            db_manager.execute_query(person_query, worker_data)
-
-            worker_query = """
+                RETURNING pid, firstname, lastname
+            ), w AS (
                 UPDATE worker 
                 SET job = %(job)s,
                     contract = %(contract)s,
                     dateofeployment = %(dateofeployment)s
                 WHERE pid = %(pid)s
-            """
-            db_manager.execute_query(worker_query, worker_data)
-
-            db_manager.commit()
-            return True
-        except Exception as e:
+                RETURNING pid, job, contract, dateofeployment
+            )
+            SELECT w.pid, p.firstname, p.lastname, w.job, w.contract, w.dateofeployment
+            FROM w
+            JOIN p ON w.pid = p.pid
+        """
+        row = db_manager.execute_query(query, worker_data, fetch='one', prepared=True, row_type=Worker)
+        if not row:
+            # No worker row was updated: don't keep the person update either
             db_manager.rollback()
-            messagebox.showerror("Error", f"Failed to update worker: {str(e)}")
-            return False
+            return None
+
+        db_manager.commit()
+        lookup_changed('person', 'worker')
+        return row
 
     def delete_worker(self, worker_pid):
         """Delete worker from database"""
-        try:
-            # Delete from related equipment_supplier (if any)
-            db_manager.execute_query("DELETE FROM equipment_supplier WHERE pid = %s", (worker_pid,))
-            db_manager.execute_query("DELETE FROM worker WHERE pid = %s", (worker_pid,))
-            # Optionally: delete from person too
-            # db_manager.execute_query("DELETE FROM person WHERE pid = %s", (worker_pid,))
-            db_manager.commit()
-            return True
-        except Exception as e:
+        # Delete from related equipment_supplier (if any)
+        db_manager.execute_query(PERSON_SUPPLIES_DELETE_QUERY, (worker_pid,), prepared=True)
+        db_manager.execute_query("DELETE FROM worker WHERE pid = %s", (worker_pid,), prepared=True)
+        # Optionally: delete from person too
+        # db_manager.execute_query("DELETE FROM person WHERE pid = %s", (worker_pid,))
+        db_manager.commit()
+        lookup_changed('person', 'worker')
+        return True
+
+    def add_many(self, worker_list):
+        """Add many workers in one transaction, merging like add_worker; returns the grid rows.
+
+        Rows without a pid take the next sequence value. If any pid belongs to
+        a person with another name, nothing is saved and BatchError lists them.
+        """
+        query = """
+            WITH v AS (
+                SELECT COALESCE(pid, nextval('person_pid_seq')) AS pid, firstname, lastname, dateofb,
+                       address, phone, email, job, contract, dateofeployment
+                FROM (VALUES %s) AS t (pid, firstname, lastname, dateofb, address, phone, email,
+                                       job, contract, dateofeployment)
+            ), p AS (
+                INSERT INTO person (pid, firstname, lastname, dateofb, address, phone, email)
+                SELECT pid, firstname, lastname, dateofb, address, phone, email FROM v
+                ON CONFLICT (pid) DO UPDATE
+                SET dateofb = EXCLUDED.dateofb,
+                    address = EXCLUDED.address,
+                    phone = EXCLUDED.phone,
+                    email = EXCLUDED.email
+                WHERE (person.firstname, person.lastname) = (EXCLUDED.firstname, EXCLUDED.lastname)
+                RETURNING pid, firstname, lastname
+            ), w AS (
+                INSERT INTO worker (pid, job, contract, dateofeployment)
+                SELECT v.pid, v.job, v.contract, v.dateofeployment FROM v JOIN p ON v.pid = p.pid
+                ON CONFLICT (pid) DO UPDATE
+                SET job = EXCLUDED.job,
+                    contract = EXCLUDED.contract,
+                    dateofeployment = EXCLUDED.dateofeployment
+                RETURNING pid, job, contract, dateofeployment
+            )
+            SELECT w.pid, p.firstname, p.lastname, w.job, w.contract, w.dateofeployment
+            FROM w
+            JOIN p ON w.pid = p.pid
+        """
+        template = ("(%(pid)s::integer, %(firstname)s, %(lastname)s, %(dateofb)s::date, %(address)s, "
+                    "%(phone)s::numeric, %(email)s, %(job)s, %(contract)s, %(dateofeployment)s::date)")
+
+        def label(i):
+            pid = worker_list[i]['pid']
+            return f"Worker {pid}" if pid is not None else f"Row {i + 1}"
+
+        rows = db_manager.execute_batch(query, worker_list, template, fetch=True, row_type=Worker,
+                                        row_label=label)
+        if len(rows) < len(worker_list):
+            saved = {row.pid for row in rows}
             db_manager.rollback()
-            messagebox.showerror("Error", f"Failed to delete worker: {str(e)}")
-            return False
+            raise BatchError("Some person IDs already belong to a person with another name; nothing was saved",
+                             [(i, "belongs to a person with another name") for i, data in enumerate(worker_list)
+                              if data['pid'] is not None and data['pid'] not in saved], label)
+
+        db_manager.commit()
+        lookup_changed('person', 'worker')
+        return rows
+
+    def update_many(self, worker_list):
+        """Update many workers (each dict carries its pid); returns the updated grid rows.
+
+        Pids that are not workers are skipped, person rows included.
+        """
+        query = """
+            WITH v (pid, firstname, lastname, dateofb, address, phone, email, job, contract, dateofeployment)
+                AS (VALUES %s),
+            w AS (
+                UPDATE worker w
+                SET job = v.job, contract = v.contract, dateofeployment = v.dateofeployment
+                FROM v
+                WHERE w.pid = v.pid
+                RETURNING w.pid, w.job, w.contract, w.dateofeployment
+            ), p AS (
+                UPDATE person p
+                SET firstname = v.firstname, lastname = v.lastname, dateofb = v.dateofb,
+                    address = v.address, phone = v.phone, email = v.email
+                FROM v
+                JOIN w ON w.pid = v.pid
+                WHERE p.pid = v.pid
+                RETURNING p.pid, p.firstname, p.lastname
+            )
+            SELECT w.pid, p.firstname, p.lastname, w.job, w.contract, w.dateofeployment
+            FROM w
+            JOIN p ON w.pid = p.pid
+        """
+        template = ("(%(pid)s::integer, %(firstname)s, %(lastname)s, %(dateofb)s::date, %(address)s, "
+                    "%(phone)s::numeric, %(email)s, %(job)s, %(contract)s, %(dateofeployment)s::date)")
+        rows = db_manager.execute_batch(query, worker_list, template, fetch=True, row_type=Worker,
+                                        row_label=lambda i: f"Worker {worker_list[i]['pid']}")
+        db_manager.commit()
+        lookup_changed('person', 'worker')
+        return rows
+
+    def delete_many(self, pids):
+        """Delete many workers and their equipment relationships; returns the deleted pids"""
+        query = """
+            WITH v (pid) AS (VALUES %s),
+            relations AS (
+                DELETE FROM equipment_supplier es USING v WHERE es.pid = v.pid
+            )
+            DELETE FROM worker w USING v
+            WHERE w.pid = v.pid
+            RETURNING w.pid
+        """
+        rows = db_manager.execute_batch(query, [(pid,) for pid in pids], fetch=True,
+                                        row_label=lambda i: f"Worker {pids[i]}")
+        db_manager.commit()
+        lookup_changed('person', 'worker')
+        return [row[0] for row in rows]
 
     def get_worker_details(self, worker_pid):
         """Get detailed worker information"""
-        try:
-            query = """
-                SELECT w.pid, p.firstname, p.lastname, p.dateofb, p.address, p.phone, p.email,
-                       w.job, w.contract, w.dateofeployment
-                FROM worker w
-                JOIN person p ON w.pid = p.pid
-                WHERE w.pid = %s
-            """
-            return db_manager.execute_query(query, (worker_pid,), fetch='one')
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to get worker details: {str(e)}")
-            return None
-
-    def get_next_pid(self):
-        """Get next available PID"""
-        try:
-            result = db_manager.execute_query("SELECT COALESCE(MAX(pid), 0) + 1 FROM person", fetch='one')
-            return result[0] if result else 1
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to get next PID: {str(e)}")
-            return 1
+        query = """
+            SELECT w.pid, p.firstname, p.lastname, p.dateofb, p.address, p.phone, p.email,
+                   w.job, w.contract, w.dateofeployment
+            FROM worker w
+            JOIN person p ON w.pid = p.pid
+            WHERE w.pid = %s
+        """
+        return db_manager.execute_query(query, (worker_pid,), fetch='one', prepared=True, row_type=WorkerDetails)
 
 class WorkerDialog:
     def __init__(self, parent, title, worker_data=None):
         self.result = None
-        self.worker_ops = WorkerOperations()
+        self.reserved_pid = None
+        self.is_new = not worker_data
 
         self.dialog = tk.Toplevel(parent)
         self.dialog.title(title)
@@ -159,10 +323,10 @@ class WorkerDialog:
             tk.Label(main_frame, text=label, font=("Arial", 10)).grid(row=i, column=0, sticky="e", pady=5)
             entry = tk.Entry(main_frame, font=("Arial", 10), width=30)
 
-            # If creating new worker, auto-fill PID
+            # If creating new worker, auto-fill a reserved PID (no query while the dialog opens)
             if field_name == "pid" and not worker_data:
-                pid = self.worker_ops.get_next_pid()
-                entry.insert(0, str(pid))
+                self.reserved_pid = pid_allocator.take()
+                entry.insert(0, str(self.reserved_pid) if self.reserved_pid else "(assigned on save)")
                 entry.config(state="readonly")
 
             entry.grid(row=i, column=1, pady=5)
@@ -170,23 +334,26 @@ class WorkerDialog:
 
         # Fill data if editing
         if worker_data:
-            keys = list(self.entries.keys())
-            for i, value in enumerate(worker_data):
-                if i < len(keys):
-                    self.entries[keys[i]].insert(0, str(value))
+            for field_name, value in worker_data._asdict().items():
+                self.entries[field_name].insert(0, str(value))
 
         # Buttons
         btn_frame = tk.Frame(main_frame)
         btn_frame.grid(row=len(fields), column=0, columnspan=2, pady=15)
 
         tk.Button(btn_frame, text="Save", command=self.save, bg="#2ecc71", fg="white", width=10).pack(side="left", padx=5)
-        tk.Button(btn_frame, text="Cancel", command=self.dialog.destroy, bg="#e74c3c", fg="white", width=10).pack(side="right", padx=5)
+        tk.Button(btn_frame, text="Cancel", command=self.cancel, bg="#e74c3c", fg="white", width=10).pack(side="right", padx=5)
+        self.dialog.protocol("WM_DELETE_WINDOW", self.cancel)
 
     def save(self):
         self.result = {}
         required = ["pid", "firstname", "lastname", "job"]
 
         for field_name, entry in self.entries.items():
+            if field_name == "pid" and self.is_new:
+                self.result["pid"] = self.reserved_pid
+                continue
+
             val = entry.get().strip()
             if not val and field_name in required:
                 messagebox.showerror("Error", f"Field '{field_name}' is required")
@@ -209,3 +376,8 @@ class WorkerDialog:
             self.result[field_name] = val if val else None
 
         self.dialog.destroy()
+
+    def cancel(self):
+        # Keep the reserved PID for the next dialog
+        pid_allocator.give_back(self.reserved_pid)
+        self.dialog.destroy()
@@ -0,0 +1,67 @@
+# pid_allocator.py - Client-side block reservation of person IDs
+import threading
+
+from app.database import db_manager
+
+
+class PidAllocator:
+    """Hands out person IDs reserved in blocks from person_pid_seq.
+
+    take() never queries the database: it pops an already reserved PID (or
+    returns None, in which case the insert falls back to the column default).
+    When the reserve runs low a refill of `block_size` values is submitted to
+    the background executor. Sequence values are never handed out twice, so
+    concurrent clients cannot collide; unused values only leave gaps.
+    """
+
+    def __init__(self, block_size=20, low_water=5):
+        self.block_size = block_size
+        self.low_water = low_water
+        # Set by the application to its BackgroundExecutor.submit
+        self.submit = None
+
+        self._pids = []
+        self._refilling = False
+        self._lock = threading.Lock()
+
+    def take(self):
+        """Next reserved PID, or None if the reserve is empty (call on the Tk thread)"""
+        with self._lock:
+            pid = self._pids.pop(0) if self._pids else None
+            low = len(self._pids) <= self.low_water
+        if low:
+            self.refill_in_background()
+        return pid
+
+    def give_back(self, pid):
+        """Return a PID that was taken but not used (e.g. the dialog was cancelled)"""
+        if pid is None:
+            return
+        with self._lock:
+            self._pids.insert(0, pid)
+
+    def refill_in_background(self):
+        with self._lock:
+            if self._refilling or self.submit is None:
+                return
+            self._refilling = True
+        # Not tied to any screen: a failure is reported whichever screen is open by then
+        self.submit(self.refill, on_error=lambda e: print(f"PID reservation failed: {e}"),
+                    cancellable=False, scoped=False)
+
+    def refill(self):
+        """Reserve another block of PIDs (one round trip; runs on a worker thread)"""
+        try:
+            rows = db_manager.execute_query(
+                "SELECT nextval('person_pid_seq') FROM generate_series(1, %s)",
+                (self.block_size,), fetch='all')
+            db_manager.commit()
+            with self._lock:
+                self._pids.extend(row[0] for row in rows)
+        finally:
+            with self._lock:
+                self._refilling = False
+
+
+# Global PID allocator instance
+pid_allocator = PidAllocator()
@@ -0,0 +1,23 @@
+# screens/batch_results.py - Apply a bulk add/delete result to a table screen
+from tkinter import messagebox
+
+
+def apply_batch_result(app, grid, search, result, message, status, deleted=False):
+    """_after_change for a batch: `result` is the list of added rows, or of deleted keys.
+
+    None means the batch failed (on_error already reported it). Rows are
+    patched into the grid and the search indexes instead of reloading them.
+    """
+    if result is None:
+        return
+    messagebox.showinfo("Success", message)
+    app.dashboard_screen.stats_cache.invalidate()
+    if grid and grid.exists():
+        for item in result:
+            if deleted:
+                search.row_removed(item)
+                grid.remove_row(item)
+            else:
+                search.row_changed(item)
+                grid.upsert_row(item)
+    app.update_status(status)
@@ -0,0 +1,65 @@
+# screens/bulk_paste.py - Rows pasted from a spreadsheet, for the bulk-add buttons
+import csv
+import io
+from tkinter import messagebox
+
+
+def parse_rows(text, fields, required=(), converters=None):
+    """Parse tab- or comma-separated lines into dicts keyed by `fields`.
+
+    A first line that repeats the field names is skipped. Blank cells become
+    None; `converters` maps a field to a function applied to its value.
+    Returns (rows, problems), problems being "Line n: ..." messages.
+    """
+    converters = converters or {}
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        return [], []
+    dialect = 'excel-tab' if '\t' in lines[0] else 'excel'
+
+    rows, problems = [], []
+    for line_no, cells in enumerate(csv.reader(io.StringIO("\n".join(lines)), dialect), start=1):
+        cells = [c.strip() for c in cells]
+        if line_no == 1 and [c.lower() for c in cells] == list(fields):
+            continue
+        if len(cells) != len(fields):
+            problems.append(f"Line {line_no}: expected {len(fields)} values, found {len(cells)}")
+            continue
+
+        row = {}
+        for field, value in zip(fields, cells):
+            if not value:
+                if field in required:
+                    problems.append(f"Line {line_no}: {field} is required")
+                    break
+                row[field] = None
+                continue
+            try:
+                row[field] = converters[field](value) if field in converters else value
+            except ValueError:
+                problems.append(f"Line {line_no}: {field} {value!r} is not valid")
+                break
+        else:
+            rows.append(row)
+    return rows, problems
+
+
+def read_clipboard_rows(root, fields, required=(), converters=None):
+    """Rows from the clipboard, or None (after telling the user why) when there is nothing to add"""
+    try:
+        text = root.clipboard_get()
+    except Exception:
+        text = ""
+
+    rows, problems = parse_rows(text, fields, required, converters)
+    if problems:
+        shown = "\n".join(problems[:10])
+        if len(problems) > 10:
+            shown += f"\n... and {len(problems) - 10} more"
+        messagebox.showerror("Paste Error", f"Fix these lines and copy again:\n\n{shown}")
+        return None
+    if not rows:
+        messagebox.showwarning("Paste", "Copy rows with these columns first (tab- or comma-separated):\n\n"
+                               + ", ".join(fields))
+        return None
+    return rows
@@ -1,14 +1,22 @@
 import tkinter as tk
 from datetime import datetime
+from app.cache import TTLCache
 from app.database import db_manager
 
+# Above this many (estimated) rows a card shows the planner estimate instead of COUNT(*)
+APPROX_COUNT_THRESHOLD = 100000
+
 
 class DashboardScreen:
+    # Shared across visits; counts may lag writes by up to the TTL
+    stats_cache = TTLCache(ttl=30)
+
     def __init__(self, app):
         self.app = app
         self.root = app.root
         self.content_frame = app.content_frame
         self.update_status = app.update_status
+        self.count_labels = {}
 
     def show_welcome_screen(self):
         self.app.clear_content()
@@ -33,20 +41,35 @@ class DashboardScreen:
         cards_container = tk.Frame(self.content_frame, bg="#f0f0f0")
         cards_container.pack(fill="both", expand=True, padx=30, pady=10)
 
-        stats = self.get_dashboard_stats()
         cards = [
-            ("Total Workers", stats['workers'], "#3498db", "👥"),
-            ("Total Suppliers", stats['suppliers'], "#1dbf22", "🏭"),
-            ("Total Equipment", stats['equipment'], "#e74c3c", "⚙️"),
-            ("Supplied Relations", stats['relationships'], "#f39c12", "🔗")
+            ("Total Workers", 'workers', "#3498db", "👥"),
+            ("Total Suppliers", 'suppliers', "#1dbf22", "🏭"),
+            ("Total Equipment", 'equipment', "#e74c3c", "⚙️"),
+            ("Supplied Relations", 'relationships', "#f39c12", "🔗")
         ]
 
-        for i, (title, count, color, icon) in enumerate(cards):
-            self.create_card(cards_container, title, count, color, icon, row=i // 2, col=i % 2)
+        # Counts are filled in once the background query returns
+        self.count_labels = {}
+        for i, (title, key, color, icon) in enumerate(cards):
+            self.count_labels[key] = self.create_card(cards_container, title, "…", color, icon,
+                                                      row=i // 2, col=i % 2)
 
         # Quick Actions
         self.create_quick_actions()
 
+        cached = self.stats_cache.get('dashboard')
+        if cached is not None:
+            self.show_stats(cached)
+        else:
+            self.app.run_in_background(self.get_dashboard_stats, on_success=self.show_stats)
+
+    def show_stats(self, stats):
+        """Fill the dashboard cards with freshly loaded counts"""
+        for key, label in self.count_labels.items():
+            if key in stats['approximate']:
+                label.config(text=f"≈{stats[key]:,}")
+            else:
+                label.config(text=str(stats[key]))
         self.update_status("Dashboard loaded")
 
     def create_card(self, parent, title, count, color, icon, row, col):
@@ -61,8 +84,10 @@ class DashboardScreen:
         inner.pack(fill="both", expand=True)
 
         tk.Label(inner, text=icon, font=("Arial", 30), fg=color, bg="#ffffff").pack(anchor="w")
-        tk.Label(inner, text=str(count), font=("Arial", 26, "bold"), fg="#2b2b2b", bg="#ffffff").pack(anchor="w", pady=(5, 0))
+        count_label = tk.Label(inner, text=str(count), font=("Arial", 26, "bold"), fg="#2b2b2b", bg="#ffffff")
+        count_label.pack(anchor="w", pady=(5, 0))
         tk.Label(inner, text=title, font=("Arial", 13), fg="#454545", bg="#ffffff").pack(anchor="w")
+        return count_label
 
     def create_quick_actions(self):
         frame = tk.Frame(self.content_frame, bg="#ecf0f1")
@@ -92,12 +117,47 @@ class DashboardScreen:
             btn_frame.grid_columnconfigure(i, weight=1)
 
     def get_dashboard_stats(self):
-        stats = {'workers': 0, 'suppliers': 0, 'equipment': 0, 'relationships': 0}
+        """Card counts, served from a short-lived cache so revisiting the dashboard is instant"""
         try:
-            stats['workers'] = db_manager.execute_query("SELECT COUNT(*) FROM worker", fetch='one')[0]
-            stats['suppliers'] = db_manager.execute_query("SELECT COUNT(*) FROM supplier", fetch='one')[0]
-            stats['equipment'] = db_manager.execute_query("SELECT COUNT(*) FROM equipment", fetch='one')[0]
-            stats['relationships'] = db_manager.execute_query("SELECT COUNT(*) FROM equipment_supplier", fetch='one')[0]
+            return self.stats_cache.get_or_load('dashboard', self._load_dashboard_stats)
         except Exception as e:
             print(f"Error getting stats: {e}")
+            return {'workers': 0, 'suppliers': 0, 'equipment': 0, 'relationships': 0, 'approximate': set()}
+
+    def _load_dashboard_stats(self):
+        """All four counts in one round trip.
+
+        Tables whose planner estimate (pg_class.reltuples) exceeds
+        APPROX_COUNT_THRESHOLD use the estimate instead of a full COUNT(*);
+        their keys are listed in stats['approximate']. Never-analyzed
+        tables report -1 and are always counted exactly.
+        """
+        query = """
+            WITH est AS (
+                SELECT (SELECT reltuples FROM pg_class WHERE oid = 'worker'::regclass)::bigint AS workers,
+                       (SELECT reltuples FROM pg_class WHERE oid = 'supplier'::regclass)::bigint AS suppliers,
+                       (SELECT reltuples FROM pg_class WHERE oid = 'equipment'::regclass)::bigint AS equipment,
+                       (SELECT reltuples FROM pg_class WHERE oid = 'equipment_supplier'::regclass)::bigint
+                           AS relationships
+            )
+            SELECT CASE WHEN workers > %(threshold)s THEN workers
+                        ELSE (SELECT COUNT(*) FROM worker) END,
+                   workers > %(threshold)s,
+                   CASE WHEN suppliers > %(threshold)s THEN suppliers
+                        ELSE (SELECT COUNT(*) FROM supplier) END,
+                   suppliers > %(threshold)s,
+                   CASE WHEN equipment > %(threshold)s THEN equipment
+                        ELSE (SELECT COUNT(*) FROM equipment) END,
+                   equipment > %(threshold)s,
+                   CASE WHEN relationships > %(threshold)s THEN relationships
+                        ELSE (SELECT COUNT(*) FROM equipment_supplier) END,
+                   relationships > %(threshold)s
+            FROM est
+        """
+        row = db_manager.execute_query(query, {'threshold': APPROX_COUNT_THRESHOLD}, fetch='one')
+        stats = {'approximate': set()}
+        for i, key in enumerate(('workers', 'suppliers', 'equipment', 'relationships')):
+            stats[key] = row[2 * i]
+            if row[2 * i + 1]:
+                stats['approximate'].add(key)
         return stats
@@ -1,6 +1,11 @@
 # screens/equipment_screen.py
 import tkinter as tk
 from tkinter import ttk, messagebox
+from app.database import SEARCH_LIMIT
+from app.screens.bulk_paste import read_clipboard_rows
+from app.screens.batch_results import apply_batch_result
+from app.screens.search_controller import SearchController
+from app.screens.virtual_grid import VirtualGrid
 from app.operations.equipment_operations import EquipmentOperations, EquipmentDialog
 
 class EquipmentScreen:
@@ -11,7 +16,8 @@ class EquipmentScreen:
         self.update_status = app.update_status
         self.equipment_ops = EquipmentOperations()
         self.equipment_search_var = None
-        self.equipment_tree = None
+        self.search = None
+        self.equipment_grid = None
 
     def show_equipment_screen(self):
         """Show equipment management screen"""
@@ -38,13 +44,21 @@ class EquipmentScreen:
         self.equipment_search_var = tk.StringVar()
         search_entry = tk.Entry(search_frame, textvariable=self.equipment_search_var, width=30, font=("Arial", 10))
         search_entry.pack(side="left", padx=5)
-        search_entry.bind("<KeyRelease>", lambda e: self.search_equipment())
+        self.search = SearchController(self.app, self.equipment_search_var, self.equipment_ops.search_equipment,
+                                       self._show_search_results, lambda: self.equipment_grid.reload(),
+                                       columns=(1, 2, 5),
+                                       load_all=self.equipment_ops.get_all_equipment)
+        self.search.bind(search_entry)
 
-        tk.Button(search_frame, text="Clear", command=self.refresh_equipment,
+        tk.Button(search_frame, text="Clear", command=self.search.clear,
                   font=("Arial", 10), bg="#95a5a6", fg="white").pack(side="left", padx=5)
+        tk.Checkbutton(search_frame, text="Offline", variable=self.search.offline, command=self.search.run_now,
+                       font=("Arial", 10), bg="#ffd4d4").pack(side="left", padx=5)
 
         buttons = [
             ("Add Equipment", self.add_equipment, "#69070d"),
+            ("Paste Rows", self.paste_equipment, "#8a0911"),
+            ("Paste Edits", self.paste_equipment_edits, "#9d0a13"),
             ("Edit Equipment", self.edit_equipment, "#b00c16"),
             ("Delete Equipment", self.delete_equipment, "#de0b17"),
             ("Refresh", self.refresh_equipment, "#ff2430")
@@ -62,72 +76,34 @@ class EquipmentScreen:
 
     def create_equipment_table(self):
         """Create equipment table"""
-        table_frame = tk.Frame(self.content_frame, bg="#ffd4d4")
-        table_frame.pack(fill="both", expand=True, padx=10, pady=10)
-
         columns = ("Equipment ID", "Name", "Category", "Purchase Date", "Warranty Expiry", "Brand")
 
-        self.equipment_tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=15)
         # Apply style for black header text
         style = ttk.Style()
         style.theme_use("clam")  # Use a theme that allows styling
         style.configure("Treeview.Heading", background="#f7747f", foreground="black", font=("Segoe UI", 10, "bold"))
         style.configure("Treeview", font=("Segoe UI", 10), rowheight=28)
 
-        # Configure columns
+        # Only the visible rows are materialized; more are fetched as the user scrolls
         widths = [100, 150, 120, 120, 120, 120]
-        for i, col in enumerate(columns):
-            self.equipment_tree.heading(col, text=col)
-            self.equipment_tree.column(col, width=widths[i], minwidth=50)
-
-        # Scrollbars
-        v_scroll = ttk.Scrollbar(table_frame, orient="vertical", command=self.equipment_tree.yview)
-        h_scroll = ttk.Scrollbar(table_frame, orient="horizontal", command=self.equipment_tree.xview)
-        self.equipment_tree.configure(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
-
-        self.equipment_tree.pack(side="left", fill="both", expand=True)
-        v_scroll.pack(side="right", fill="y")
-        h_scroll.pack(side="bottom", fill="x")
-
-        self.equipment_tree.bind("<Double-1>", lambda e: self.edit_equipment())
-
-    def search_equipment(self):
-        """Live search for equipment"""
-        query = self.equipment_search_var.get().strip().lower()
-        if not query:
-            self.refresh_equipment()
-            return
-
-        try:
-            all_eq = self.equipment_ops.get_all_equipment()
-            filtered = [
-                eq for eq in all_eq
-                if query in str(eq[1]).lower() or  # Name
-                   query in str(eq[2]).lower() or  # Category
-                   query in str(eq[5]).lower()  # Brand
-            ]
-            self.equipment_tree.delete(*self.equipment_tree.get_children())
-            for eq in filtered:
-                self.equipment_tree.insert("", "end", values=eq)
-
-            self.update_status(f"{len(filtered)} equipment item(s) matched")
-        except Exception as e:
-            messagebox.showerror("Error", f"Search failed: {str(e)}")
+        self.equipment_grid = VirtualGrid(self.app, self.content_frame, columns, widths,
+                                          fetch_page=self.equipment_ops.get_equipment_page,
+                                          estimate_count=self.equipment_ops.estimate_equipment_count,
+                                          bg="#ffd4d4")
+        self.equipment_grid.bind("<Double-1>", lambda e: self.edit_equipment())
+
+    def _show_search_results(self, results):
+        self.equipment_grid.set_rows(results)
+        if len(results) >= SEARCH_LIMIT:
+            self.update_status(f"Showing the first {len(results)} matching equipment item(s)")
+        else:
+            self.update_status(f"{len(results)} equipment item(s) matched")
 
     def refresh_equipment(self):
         """Refresh equipment table"""
-        try:
-            if hasattr(self, 'equipment_tree') and self.equipment_tree:
-                for item in self.equipment_tree.get_children():
-                    self.equipment_tree.delete(item)
-
-                equipment = self.equipment_ops.get_all_equipment()
-                for item in equipment:
-                    self.equipment_tree.insert("", "end", values=item)
-
-                self.update_status(f"Loaded {len(equipment)} equipment items")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to refresh equipment: {str(e)}")
+        if self.equipment_grid and self.equipment_grid.tree.winfo_exists():
+            self.equipment_grid.reload()
+            self.search.invalidate()
 
     def add_equipment(self):
         """Add new equipment"""
@@ -135,50 +111,113 @@ class EquipmentScreen:
         self.root.wait_window(dialog.dialog)
 
         if dialog.result:
-            if self.equipment_ops.add_equipment(dialog.result):
-                messagebox.showinfo("Success", "Equipment added successfully!")
-                self.refresh_equipment()
-                self.update_status("Equipment added")
+            self.app.run_in_background(
+                self.equipment_ops.add_equipment, dialog.result,
+                on_success=lambda row: self._after_change(row, "Equipment added successfully!", "Equipment added"),
+                on_error=lambda e: self.app.show_error("Failed to add equipment", e),
+                cancellable=False)
+
+    def paste_equipment(self):
+        """Bulk-add equipment rows copied from a spreadsheet"""
+        fields = ("name", "category", "purchase_date", "warranty_expiry", "brand")
+        rows = read_clipboard_rows(self.root, fields, required=("name", "category"))
+        if rows and messagebox.askyesno("Confirm Paste", f"Add {len(rows)} equipment item(s)?"):
+            self.app.run_in_background(
+                self.equipment_ops.add_many, rows,
+                on_success=lambda added: apply_batch_result(
+                    self.app, self.equipment_grid, self.search, added,
+                    f"{len(added or [])} equipment item(s) added!", "Equipment added"),
+                on_error=lambda e: self.app.show_error("Failed to add equipment", e),
+                cancellable=False)
+
+    def paste_equipment_edits(self):
+        """Bulk-update existing equipment, keyed by equipment_id, from rows copied from a spreadsheet"""
+        fields = ("equipment_id", "name", "category", "purchase_date", "warranty_expiry", "brand")
+        rows = read_clipboard_rows(self.root, fields, required=("equipment_id", "name", "category"),
+                                   converters={"equipment_id": int})
+        if rows and messagebox.askyesno("Confirm Paste", f"Update {len(rows)} equipment item(s)?"):
+            self.app.run_in_background(
+                self.equipment_ops.update_many, rows,
+                on_success=lambda updated: apply_batch_result(
+                    self.app, self.equipment_grid, self.search, updated,
+                    f"{len(updated or [])} of {len(rows)} equipment item(s) updated!", "Equipment updated"),
+                on_error=lambda e: self.app.show_error("Failed to update equipment", e),
+                cancellable=False)
 
     def edit_equipment(self):
         """Edit selected equipment"""
-        if not hasattr(self, 'equipment_tree') or not self.equipment_tree:
+        if not self.equipment_grid:
             return
 
-        selection = self.equipment_tree.selection()
+        selection = self.equipment_grid.selected_rows()
         if not selection:
             messagebox.showwarning("Warning", "Please select equipment to edit")
             return
 
-        item = self.equipment_tree.item(selection[0])
-        equipment_data = item['values']
+        equipment_data = selection[0]
 
         dialog = EquipmentDialog(self.root, "Edit Equipment", equipment_data)
         self.root.wait_window(dialog.dialog)
 
         if dialog.result:
-            if self.equipment_ops.update_equipment(equipment_data[0], dialog.result):
-                messagebox.showinfo("Success", "Equipment updated successfully!")
-                self.refresh_equipment()
-                self.update_status("Equipment updated")
+            self.app.run_in_background(
+                self.equipment_ops.update_equipment, equipment_data.equipment_id, dialog.result,
+                on_success=lambda row: self._after_change(row, "Equipment updated successfully!", "Equipment updated"),
+                on_error=lambda e: self.app.show_error("Failed to update equipment", e),
+                cancellable=False)
 
     def delete_equipment(self):
         """Delete selected equipment"""
-        if not hasattr(self, 'equipment_tree') or not self.equipment_tree:
+        if not self.equipment_grid:
             return
 
-        selection = self.equipment_tree.selection()
+        selection = self.equipment_grid.selected_rows()
         if not selection:
             messagebox.showwarning("Warning", "Please select equipment to delete")
             return
 
-        item = self.equipment_tree.item(selection[0])
-        equipment_data = item['values']
-        equipment_id = equipment_data[0]
-        equipment_name = equipment_data[1]
+        if len(selection) > 1:
+            equipment_ids = [row.equipment_id for row in selection]
+            if messagebox.askyesno("Confirm Delete", f"Delete {len(equipment_ids)} equipment items?"):
+                self.app.run_in_background(
+                    self.equipment_ops.delete_many, equipment_ids,
+                    on_success=lambda ids: apply_batch_result(
+                        self.app, self.equipment_grid, self.search, ids,
+                        f"{len(ids or [])} equipment item(s) deleted!", "Equipment deleted", deleted=True),
+                    on_error=lambda e: self.app.show_error("Failed to delete equipment", e),
+                    cancellable=False)
+            return
+
+        equipment_data = selection[0]
+        equipment_id = equipment_data.equipment_id
+        equipment_name = equipment_data.name
 
         if messagebox.askyesno("Confirm Delete", f"Delete equipment {equipment_name}?"):
-            if self.equipment_ops.delete_equipment(equipment_id):
-                messagebox.showinfo("Success", "Equipment deleted successfully!")
-                self.refresh_equipment()
-                self.update_status("Equipment deleted")
\ No newline at end of file
+            self.app.run_in_background(
+                self.equipment_ops.delete_equipment, equipment_id,
+                on_success=lambda ok: self._after_change(ok, "Equipment deleted successfully!", "Equipment deleted",
+                                                         removed=equipment_id),
+                on_error=lambda e: self.app.show_error("Failed to delete equipment", e),
+                cancellable=False)
+
+    def _after_change(self, result, message, status, removed=None):
+        """Confirm a successful write and patch just the affected grid row.
+
+        `result` is the row returned by an add/edit, or True for a delete;
+        `removed` is the key of a deleted row (or of an edited row whose key
+        changed). A full reload stays on the Refresh button.
+        """
+        if not result:
+            messagebox.showwarning("Warning", "Equipment not found; it may have been deleted by another user")
+            return
+        messagebox.showinfo("Success", message)
+        # Dashboard counts are cached; make the next visit recount
+        self.app.dashboard_screen.stats_cache.invalidate()
+        if self.equipment_grid and self.equipment_grid.exists():
+            if isinstance(result, tuple):
+                self.search.row_changed(result, removed)
+                self.equipment_grid.upsert_row(result, removed)
+            elif removed is not None:
+                self.search.row_removed(removed)
+                self.equipment_grid.remove_row(removed)
+        self.update_status(status)
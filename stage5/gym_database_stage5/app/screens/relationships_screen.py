@@ -1,6 +1,11 @@
 # screens/relationships_screen.py
 import tkinter as tk
 from tkinter import ttk, messagebox
+from app.database import SEARCH_LIMIT
+from app.screens.bulk_paste import read_clipboard_rows
+from app.screens.batch_results import apply_batch_result
+from app.screens.search_controller import SearchController
+from app.screens.virtual_grid import VirtualGrid
 from app.operations.equipment_supplier_operations import EquipmentSupplierOperations, EquipmentSupplierDialog
 
 
@@ -12,7 +17,8 @@ class RelationshipsScreen:
         self.update_status = app.update_status
         self.es_ops = EquipmentSupplierOperations()
         self.relationship_search_var = None
-        self.relationships_tree = None
+        self.search = None
+        self.relationships_grid = None
 
     def show_relationships_screen(self):
         """Show equipment-supplier relationships screen"""
@@ -39,13 +45,22 @@ class RelationshipsScreen:
         self.relationship_search_var = tk.StringVar()
         search_entry = tk.Entry(search_frame, textvariable=self.relationship_search_var, width=30, font=("Arial", 10))
         search_entry.pack(side="left", padx=5)
-        search_entry.bind("<KeyRelease>", lambda e: self.search_relationships())
-
-        tk.Button(search_frame, text="Clear", command=self.refresh_relationships,
+        self.search = SearchController(self.app, self.relationship_search_var, self.es_ops.search_equipment_suppliers,
+                                       self._show_search_results, lambda: self.relationships_grid.reload(),
+                                       columns=(1, 4, 2, 0, 3, 5, 6),
+                                       key=lambda row: row.key,
+                                       load_all=self.es_ops.get_all_equipment_suppliers)
+        self.search.bind(search_entry)
+
+        tk.Button(search_frame, text="Clear", command=self.search.clear,
                   font=("Arial", 10), bg="#95a5a6", fg="white").pack(side="left", padx=5)
+        tk.Checkbutton(search_frame, text="Offline", variable=self.search.offline, command=self.search.run_now,
+                       font=("Arial", 10), bg="#faf2bb").pack(side="left", padx=5)
 
         buttons = [
             ("Add Relationship", self.add_relationship, "#694905"),
+            ("Paste Rows", self.paste_relationships, "#7a5507"),
+            ("Paste Edits", self.paste_relationship_edits, "#835c08"),
             ("Edit Relationship", self.edit_relationship, "#8c6208"),
             ("Delete Relationship", self.delete_relationship, "#b57f0d"),
             ("Refresh", self.refresh_relationships, "#e6a317")
@@ -63,76 +78,35 @@ class RelationshipsScreen:
 
     def create_relationships_table(self):
         """Create relationships table"""
-        table_frame = tk.Frame(self.content_frame, bg="#faf2bb")
-        table_frame.pack(fill="both", expand=True, padx=10, pady=10)
-
         columns = ("Eq. ID", "Equipment", "Category", "Person ID", "Person Name", "Quantity", "Supply Date")
 
-        self.relationships_tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=15)
         # Apply style for black header text
         style = ttk.Style()
         style.theme_use("clam")  # Use a theme that allows styling
         style.configure("Treeview.Heading", background="#f2b638", foreground="black", font=("Segoe UI", 10, "bold"))
         style.configure("Treeview", font=("Segoe UI", 10), rowheight=28)
 
-        # Configure columns
+        # Only the visible rows are materialized; rows are keyed by (equipment_id, pid)
         widths = [60, 150, 100, 80, 150, 80, 100]
-        for i, col in enumerate(columns):
-            self.relationships_tree.heading(col, text=col)
-            self.relationships_tree.column(col, width=widths[i], minwidth=50)
-
-        # Scrollbars
-        v_scroll = ttk.Scrollbar(table_frame, orient="vertical", command=self.relationships_tree.yview)
-        h_scroll = ttk.Scrollbar(table_frame, orient="horizontal", command=self.relationships_tree.xview)
-        self.relationships_tree.configure(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
-
-        self.relationships_tree.pack(side="left", fill="both", expand=True)
-        v_scroll.pack(side="right", fill="y")
-        h_scroll.pack(side="bottom", fill="x")
-
-        self.relationships_tree.bind("<Double-1>", lambda e: self.edit_relationship())
-
-    def search_relationships(self):
-        """Live search for equipment-supplier relationships"""
-        query = self.relationship_search_var.get().strip().lower()
-        if not query:
-            self.refresh_relationships()
-            return
-
-        try:
-            all_rels = self.es_ops.get_all_equipment_suppliers()
-            filtered = [
-                rel for rel in all_rels
-                if query in str(rel[0]).lower() or  # eq id
-                   query in str(rel[1]).lower() or  # eq name
-                   query in str(rel[2]).lower() or # category
-                   query in str(rel[3]).lower() or  # person id
-                   query in str(rel[4]).lower() or  # Person Name
-                   query in str(rel[5]).lower() or  # quantity
-                   query in str(rel[6]).lower()   # supply date
-            ]
-            self.relationships_tree.delete(*self.relationships_tree.get_children())
-            for rel in filtered:
-                self.relationships_tree.insert("", "end", values=rel)
-
-            self.update_status(f"{len(filtered)} relationship(s) matched")
-        except Exception as e:
-            messagebox.showerror("Error", f"Search failed: {str(e)}")
+        self.relationships_grid = VirtualGrid(self.app, self.content_frame, columns, widths,
+                                              fetch_page=self.es_ops.get_equipment_suppliers_page,
+                                              estimate_count=self.es_ops.estimate_equipment_supplier_count,
+                                              key=lambda row: row.key,
+                                              bg="#faf2bb")
+        self.relationships_grid.bind("<Double-1>", lambda e: self.edit_relationship())
+
+    def _show_search_results(self, results):
+        self.relationships_grid.set_rows(results)
+        if len(results) >= SEARCH_LIMIT:
+            self.update_status(f"Showing the first {len(results)} matching relationship(s)")
+        else:
+            self.update_status(f"{len(results)} relationship(s) matched")
 
     def refresh_relationships(self):
         """Refresh relationships table"""
-        try:
-            if hasattr(self, 'relationships_tree') and self.relationships_tree:
-                for item in self.relationships_tree.get_children():
-                    self.relationships_tree.delete(item)
-
-                relationships = self.es_ops.get_all_equipment_suppliers()
-                for relationship in relationships:
-                    self.relationships_tree.insert("", "end", values=relationship)
-
-                self.update_status(f"Loaded {len(relationships)} relationships")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to refresh relationships: {str(e)}")
+        if self.relationships_grid and self.relationships_grid.tree.winfo_exists():
+            self.relationships_grid.reload()
+            self.search.invalidate()
 
     def add_relationship(self):
         """Add new equipment-supplier relationship"""
@@ -140,53 +114,119 @@ class RelationshipsScreen:
         self.root.wait_window(dialog.dialog)
 
         if dialog.result:
-            if self.es_ops.add_equipment_supplier(dialog.result):
-                messagebox.showinfo("Success", "Relationship added successfully!")
-                self.refresh_relationships()
-                self.update_status("Relationship added")
+            self.app.run_in_background(
+                self.es_ops.add_equipment_supplier, dialog.result,
+                on_success=lambda row: self._after_change(row, "Relationship added successfully!", "Relationship added"),
+                on_error=lambda e: self.app.show_error("Failed to add equipment-supplier relationship", e),
+                cancellable=False)
+
+    def paste_relationships(self):
+        """Bulk-add relationship rows (e.g. a delivery) copied from a spreadsheet"""
+        fields = ("equipment_id", "pid", "quantity", "supply_date")
+        rows = read_clipboard_rows(self.root, fields, required=("equipment_id", "pid", "supply_date"),
+                                   converters={"equipment_id": int, "pid": int, "quantity": int})
+        if rows and messagebox.askyesno("Confirm Paste", f"Add {len(rows)} relationship(s)?"):
+            self.app.run_in_background(
+                self.es_ops.add_many, rows,
+                on_success=lambda added: apply_batch_result(
+                    self.app, self.relationships_grid, self.search, added,
+                    f"{len(added or [])} relationship(s) added!", "Relationships added"),
+                on_error=lambda e: self.app.show_error("Failed to add equipment-supplier relationships", e),
+                cancellable=False)
+
+    def paste_relationship_edits(self):
+        """Bulk-update quantity and supply date of existing relationships, keyed by (equipment_id, pid)"""
+        fields = ("equipment_id", "pid", "quantity", "supply_date")
+        rows = read_clipboard_rows(self.root, fields, required=("equipment_id", "pid", "supply_date"),
+                                   converters={"equipment_id": int, "pid": int, "quantity": int})
+        if rows and messagebox.askyesno("Confirm Paste", f"Update {len(rows)} relationship(s)?"):
+            self.app.run_in_background(
+                self.es_ops.update_many, rows,
+                on_success=lambda updated: apply_batch_result(
+                    self.app, self.relationships_grid, self.search, updated,
+                    f"{len(updated or [])} of {len(rows)} relationship(s) updated!", "Relationships updated"),
+                on_error=lambda e: self.app.show_error("Failed to update equipment-supplier relationships", e),
+                cancellable=False)
 
     def edit_relationship(self):
         """Edit selected relationship"""
-        if not hasattr(self, 'relationships_tree') or not self.relationships_tree:
+        if not self.relationships_grid:
             return
 
-        selection = self.relationships_tree.selection()
+        selection = self.relationships_grid.selected_rows()
         if not selection:
             messagebox.showwarning("Warning", "Please select a relationship to edit")
             return
 
-        item = self.relationships_tree.item(selection[0])
-        relationship_data = item['values']
+        relationship_data = selection[0]
 
         dialog = EquipmentSupplierDialog(self.root, "Edit Relationship", relationship_data)
         self.root.wait_window(dialog.dialog)
 
         if dialog.result:
-            if self.es_ops.update_equipment_supplier(relationship_data, dialog.result):
-                messagebox.showinfo("Success", "Relationship updated successfully!")
-                self.refresh_relationships()
-                self.update_status("Relationship updated")
+            self.app.run_in_background(
+                self.es_ops.update_equipment_supplier, relationship_data, dialog.result,
+                on_success=lambda row: self._after_change(row, "Relationship updated successfully!",
+                                                          "Relationship updated",
+                                                          removed=relationship_data.key),
+                on_error=lambda e: self.app.show_error("Failed to update equipment-supplier relationship", e),
+                cancellable=False)
 
     def delete_relationship(self):
         """Delete selected relationship"""
-        if not hasattr(self, 'relationships_tree') or not self.relationships_tree:
+        if not self.relationships_grid:
             return
 
-        selection = self.relationships_tree.selection()
+        selection = self.relationships_grid.selected_rows()
         if not selection:
             messagebox.showwarning("Warning", "Please select a relationship to delete")
             return
 
-        item = self.relationships_tree.item(selection[0])
-        relationship_data = item['values']
-        equipment_id = relationship_data[0]
-        pid = relationship_data[3]
-        equipment_name = relationship_data[1]
-        person_name = relationship_data[4]
+        if len(selection) > 1:
+            keys = [row.key for row in selection]
+            if messagebox.askyesno("Confirm Delete", f"Delete {len(keys)} relationships?"):
+                self.app.run_in_background(
+                    self.es_ops.delete_many, keys,
+                    on_success=lambda deleted: apply_batch_result(
+                        self.app, self.relationships_grid, self.search, deleted,
+                        f"{len(deleted or [])} relationship(s) deleted!", "Relationships deleted", deleted=True),
+                    on_error=lambda e: self.app.show_error("Failed to delete equipment-supplier relationships", e),
+                    cancellable=False)
+            return
+
+        relationship_data = selection[0]
+        equipment_id = relationship_data.equipment_id
+        pid = relationship_data.pid
+        equipment_name = relationship_data.equipment_name
+        person_name = relationship_data.person_name
 
         if messagebox.askyesno("Confirm Delete",
                                f"Delete relationship between {equipment_name} and {person_name}?"):
-            if self.es_ops.delete_equipment_supplier(equipment_id, pid):
-                messagebox.showinfo("Success", "Relationship deleted successfully!")
-                self.refresh_relationships()
-                self.update_status("Relationship deleted")
\ No newline at end of file
+            self.app.run_in_background(
+                self.es_ops.delete_equipment_supplier, equipment_id, pid,
+                on_success=lambda ok: self._after_change(ok, "Relationship deleted successfully!",
+                                                         "Relationship deleted", removed=(equipment_id, pid)),
+                on_error=lambda e: self.app.show_error("Failed to delete equipment-supplier relationship", e),
+                cancellable=False)
+
+    def _after_change(self, result, message, status, removed=None):
+        """Confirm a successful write and patch just the affected grid row.
+
+        `result` is the row returned by an add/edit, or True for a delete;
+        `removed` is the key of a deleted row (or of an edited row whose key
+        changed). A full reload stays on the Refresh button.
+        """
+        if not result:
+            messagebox.showwarning("Warning", "Relationship not found; it may have been deleted by another user")
+            return
+        messagebox.showinfo("Success", message)
+        # Dashboard counts are cached; make the next visit recount
+        self.app.dashboard_screen.stats_cache.invalidate()
+        if self.relationships_grid and self.relationships_grid.exists():
+            if isinstance(result, tuple):
+                self.search.row_changed(result, removed)
+                self.relationships_grid.upsert_row(result, removed)
+            elif removed is not None:
+                self.search.row_removed(removed)
+                self.relationships_grid.remove_row(removed)
+        self.update_status(status)
@@ -1,8 +1,21 @@
 # screens/reports_screen.py
+import itertools
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from datetime import datetime
+from app.analytics import ShiftAnalytics, top, OVERTIME_THRESHOLD
+from app.background import current_task
+from app.cache import TTLCache
 from app.database import db_manager
+from app.lookups import lookup_changed
+from app.operations.advanced_functions import AdvancedFunctions
+
+# How often the report views are refreshed while the Reports screen is open
+REPORT_REFRESH_MS = 5 * 60 * 1000
+
+# Rows fetched from the server cursor and inserted into the results box at a time
+REPORT_CHUNK_ROWS = 200
 
 
 class ReportsScreen:
@@ -11,7 +24,13 @@ class ReportsScreen:
         self.root = app.root
         self.content_frame = app.content_frame
         self.update_status = app.update_status
+        self.advanced_ops = AdvancedFunctions()
         self.results_text = None
+        self.freshness_label = None
+        self._refresh_job = None
+        self._report_task = None
+        # Column snapshot for the scenario report, reloaded with the report views
+        self.analytics_cache = TTLCache(ttl=REPORT_REFRESH_MS / 1000)
 
     def show_reports_screen(self):
         """Show reports and analytics screen"""
@@ -26,6 +45,10 @@ class ReportsScreen:
         header = tk.Frame(wrapper, bg="#ffe8fb")
         header.pack(fill="x", pady=(0, 10))
         tk.Label(header, text="📊 Reports & Analytics",font=("Arial", 18, "bold"), fg="#4c2861", bg="#ffe8fb").pack(side="left")
+        tk.Button(header, text="⟳ Refresh Data", command=lambda: self.refresh_report_views(force=True),
+                  font=("Arial", 9), bg="#871791", fg="white", relief="flat", cursor="hand2").pack(side="right", padx=5)
+        self.freshness_label = tk.Label(header, text="", font=("Arial", 9), fg="#4c2861", bg="#ffe8fb")
+        self.freshness_label.pack(side="right", padx=10)
 
         # Standard Reports Section - Made more compact
         std_frame = tk.LabelFrame(wrapper, text="Standard Reports",
@@ -49,13 +72,15 @@ class ReportsScreen:
                                   padx=10, pady=8, bd=1)
         adv_frame.pack(fill="x", pady=(0, 15))
         adv_frame.pack_propagate(False)
-        adv_frame.configure(height=90)  # Increased height for bigger buttons
+        adv_frame.configure(height=130)  # Three rows of buttons
 
         advanced_buttons = [
             ("🧑‍🏭 Worker Shift Summary", self.func_worker_shift_summary, "#e81cda"),
+            ("💰 Payroll (All Workers)", self.func_all_worker_shift_summaries, "#e81cda"),
             ("🛠 Maintenance Status", self.func_equipment_maintenance_status, "#e81cda"),
             ("✍️ Update Worker Contract", self.proc_update_worker_contract, "#ff73e8"),
-            ("📦 Process Orders", self.proc_process_equipment_orders, "#ff73e8")
+            ("📦 Process Orders", self.proc_process_equipment_orders, "#ff73e8"),
+            ("🧮 Pay Scenario", self.func_pay_scenario, "#e81cda")
         ]
         self._render_buttons(adv_frame, advanced_buttons)
 
@@ -104,6 +129,7 @@ class ReportsScreen:
         self.results_text.insert(tk.END, "✓ Larger font and better spacing\n")
 
         self.update_status("Reports screen loaded")
+        self.refresh_report_views()
 
     def _render_buttons(self, parent, buttons):
         """Render buttons in a 2-column layout with more compact styling"""
@@ -114,181 +140,198 @@ class ReportsScreen:
             btn.grid(row=i // 2, column=i % 2, padx=15, pady=8, sticky="ew")  # Reduced padding
             parent.grid_columnconfigure(i % 2, weight=1)
 
+    def _report_header(self, title, *lines):
+        header = f"{title}\n" + "=" * 80 + "\n"
+        header += f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+        header += "".join(f"{line}\n" for line in lines)
+        return header + "\n"
+
+    def _stream_report(self, query, params, header, format_row, status,
+                       footer=None, empty_text=None, view=None, refcursor=False, on_error=None):
+        """Show `header` now, then stream the rows in behind it, one Text insert per chunk.
+
+        format_row(row) -> str and footer(row_count) -> str run on the worker
+        thread. With refcursor=True, `query` opens a REFCURSOR and its rows are
+        streamed. A report started while another is still streaming cancels it.
+        """
+        if self._report_task is not None:
+            self._report_task.cancel()
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, header)
+        self.update_status("Generating report...")
+        self._report_task = self.app.run_in_background(
+            self._stream_rows, query, params, format_row, footer, empty_text, view, refcursor,
+            on_success=lambda refreshed_at: self._on_report_streamed(status, view, refreshed_at),
+            on_error=on_error or (lambda e: messagebox.showerror("Error", f"Failed to generate report: {str(e)}")))
+
+    def _stream_rows(self, query, params, format_row, footer, empty_text, view, refcursor):
+        """Worker-thread body: read the report through a server-side cursor, posting each chunk as one string"""
+        task = current_task()
+        stream = db_manager.iter_refcursor if refcursor else db_manager.iter_query
+        rows_iter = stream(query, params, itersize=REPORT_CHUNK_ROWS)
+        count = 0
+        try:
+            while True:
+                rows = list(itertools.islice(rows_iter, REPORT_CHUNK_ROWS))
+                if not rows:
+                    break
+                count += len(rows)
+                self.app.executor.post(self._append_results, "".join(format_row(row) for row in rows))
+                # Left the screen or started another report: stop fetching
+                if task is not None and task.cancelled:
+                    return None
+        finally:
+            # Closes the server-side cursor even when stopped early
+            rows_iter.close()
+
+        tail = empty_text if count == 0 and empty_text else ""
+        if footer:
+            tail += footer(count)
+        if tail:
+            self.app.executor.post(self._append_results, tail)
+
+        if view:
+            refreshed = db_manager.execute_query("SELECT refreshed_at FROM report_refresh_log WHERE view_name = %s",
+                                                 (view,), fetch='one')
+            return refreshed[0] if refreshed else None
+        return None
+
+    def _append_results(self, text):
+        if self.results_text is not None and self.results_text.winfo_exists():
+            self.results_text.insert(tk.END, text)
+
+    def _on_report_streamed(self, status, view, refreshed_at):
+        self._report_task = None
+        if view:
+            self._show_freshness(refreshed_at)
+        self.update_status(status)
+
+    def _show_freshness(self, refreshed_at):
+        if self.freshness_label is None or not self.freshness_label.winfo_exists():
+            return
+        text = f"Data as of {refreshed_at.strftime('%Y-%m-%d %H:%M:%S')}" if refreshed_at else ""
+        self.freshness_label.config(text=text)
+
+    def refresh_report_views(self, force=False):
+        """Refresh stale report views in the background (all of them when forced), then reschedule"""
+        if self._refresh_job is not None:
+            self.root.after_cancel(self._refresh_job)
+            self._refresh_job = None
+        if self.results_text is None or not self.results_text.winfo_exists():
+            return
+
+        max_age = "0" if force else f"{REPORT_REFRESH_MS // 1000} seconds"
+        if force:
+            self.analytics_cache.invalidate()
+            self.update_status("Refreshing report data...")
+        self.app.run_in_background(self._refresh_views, max_age,
+                                   on_success=lambda refreshed_at: self._on_views_refreshed(refreshed_at, force),
+                                   on_error=lambda e: print(f"Report view refresh failed: {e}"),
+                                   cancellable=False)
+        self._refresh_job = self.root.after(REPORT_REFRESH_MS, self.refresh_report_views)
+
+    def _refresh_views(self, max_age):
+        """Worker-thread body: refresh, commit, and return the oldest refresh time"""
+        db_manager.execute_query("SELECT refresh_report_views(%s::interval)", (max_age,), fetch='one')
+        db_manager.commit()
+        result = db_manager.execute_query("SELECT MIN(refreshed_at) FROM report_refresh_log", fetch='one')
+        return result[0] if result else None
+
+    def _on_views_refreshed(self, refreshed_at, force):
+        self._show_freshness(refreshed_at)
+        if force:
+            self.update_status("Report data refreshed")
+
     def report_equipment_by_person(self):
         """Generate equipment by person report"""
-        try:
-            query = """
-                SELECT 
-                    p.firstname || ' ' || p.lastname as person_name,
-                    CASE 
-                        WHEN w.pid IS NOT NULL THEN 'Worker'
-                        WHEN s.pid IS NOT NULL THEN 'Supplier'
-                        ELSE 'Person'
-                    END as person_type,
-                    COUNT(DISTINCT e.equipment_id) as equipment_count,
-                    STRING_AGG(DISTINCT e.name, ', ') as equipment_list,
-                    SUM(es.quantity) as total_quantity
-                FROM person p
-                LEFT JOIN worker w ON p.pid = w.pid
-                LEFT JOIN supplier s ON p.pid = s.pid
-                LEFT JOIN equipment_supplier es ON p.pid = es.pid
-                LEFT JOIN equipment e ON es.equipment_id = e.equipment_id
-                GROUP BY p.pid, p.firstname, p.lastname, w.pid, s.pid
-                HAVING COUNT(DISTINCT e.equipment_id) > 0
-                ORDER BY equipment_count DESC
-            """
-            results = db_manager.execute_query(query, fetch='all')
-
-            self.results_text.delete(1.0, tk.END)
-            self.results_text.insert(tk.END, "EQUIPMENT BY PERSON REPORT\n")
-            self.results_text.insert(tk.END, "=" * 80 + "\n")
-            self.results_text.insert(tk.END, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-
-            for person_name, person_type, count, equipment_list, total_qty in results:
-                self.results_text.insert(tk.END, f"Person: {person_name} ({person_type})\n")
-                self.results_text.insert(tk.END, f"Equipment Count: {count}\n")
-                self.results_text.insert(tk.END, f"Total Quantity: {total_qty or 0}\n")
-                if equipment_list:
-                    self.results_text.insert(tk.END, f"Equipment: {equipment_list}\n")
-                self.results_text.insert(tk.END, "-" * 50 + "\n\n")
-
-            self.update_status("Equipment by person report generated")
-
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate report: {str(e)}")
+        query = """
+            SELECT person_name, person_type, equipment_count, equipment_list, total_quantity
+            FROM mv_equipment_by_person
+            ORDER BY equipment_count DESC
+        """
+        self._stream_report(query, None, self._report_header("EQUIPMENT BY PERSON REPORT"),
+                            self._format_equipment_by_person, "Equipment by person report generated",
+                            view='mv_equipment_by_person')
+
+    def _format_equipment_by_person(self, row):
+        person_name, person_type, count, equipment_list, total_qty = row
+        text = f"Person: {person_name} ({person_type})\n"
+        text += f"Equipment Count: {count}\n"
+        text += f"Total Quantity: {total_qty or 0}\n"
+        if equipment_list:
+            text += f"Equipment: {equipment_list}\n"
+        return text + "-" * 50 + "\n\n"
 
     def report_person_summary(self):
         """Generate person summary report"""
-        try:
-            query = """
-                SELECT 
-                    p.pid,
-                    p.firstname || ' ' || p.lastname as full_name,
-                    p.dateofb,
-                    p.phone,
-                    p.email,
-                    CASE 
-                        WHEN w.pid IS NOT NULL AND s.pid IS NOT NULL THEN 'Worker & Supplier'
-                        WHEN w.pid IS NOT NULL THEN 'Worker'
-                        WHEN s.pid IS NOT NULL THEN 'Supplier'
-                        ELSE 'Person Only'
-                    END as roles,
-                    w.job,
-                    w.contract,
-                    COUNT(es.equipment_id) as equipment_relations
-                FROM person p
-                LEFT JOIN worker w ON p.pid = w.pid
-                LEFT JOIN supplier s ON p.pid = s.pid
-                LEFT JOIN equipment_supplier es ON p.pid = es.pid
-                GROUP BY p.pid, p.firstname, p.lastname, p.dateofb, p.phone, p.email, 
-                         w.pid, s.pid, w.job, w.contract
-                ORDER BY p.pid
-            """
-            results = db_manager.execute_query(query, fetch='all')
-
-            self.results_text.delete(1.0, tk.END)
-            self.results_text.insert(tk.END, "PERSON SUMMARY REPORT\n")
-            self.results_text.insert(tk.END, "=" * 80 + "\n")
-            self.results_text.insert(tk.END, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-
-            for pid, name, dob, phone, email, roles, job, contract, eq_count in results:
-                self.results_text.insert(tk.END, f"ID: {pid} | {name}\n")
-                self.results_text.insert(tk.END, f"Roles: {roles}\n")
-                if job:
-                    self.results_text.insert(tk.END, f"Job: {job}\n")
-                if contract:
-                    self.results_text.insert(tk.END, f"Contract: {contract}\n")
-                self.results_text.insert(tk.END, f"Date of Birth: {dob or 'N/A'}\n")
-                self.results_text.insert(tk.END, f"Phone: {phone or 'N/A'}\n")
-                self.results_text.insert(tk.END, f"Email: {email or 'N/A'}\n")
-                self.results_text.insert(tk.END, f"Equipment Relations: {eq_count}\n")
-                self.results_text.insert(tk.END, "-" * 50 + "\n\n")
-
-            self.update_status("Person summary report generated")
-
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate report: {str(e)}")
+        query = """
+            SELECT pid, full_name, dateofb, phone, email, roles, job, contract, equipment_relations
+            FROM mv_person_summary
+            ORDER BY pid
+        """
+        self._stream_report(query, None, self._report_header("PERSON SUMMARY REPORT"),
+                            self._format_person_summary, "Person summary report generated",
+                            view='mv_person_summary')
+
+    def _format_person_summary(self, row):
+        pid, name, dob, phone, email, roles, job, contract, eq_count = row
+        text = f"ID: {pid} | {name}\n"
+        text += f"Roles: {roles}\n"
+        if job:
+            text += f"Job: {job}\n"
+        if contract:
+            text += f"Contract: {contract}\n"
+        text += f"Date of Birth: {dob or 'N/A'}\n"
+        text += f"Phone: {phone or 'N/A'}\n"
+        text += f"Email: {email or 'N/A'}\n"
+        text += f"Equipment Relations: {eq_count}\n"
+        return text + "-" * 50 + "\n\n"
 
     def report_equipment_stats(self):
         """Generate equipment statistics report"""
-        try:
-            query = """
-                SELECT 
-                    e.category,
-                    COUNT(*) as equipment_count,
-                    COUNT(DISTINCT es.pid) as people_involved,
-                    SUM(es.quantity) as total_quantity_supplied,
-                    MIN(e.purchase_date) as oldest_purchase,
-                    MAX(e.purchase_date) as newest_purchase,
-                    COUNT(CASE WHEN e.warranty_expiry < CURRENT_DATE THEN 1 END) as expired_warranty,
-                    STRING_AGG(DISTINCT e.brand, ', ') as brands
-                FROM equipment e
-                LEFT JOIN equipment_supplier es ON e.equipment_id = es.equipment_id
-                GROUP BY e.category
-                ORDER BY equipment_count DESC
-            """
-            results = db_manager.execute_query(query, fetch='all')
-
-            self.results_text.delete(1.0, tk.END)
-            self.results_text.insert(tk.END, "EQUIPMENT STATISTICS REPORT\n")
-            self.results_text.insert(tk.END, "=" * 80 + "\n")
-            self.results_text.insert(tk.END, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-
-            for category, count, people, qty, oldest, newest, expired, brands in results:
-                self.results_text.insert(tk.END, f"Category: {category}\n")
-                self.results_text.insert(tk.END, f"Equipment Count: {count}\n")
-                self.results_text.insert(tk.END, f"People Involved: {people or 0}\n")
-                self.results_text.insert(tk.END, f"Total Quantity Supplied: {qty or 0}\n")
-                self.results_text.insert(tk.END, f"Purchase Date Range: {oldest or 'N/A'} to {newest or 'N/A'}\n")
-                self.results_text.insert(tk.END, f"Expired Warranties: {expired}\n")
-                self.results_text.insert(tk.END, f"Brands: {brands or 'N/A'}\n")
-                self.results_text.insert(tk.END, "-" * 50 + "\n\n")
-
-            self.update_status("Equipment statistics report generated")
-
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate report: {str(e)}")
+        query = """
+            SELECT category, equipment_count, people_involved, total_quantity_supplied,
+                   oldest_purchase, newest_purchase, expired_warranty, brands
+            FROM mv_equipment_stats
+            ORDER BY equipment_count DESC
+        """
+        self._stream_report(query, None, self._report_header("EQUIPMENT STATISTICS REPORT"),
+                            self._format_equipment_stats, "Equipment statistics report generated",
+                            view='mv_equipment_stats')
+
+    def _format_equipment_stats(self, row):
+        category, count, people, qty, oldest, newest, expired, brands = row
+        text = f"Category: {category}\n"
+        text += f"Equipment Count: {count}\n"
+        text += f"People Involved: {people or 0}\n"
+        text += f"Total Quantity Supplied: {qty or 0}\n"
+        text += f"Purchase Date Range: {oldest or 'N/A'} to {newest or 'N/A'}\n"
+        text += f"Expired Warranties: {expired}\n"
+        text += f"Brands: {brands or 'N/A'}\n"
+        return text + "-" * 50 + "\n\n"
 
     def report_supply_timeline(self):
         """Generate supply timeline report"""
-        try:
-            query = """
-                SELECT 
-                    DATE_TRUNC('month', es.supply_date) as supply_month,
-                    COUNT(*) as supply_count,
-                    COUNT(DISTINCT es.equipment_id) as unique_equipment,
-                    COUNT(DISTINCT es.pid) as unique_people,
-                    SUM(es.quantity) as total_quantity,
-                    STRING_AGG(DISTINCT e.category, ', ') as categories
-                FROM equipment_supplier es
-                JOIN equipment e ON es.equipment_id = e.equipment_id
-                WHERE es.supply_date IS NOT NULL
-                GROUP BY DATE_TRUNC('month', es.supply_date)
-                ORDER BY supply_month DESC
-                LIMIT 12
-            """
-            results = db_manager.execute_query(query, fetch='all')
-
-            self.results_text.delete(1.0, tk.END)
-            self.results_text.insert(tk.END, "SUPPLY TIMELINE REPORT\n")
-            self.results_text.insert(tk.END, "=" * 80 + "\n")
-            self.results_text.insert(tk.END, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            self.results_text.insert(tk.END, "Last 12 months of supply activity\n\n")
-
-            for month, count, eq_count, people, qty, categories in results:
-                month_str = month.strftime('%Y-%m') if month else 'Unknown'
-                self.results_text.insert(tk.END, f"Month: {month_str}\n")
-                self.results_text.insert(tk.END, f"Supply Events: {count}\n")
-                self.results_text.insert(tk.END, f"Unique Equipment: {eq_count}\n")
-                self.results_text.insert(tk.END, f"People Involved: {people}\n")
-                self.results_text.insert(tk.END, f"Total Quantity: {qty}\n")
-                self.results_text.insert(tk.END, f"Categories: {categories}\n")
-                self.results_text.insert(tk.END, "-" * 50 + "\n\n")
-
-            self.update_status("Supply timeline report generated")
-
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate report: {str(e)}")
+        query = """
+            SELECT supply_month, supply_count, unique_equipment, unique_people, total_quantity, categories
+            FROM mv_supply_timeline
+            ORDER BY supply_month DESC
+            LIMIT 12
+        """
+        header = self._report_header("SUPPLY TIMELINE REPORT", "Last 12 months of supply activity")
+        self._stream_report(query, None, header, self._format_supply_timeline,
+                            "Supply timeline report generated", view='mv_supply_timeline')
+
+    def _format_supply_timeline(self, row):
+        month, count, eq_count, people, qty, categories = row
+        month_str = month.strftime('%Y-%m') if month else 'Unknown'
+        text = f"Month: {month_str}\n"
+        text += f"Supply Events: {count}\n"
+        text += f"Unique Equipment: {eq_count}\n"
+        text += f"People Involved: {people}\n"
+        text += f"Total Quantity: {qty}\n"
+        text += f"Categories: {categories}\n"
+        return text + "-" * 50 + "\n\n"
 
     def func_worker_shift_summary(self):
         """Execute worker shift summary function"""
@@ -298,89 +341,82 @@ class ReportsScreen:
         if not worker_id:
             return
 
-        try:
-            query = "SELECT * FROM get_worker_shift_summary(%s)"
-            results = db_manager.execute_query(query, (worker_id,), fetch='all')
-
-            self.results_text.delete(1.0, tk.END)
-            self.results_text.insert(tk.END, "WORKER SHIFT SUMMARY FUNCTION\n")
-            self.results_text.insert(tk.END, "=" * 80 + "\n")
-            self.results_text.insert(tk.END, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            self.results_text.insert(tk.END, f"Worker ID: {worker_id}\n\n")
-
-            if results:
-                for worker_name, total_shifts, total_hours, overtime_hours, total_pay in results:
-                    self.results_text.insert(tk.END, f"Worker Name: {worker_name}\n")
-                    self.results_text.insert(tk.END, f"Total Shifts: {total_shifts}\n")
-                    self.results_text.insert(tk.END, f"Total Hours: {total_hours:.2f}\n")
-                    self.results_text.insert(tk.END, f"Overtime Hours: {overtime_hours:.2f}\n")
-                    self.results_text.insert(tk.END, f"Total Pay: ${total_pay:.2f}\n")
-                    self.results_text.insert(tk.END, "-" * 50 + "\n")
-            else:
-                self.results_text.insert(tk.END, "Could not find worker.\n")
-
-            self.update_status("Worker shift summary generated")
-
-        except Exception:
-            self.results_text.delete(1.0, tk.END)
-            self.results_text.insert(tk.END, "Could not find worker.\n")
-            self.update_status("Worker not found or error occurred")
+        query = "SELECT * FROM get_worker_shift_summary(%s)"
+        self.update_status("Generating report...")
+        self.app.run_in_background(db_manager.execute_query, query, (worker_id,), fetch='all',
+                                   on_success=lambda results: self._render_worker_shift_summary(worker_id, results),
+                                   on_error=lambda e: self._worker_not_found())
+
+    def _render_worker_shift_summary(self, worker_id, results):
+        text = self._report_header("WORKER SHIFT SUMMARY FUNCTION", f"Worker ID: {worker_id}")
+
+        if results:
+            for worker_name, total_shifts, total_hours, overtime_hours, total_pay in results:
+                text += f"Worker Name: {worker_name}\n"
+                text += f"Total Shifts: {total_shifts}\n"
+                text += f"Total Hours: {total_hours:.2f}\n"
+                text += f"Overtime Hours: {overtime_hours:.2f}\n"
+                text += f"Total Pay: ${total_pay:.2f}\n"
+                text += "-" * 50 + "\n"
+        else:
+            text += "Could not find worker.\n"
+
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, text)
+        self.update_status("Worker shift summary generated")
+
+    def func_all_worker_shift_summaries(self):
+        """Shift summary and pay for every worker in a single query"""
+        query = "SELECT * FROM get_worker_shift_summaries()"
+        header = self._report_header("PAYROLL - ALL WORKERS")
+        header += f"{'ID':>6}  {'Worker':<30}{'Shifts':>7}{'Hours':>10}{'Overtime':>10}{'Pay':>12}\n"
+        header += "-" * 80 + "\n"
+        totals = {'pay': 0}
+
+        def format_row(row):
+            worker_id, worker_name, total_shifts, total_hours, overtime_hours, pay = row
+            totals['pay'] += pay
+            return (f"{worker_id:>6}  {worker_name[:29]:<30}{total_shifts:>7}"
+                    f"{total_hours:>10.2f}{overtime_hours:>10.2f}{pay:>12.2f}\n")
+
+        def footer(count):
+            return "-" * 80 + "\n" + f"Workers: {count}    Total Pay: ${totals['pay']:.2f}\n"
+
+        self._stream_report(query, None, header, format_row, "Payroll summary generated",
+                            footer=footer, on_error=self._show_function_error)
+
+    def _worker_not_found(self):
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, "Could not find worker.\n")
+        self.update_status("Worker not found or error occurred")
 
     def func_equipment_maintenance_status(self):
         """Execute equipment maintenance status function (ref cursor)"""
-        try:
-            query = """
-                SELECT 
-                    e.equipment_id,
-                    e.name,
-                    e.category,
-                    e.brand,
-                    e.purchase_date,
-                    e.warranty_expiry,
-                    CASE 
-                        WHEN e.warranty_expiry < CURRENT_DATE THEN 'EXPIRED'
-                        WHEN e.warranty_expiry < CURRENT_DATE + INTERVAL '30 days' THEN 'EXPIRING_SOON'
-                        ELSE 'VALID'
-                    END as warranty_status,
-                    COUNT(m.contract_id) as maintenance_count,
-                    MAX(cj.service_date) as last_maintenance_date,
-                    SUM(cj.cost) as total_maintenance_cost
-                FROM equipment e
-                LEFT JOIN maintenance m ON e.equipment_id = m.equipment_id
-                LEFT JOIN contract_job cj ON m.contract_id = cj.contract_id
-                GROUP BY e.equipment_id, e.name, e.category, e.brand, e.purchase_date, e.warranty_expiry
-                ORDER BY e.equipment_id
-            """
-            results = db_manager.execute_query(query, fetch='all')
-
-            self.results_text.delete(1.0, tk.END)
-            self.results_text.insert(tk.END, "EQUIPMENT MAINTENANCE STATUS FUNCTION\n")
-            self.results_text.insert(tk.END, "=" * 80 + "\n")
-            self.results_text.insert(tk.END, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-
-            if results:
-                for row in results:
-                    eq_id, name, category, brand, purchase_date, warranty_expiry, warranty_status, maintenance_count, last_maintenance, total_cost = row
-                    self.results_text.insert(tk.END, f"Equipment ID: {eq_id}\n")
-                    self.results_text.insert(tk.END, f"Name: {name}\n")
-                    self.results_text.insert(tk.END, f"Category: {category}\n")
-                    self.results_text.insert(tk.END, f"Brand: {brand}\n")
-                    self.results_text.insert(tk.END, f"Purchase Date: {purchase_date}\n")
-                    self.results_text.insert(tk.END, f"Warranty Expiry: {warranty_expiry}\n")
-                    self.results_text.insert(tk.END, f"Warranty Status: {warranty_status}\n")
-                    self.results_text.insert(tk.END, f"Maintenance Count: {maintenance_count or 0}\n")
-                    self.results_text.insert(tk.END, f"Last Maintenance: {last_maintenance or 'N/A'}\n")
-                    self.results_text.insert(tk.END, f"Total Maintenance Cost: ${total_cost or 0:.2f}\n")
-                    self.results_text.insert(tk.END, "-" * 50 + "\n\n")
-            else:
-                self.results_text.insert(tk.END, "No equipment data found.\n")
-
-            self.update_status("Equipment maintenance status generated")
-
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to execute function: {str(e)}")
-            self.results_text.delete(1.0, tk.END)
-            self.results_text.insert(tk.END, f"ERROR: {str(e)}\n")
+        # Rows are fetched from the function's cursor a chunk at a time
+        query = "SELECT get_equipment_maintenance_status()"
+        self._stream_report(query, None, self._report_header("EQUIPMENT MAINTENANCE STATUS FUNCTION"),
+                            self._format_equipment_maintenance_status, "Equipment maintenance status generated",
+                            empty_text="No equipment data found.\n", refcursor=True,
+                            on_error=self._show_function_error)
+
+    def _format_equipment_maintenance_status(self, row):
+        eq_id, name, category, brand, purchase_date, warranty_expiry, warranty_status, maintenance_count, last_maintenance, total_cost = row
+        return (f"Equipment ID: {eq_id}\n"
+                f"Name: {name}\n"
+                f"Category: {category}\n"
+                f"Brand: {brand}\n"
+                f"Purchase Date: {purchase_date}\n"
+                f"Warranty Expiry: {warranty_expiry}\n"
+                f"Warranty Status: {warranty_status}\n"
+                f"Maintenance Count: {maintenance_count or 0}\n"
+                f"Last Maintenance: {last_maintenance or 'N/A'}\n"
+                f"Total Maintenance Cost: ${total_cost or 0:.2f}\n"
+                + "-" * 50 + "\n\n")
+
+    def _show_function_error(self, e):
+        messagebox.showerror("Error", f"Failed to execute function: {str(e)}")
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, f"ERROR: {str(e)}\n")
 
     def proc_update_worker_contract(self):
         """Execute update worker contract procedure"""
@@ -424,10 +460,12 @@ class ReportsScreen:
                 if not job_title or not contract:
                     messagebox.showerror("Error", "Please fill in all required fields")
                     return
+            except ValueError:
+                messagebox.showerror("Error", "Please enter valid numeric values")
+                return
 
-                query = "CALL update_worker_contract(%s, %s, %s, %s)"
-                db_manager.execute_query(query, (worker_id, job_title, contract, wage_increase))
-
+            def render(_):
+                lookup_changed('worker')
                 self.results_text.delete(1.0, tk.END)
                 self.results_text.insert(tk.END, "UPDATE WORKER CONTRACT PROCEDURE\n")
                 self.results_text.insert(tk.END, "=" * 80 + "\n")
@@ -441,12 +479,10 @@ class ReportsScreen:
                 self.update_status("Worker contract updated")
                 dialog.destroy()
 
-            except ValueError:
-                messagebox.showerror("Error", "Please enter valid numeric values")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to execute procedure: {str(e)}")
-                self.results_text.delete(1.0, tk.END)
-                self.results_text.insert(tk.END, f"ERROR: {str(e)}\n")
+            query = "CALL update_worker_contract(%s, %s, %s, %s)"
+            self.app.run_in_background(self._call_procedure, query, (worker_id, job_title, contract, wage_increase),
+                                       on_success=render, on_error=self._show_procedure_error,
+                                       cancellable=False)
 
         button_frame = tk.Frame(dialog)
         button_frame.pack(pady=20)
@@ -457,10 +493,10 @@ class ReportsScreen:
                   bg="#95a5a6", fg="white", width=10).pack(side="left", padx=5)
 
     def proc_process_equipment_orders(self):
-        """Execute process equipment orders procedure"""
+        """Price equipment orders for one or more suppliers (blank = all suppliers)"""
         dialog = tk.Toplevel(self.root)
         dialog.title("Process Equipment Orders")
-        dialog.geometry("400x200")
+        dialog.geometry("400x280")
         dialog.transient(self.root)
         dialog.grab_set()
 
@@ -470,7 +506,7 @@ class ReportsScreen:
         ))
 
         # Input fields
-        tk.Label(dialog, text="Supplier ID:", font=("Arial", 12)).pack(pady=10)
+        tk.Label(dialog, text="Supplier ID(s), comma separated (blank = all):", font=("Arial", 12)).pack(pady=10)
         supplier_id_var = tk.StringVar()
         tk.Entry(dialog, textvariable=supplier_id_var, font=("Arial", 11), width=20).pack(pady=5)
 
@@ -478,37 +514,196 @@ class ReportsScreen:
         order_date_var = tk.StringVar(value=datetime.now().strftime('%Y-%m-%d'))
         tk.Entry(dialog, textvariable=order_date_var, font=("Arial", 11), width=20).pack(pady=5)
 
+        tk.Label(dialog, text="Up To (exclusive, optional):", font=("Arial", 12)).pack(pady=5)
+        end_date_var = tk.StringVar()
+        tk.Entry(dialog, textvariable=end_date_var, font=("Arial", 11), width=20).pack(pady=5)
+
         def execute_procedure():
             try:
-                supplier_id = int(supplier_id_var.get())
-                order_date = order_date_var.get().strip()
+                text = supplier_id_var.get().replace(" ", "")
+                supplier_ids = [int(pid) for pid in text.split(",") if pid] or None
+            except ValueError:
+                messagebox.showerror("Error", "Please enter valid numeric values")
+                return
+            order_date = order_date_var.get().strip()
+            end_date = end_date_var.get().strip()
+            if not order_date:
+                messagebox.showerror("Error", "Please enter an order date")
+                return
+            try:
+                order_date = datetime.strptime(order_date, '%Y-%m-%d').date()
+                end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+            except ValueError:
+                messagebox.showerror("Error", "Please enter dates as YYYY-MM-DD")
+                return
 
-                query = "CALL process_equipment_orders(%s, %s)"
-                db_manager.execute_query(query, (supplier_id, order_date))
+            def render(results):
+                self._render_equipment_orders(supplier_ids, order_date, end_date, results)
+                dialog.destroy()
 
-                self.results_text.delete(1.0, tk.END)
-                self.results_text.insert(tk.END, "PROCESS EQUIPMENT ORDERS PROCEDURE\n")
-                self.results_text.insert(tk.END, "=" * 80 + "\n")
-                self.results_text.insert(tk.END, f"Executed: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                self.results_text.insert(tk.END, f"Supplier ID: {supplier_id}\n")
-                self.results_text.insert(tk.END, f"Order Date: {order_date}\n")
-                self.results_text.insert(tk.END, "\nProcedure executed successfully!\n")
-                self.results_text.insert(tk.END, "Check database logs for detailed output.\n")
+            self.update_status("Processing equipment orders...")
+            self.app.run_in_background(self.advanced_ops.process_equipment_orders, supplier_ids, order_date, end_date,
+                                       on_success=render, on_error=self._show_procedure_error)
 
-                self.update_status("Equipment orders processed")
-                dialog.destroy()
+        button_frame = tk.Frame(dialog)
+        button_frame.pack(pady=20)
+
+        tk.Button(button_frame, text="Execute", command=execute_procedure,
+                  bg="#27ae60", fg="white", width=10).pack(side="left", padx=5)
+        tk.Button(button_frame, text="Cancel", command=dialog.destroy,
+                  bg="#95a5a6", fg="white", width=10).pack(side="left", padx=5)
+
+    def _render_equipment_orders(self, supplier_ids, order_date, end_date, results):
+        # Built up as one string so the Text widget gets a single insert
+        text = ["PROCESS EQUIPMENT ORDERS\n", "=" * 80 + "\n"]
+        text.append(f"Executed: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        suppliers = ", ".join(str(pid) for pid in supplier_ids) if supplier_ids else "All suppliers"
+        text.append(f"Supplier ID: {suppliers}\n")
+        text.append(f"Order Date: {order_date}" + (f" to {end_date}" if end_date else "") + "\n\n")
+
+        if not results:
+            text.append("Supplier not found.\n")
+            self._show_results_text(text)
+            self.update_status("No matching suppliers")
+            return
+
+        grand_total = 0
+        summaries = 0
+        for (row_type, supplier_id, supplier_name, line_no, equipment_id, name, category,
+             supply_date, quantity, unit_price, line_total, order_count) in results:
+            if row_type == 'line':
+                if line_no == 1:
+                    text.append(f"Supplier: {supplier_name} (ID: {supplier_id})\n")
+                text.append(f"Order {line_no}: {quantity} units of {name} (ID: {equipment_id})\n")
+                text.append(f"  Category: {category} | Unit Price: ${unit_price:.2f} | "
+                            f"Total: ${line_total:.2f} | Supply Date: {supply_date}\n")
+            elif order_count == 0:
+                if supplier_ids:
+                    text.append(f"Supplier: {supplier_name} (ID: {supplier_id})\n")
+                    text.append("No orders found for this period\n")
+                    text.append("-" * 50 + "\n\n")
+            else:
+                summaries += 1
+                grand_total += line_total
+                text.append(f"SUMMARY for {supplier_name}: {order_count} orders, "
+                            f"{quantity} units, Total Cost: ${line_total:.2f}, "
+                            f"Average Order Value: ${line_total / order_count:.2f}\n")
+                text.append("-" * 50 + "\n\n")
+
+        if summaries > 1:
+            text.append(f"GRAND TOTAL ({summaries} suppliers): ${grand_total:.2f}\n")
+
+        self._show_results_text(text)
+        self.update_status("Equipment orders processed")
+
+    def func_pay_scenario(self):
+        """What-if payroll: another overtime threshold, wage change or overtime rate, computed in memory"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Pay Scenario")
+        dialog.geometry("400x420")
+        dialog.transient(self.root)
+        dialog.grab_set()
 
+        dialog.geometry("+%d+%d" % (
+            self.root.winfo_rootx() + 50,
+            self.root.winfo_rooty() + 50
+        ))
+
+        fields = [
+            ("Overtime after (hours per shift):", str(OVERTIME_THRESHOLD)),
+            ("Wage change (%):", "0"),
+            ("Overtime rate (blank = each worker's own):", ""),
+            ("From (YYYY-MM-DD, optional):", ""),
+            ("Up To (exclusive, optional):", ""),
+        ]
+        variables = []
+        for label, value in fields:
+            tk.Label(dialog, text=label, font=("Arial", 12)).pack(pady=5)
+            var = tk.StringVar(value=value)
+            tk.Entry(dialog, textvariable=var, font=("Arial", 11), width=20).pack(pady=5)
+            variables.append(var)
+
+        def execute_scenario():
+            threshold, raise_pct, overtime_rate, start, end = (var.get().strip() for var in variables)
+            try:
+                scenario = {
+                    'threshold': float(threshold),
+                    'wage_factor': 1 + float(raise_pct or 0) / 100,
+                    'overtime_rate': float(overtime_rate) if overtime_rate else None,
+                    'start': datetime.strptime(start, '%Y-%m-%d').date() if start else None,
+                    'end': datetime.strptime(end, '%Y-%m-%d').date() if end else None,
+                }
             except ValueError:
-                messagebox.showerror("Error", "Please enter valid numeric values")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to execute procedure: {str(e)}")
-                self.results_text.delete(1.0, tk.END)
-                self.results_text.insert(tk.END, f"ERROR: {str(e)}\n")
+                messagebox.showerror("Error", "Please enter valid numbers and dates")
+                return
+
+            def render(result):
+                self._render_pay_scenario(scenario, *result)
+                dialog.destroy()
+
+            self.update_status("Computing pay scenario...")
+            self.app.run_in_background(self._pay_scenario, scenario,
+                                       on_success=render, on_error=self._show_function_error)
 
         button_frame = tk.Frame(dialog)
         button_frame.pack(pady=20)
 
-        tk.Button(button_frame, text="Execute", command=execute_procedure,
+        tk.Button(button_frame, text="Execute", command=execute_scenario,
                   bg="#27ae60", fg="white", width=10).pack(side="left", padx=5)
         tk.Button(button_frame, text="Cancel", command=dialog.destroy,
-                  bg="#95a5a6", fg="white", width=10).pack(side="left", padx=5)
\ No newline at end of file
+                  bg="#95a5a6", fg="white", width=10).pack(side="left", padx=5)
+
+    def _pay_scenario(self, scenario):
+        """Worker-thread body: load the snapshot if needed, then summarize it"""
+        snapshot = self.analytics_cache.get_or_load('shifts', ShiftAnalytics.load)
+        started = time.perf_counter()
+        workers = snapshot.worker_summary(**scenario)
+        months = snapshot.monthly_rollup(**scenario)
+        return workers, months, snapshot.shift_count, time.perf_counter() - started
+
+    def _render_pay_scenario(self, scenario, workers, months, shift_count, seconds):
+        text = [self._report_header("PAY SCENARIO")]
+        period = f"{scenario['start'] or 'first shift'} to {scenario['end'] or 'last shift'}"
+        overtime_rate = (f"{scenario['overtime_rate']:.2f}x" if scenario['overtime_rate'] is not None
+                         else "each worker's own")
+        text.append(f"Period: {period}\n")
+        text.append(f"Overtime after {scenario['threshold']:g} h per shift, at {overtime_rate}\n")
+        text.append(f"Wage change: {(scenario['wage_factor'] - 1) * 100:+.1f}%\n")
+        text.append("Pay uses each worker's own hourly rate (the Payroll report uses a flat 15.00/h)\n")
+        text.append(f"Total Pay: ${workers['pay'].sum():,.2f}    Hours: {workers['hours'].sum():,.2f}    "
+                    f"Overtime: {workers['overtime'].sum():,.2f}\n")
+        text.append(f"({shift_count} shifts summarized in {seconds * 1000:.1f} ms)\n\n")
+
+        text.append("TOP 10 WORKERS BY PAY\n")
+        text.append(f"{'ID':>6}  {'Worker':<30}{'Job':<14}{'Shifts':>7}{'Hours':>10}{'Overtime':>10}{'Pay':>14}\n")
+        text.append("-" * 91 + "\n")
+        for pid, name, job, shifts, hours, overtime, pay in top(workers, 'pay'):
+            if not shifts:
+                break
+            text.append(f"{pid:>6}  {name[:29]:<30}{job[:13]:<14}{shifts:>7}"
+                        f"{hours:>10.2f}{overtime:>10.2f}{pay:>14,.2f}\n")
+
+        text.append("\nBY MONTH\n")
+        text.append(f"{'Month':<10}{'Workers':>8}{'Shifts':>8}{'Hours':>12}{'Overtime':>10}{'Pay':>16}\n")
+        text.append("-" * 64 + "\n")
+        for month, shifts, active, hours, overtime, pay in zip(
+                months['month'], months['shifts'], months['workers'],
+                months['hours'], months['overtime'], months['pay']):
+            text.append(f"{str(month):<10}{active:>8}{shifts:>8}{hours:>12.2f}{overtime:>10.2f}{pay:>16,.2f}\n")
+
+        self._show_results_text(text)
+        self.update_status("Pay scenario computed")
+
+    def _show_results_text(self, parts):
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, "".join(parts))
+
+    def _call_procedure(self, query, params):
+        """Worker-thread body for procedure buttons: CALL and commit in one task"""
+        db_manager.execute_query(query, params)
+        db_manager.commit()
+
+    def _show_procedure_error(self, e):
+        messagebox.showerror("Error", f"Failed to execute procedure: {str(e)}")
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, f"ERROR: {str(e)}\n")
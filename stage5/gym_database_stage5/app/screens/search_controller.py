@@ -0,0 +1,169 @@
+# screens/search_controller.py - Debounced live search shared by the table screens
+import tkinter as tk
+
+from app.database import SEARCH_LIMIT
+from app.screens.search_index import SearchIndex
+
+
+class SearchController:
+    """Drives a search box: debounces keystrokes and keeps results in order.
+
+    search(text) runs on the background executor. Only the newest query's
+    results reach show_results(rows): an older in-flight query is cancelled
+    on the server, and late responses are dropped by sequence number. When
+    the new text contains the previous text and the previous result was
+    complete (under `limit` rows), the new result is filtered locally from
+    it without a round trip.
+
+    In offline mode (the `offline` variable, given a load_all callable) the
+    whole table is fetched once per refresh into a SearchIndex and every
+    keystroke is answered from memory.
+    """
+
+    def __init__(self, app, variable, search, show_results, show_all,
+                 columns=None, key=lambda row: row[0], load_all=None,
+                 delay_ms=300, limit=SEARCH_LIMIT):
+        self.app = app
+        self.variable = variable
+        self.search = search
+        self.show_results = show_results
+        self.show_all = show_all
+        self.columns = columns
+        self.key = key
+        self.load_all = load_all
+        self.delay_ms = delay_ms
+        self.limit = limit
+
+        self.offline = tk.BooleanVar(value=False)
+        self.entry = None
+        self.seq = 0
+        self._after_job = None
+        self._task = None
+
+        # Last complete server result, used to answer refinements locally
+        self._cached_text = None
+        self._cached_index = None
+
+        # Offline mode: index over the whole table, built once per refresh
+        self._offline_index = None
+        self._load_task = None
+
+    def bind(self, entry):
+        """Attach to an Entry: typing schedules a search, Enter runs it at once"""
+        self.entry = entry
+        entry.bind("<KeyRelease>", lambda e: self.schedule())
+        entry.bind("<Return>", lambda e: self.run_now())
+
+    def schedule(self):
+        """Restart the debounce timer"""
+        self._cancel_timer()
+        self._after_job = self.app.root.after(self.delay_ms, self.run_now)
+
+    def run_now(self):
+        self._cancel_timer()
+        if self.entry is not None and not self.entry.winfo_exists():
+            return
+
+        text = self.variable.get().strip()
+        self.seq += 1
+        self._cancel_query()
+
+        if not text:
+            self.show_all()
+            return
+
+        if self.offline.get() and self.load_all:
+            self._search_offline(text)
+            return
+
+        if (self._cached_index is not None and self._cached_text.lower() in text.lower()
+                and len(self._cached_index) < self.limit):
+            # Every match for `text` also matched the cached text, and that result was complete
+            self.show_results(self._cached_index.search(text))
+            return
+
+        seq = self.seq
+        self._task = self.app.run_in_background(
+            self.search, text,
+            on_success=lambda rows: self._on_results(seq, text, rows),
+            on_error=lambda e: self._on_search_error(seq, e))
+
+    def clear(self):
+        """Empty the search box and show the unfiltered table"""
+        self.variable.set("")
+        self.run_now()
+
+    def invalidate(self):
+        """Forget cached results and the offline index (call on a full refresh)"""
+        self._cached_text = None
+        self._cached_index = None
+        self._offline_index = None
+        if self._load_task is not None:
+            self._load_task.cancel()
+            self._load_task = None
+
+    def row_changed(self, row, old_key=None):
+        """A row was added or edited: patch the indexes instead of rebuilding them"""
+        self._cached_text = None
+        self._cached_index = None
+        if self._offline_index is not None:
+            if old_key is not None:
+                self._offline_index.remove(old_key)
+            self._offline_index.update(row)
+
+    def row_removed(self, key):
+        """A row was deleted: drop it from the indexes"""
+        if self._cached_index is not None:
+            self._cached_index.remove(key)
+        if self._offline_index is not None:
+            self._offline_index.remove(key)
+
+    def cancel(self):
+        """Drop any pending or in-flight search"""
+        self.seq += 1
+        self._cancel_timer()
+        self._cancel_query()
+
+    def _on_results(self, seq, text, rows):
+        if seq != self.seq:
+            return
+        self._task = None
+        self._cached_text = text
+        self._cached_index = SearchIndex(self.key, self.columns).build(rows)
+        self.show_results(rows)
+
+    def _on_search_error(self, seq, error):
+        if seq != self.seq:
+            return
+        self._task = None
+        self.app.show_error("Search failed", error)
+
+    def _search_offline(self, text):
+        if self._offline_index is not None:
+            self.show_results(self._offline_index.search(text))
+            return
+        # Typing on while the table loads does not restart the load
+        if self._load_task is None:
+            self._load_task = self.app.run_in_background(self.load_all, on_success=self._on_loaded_all,
+                                                         on_error=self._on_load_error)
+
+    def _on_loaded_all(self, rows):
+        self._load_task = None
+        self._offline_index = SearchIndex(self.key, self.columns).build(rows)
+        # Answer whatever has been typed while the table was loading
+        self.run_now()
+
+    def _on_load_error(self, error):
+        # The next keystroke tries the load again
+        self._load_task = None
+        self.app.show_error("Failed to load the table for offline search", error)
+
+    def _cancel_timer(self):
+        if self._after_job is not None:
+            self.app.root.after_cancel(self._after_job)
+            self._after_job = None
+
+    def _cancel_query(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
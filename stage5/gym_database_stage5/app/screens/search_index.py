@@ -0,0 +1,117 @@
+# screens/search_index.py - In-memory n-gram index for filtering loaded rows
+from collections import defaultdict
+
+_NO_KEYS = frozenset()
+
+
+class SearchIndex:
+    """Substring index over a set of rows.
+
+    Each searched column is lowercased once and split into every 1..gram
+    character n-gram; a posting map sends each n-gram to the keys of the
+    rows containing it. A query intersects the postings of its own n-grams
+    (smallest set first) and only verifies the few surviving candidates.
+    Results are ranked by the first column (in `columns` order) that
+    matched, then by match position, then by insertion order.
+    """
+
+    def __init__(self, key=lambda row: row[0], columns=None, gram=3):
+        self.key = key
+        self.columns = columns
+        self.gram = gram
+
+        self._rows = {}
+        self._fields = {}
+        self._order = {}
+        self._postings = defaultdict(set)
+        self._next_order = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    def build(self, rows):
+        """Index `rows` from scratch"""
+        self.clear()
+        for row in rows:
+            self.add(row)
+        return self
+
+    def clear(self):
+        self._rows.clear()
+        self._fields.clear()
+        self._order.clear()
+        self._postings.clear()
+        self._next_order = 0
+
+    def add(self, row):
+        """Index a row, replacing any row with the same key"""
+        k = self.key(row)
+        order = self._order.get(k)
+        if order is not None:
+            self.remove(k)
+        else:
+            order = self._next_order
+            self._next_order += 1
+
+        fields = self._fields_of(row)
+        self._rows[k] = row
+        self._fields[k] = fields
+        self._order[k] = order
+        for g in self._grams_of(fields):
+            self._postings[g].add(k)
+
+    update = add
+
+    def remove(self, k):
+        """Drop the row with key `k` (no-op if it is not indexed)"""
+        fields = self._fields.pop(k, None)
+        if fields is None:
+            return
+        for g in self._grams_of(fields):
+            keys = self._postings.get(g)
+            if keys is not None:
+                keys.discard(k)
+                if not keys:
+                    del self._postings[g]
+        del self._rows[k]
+        del self._order[k]
+
+    def search(self, text, limit=None):
+        """Rows containing `text` (case-insensitive) in any indexed column, best matches first"""
+        needle = text.lower()
+        if not needle:
+            ranked = sorted(self._rows, key=self._order.get)
+            return [self._rows[k] for k in ranked[:limit]]
+
+        candidates = None
+        for keys in sorted((self._postings.get(g, _NO_KEYS) for g in self._probe_grams(needle)), key=len):
+            candidates = set(keys) if candidates is None else candidates & keys
+            if not candidates:
+                return []
+
+        hits = []
+        for k in candidates:
+            for rank, field in enumerate(self._fields[k]):
+                pos = field.find(needle)
+                if pos >= 0:
+                    hits.append(((rank, pos, self._order[k]), k))
+                    break
+        hits.sort()
+        return [self._rows[k] for _, k in hits[:limit]]
+
+    def _fields_of(self, row):
+        values = row if self.columns is None else (row[i] for i in self.columns)
+        return tuple("" if v is None else str(v).lower() for v in values)
+
+    def _grams_of(self, fields):
+        grams = set()
+        for field in fields:
+            for size in range(1, self.gram + 1):
+                for i in range(len(field) - size + 1):
+                    grams.add(field[i:i + size])
+        return grams
+
+    def _probe_grams(self, needle):
+        if len(needle) <= self.gram:
+            return {needle}
+        return {needle[i:i + self.gram] for i in range(len(needle) - self.gram + 1)}
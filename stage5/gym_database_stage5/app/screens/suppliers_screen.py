@@ -1,6 +1,11 @@
 # screens/suppliers_screen.py
 import tkinter as tk
 from tkinter import ttk, messagebox
+from app.database import SEARCH_LIMIT
+from app.screens.batch_results import apply_batch_result
+from app.screens.bulk_paste import read_clipboard_rows
+from app.screens.search_controller import SearchController
+from app.screens.virtual_grid import VirtualGrid
 from app.operations.supplier_operations import SupplierOperations, SupplierDialog
 
 
@@ -12,7 +17,8 @@ class SuppliersScreen:
         self.update_status = app.update_status
         self.supplier_ops = SupplierOperations()
         self.supplier_search_var = None
-        self.suppliers_tree = None
+        self.search = None
+        self.suppliers_grid = None
 
     def show_suppliers_screen(self):
         """Show suppliers management screen"""
@@ -32,10 +38,16 @@ class SuppliersScreen:
         self.supplier_search_var = tk.StringVar()
         search_entry = tk.Entry(search_frame, textvariable=self.supplier_search_var, width=30, font=("Arial", 10))
         search_entry.pack(side="left", padx=5)
-        search_entry.bind("<KeyRelease>", lambda e: self.search_suppliers())
+        self.search = SearchController(self.app, self.supplier_search_var, self.supplier_ops.search_suppliers,
+                                       self._show_search_results, lambda: self.suppliers_grid.reload(),
+                                       columns=(1, 2, 6, 4, 5, 0, 3),
+                                       load_all=self.supplier_ops.get_all_suppliers)
+        self.search.bind(search_entry)
 
-        tk.Button(search_frame, text="Clear", command=self.refresh_suppliers,
+        tk.Button(search_frame, text="Clear", command=self.search.clear,
                   font=("Arial", 10), bg="#95a5a6", fg="white").pack(side="left", padx=5)
+        tk.Checkbutton(search_frame, text="Offline", variable=self.search.offline, command=self.search.run_now,
+                       font=("Arial", 10), bg="#cef5cb").pack(side="left", padx=5)
 
         tk.Label(header_frame, text="Supplier Management",
                  font=("Arial", 18, "bold"), fg="#022903", bg="#cef5cb").pack(side="left")
@@ -46,6 +58,8 @@ class SuppliersScreen:
 
         buttons = [
             ("Add Supplier", self.add_supplier, "#09610b"),
+            ("Paste Rows", self.paste_suppliers, "#0b6a0d"),
+            ("Paste Edits", self.paste_supplier_edits, "#0c730e"),
             ("Edit Supplier", self.edit_supplier, "#0e7d10"),
             ("Delete Supplier", self.delete_supplier, "#13a815"),
             ("Refresh", self.refresh_suppliers, "#21db24")
@@ -61,80 +75,36 @@ class SuppliersScreen:
         self.refresh_suppliers()
         self.update_status("Suppliers screen loaded")
 
-    def search_suppliers(self):
-        """Search suppliers live"""
-        query = self.supplier_search_var.get().strip().lower()
-        if not query:
-            self.refresh_suppliers()
-            return
-
-        try:
-            all_suppliers = self.supplier_ops.get_all_suppliers()
-            filtered = [
-                s for s in all_suppliers
-                if query in str(s[0]).lower() or # id
-                   query in str(s[1]).lower() or  # First Name
-                   query in str(s[2]).lower() or  # Last Name
-                   query in str(s[3]).lower() or # DOB
-                    query in str(s[4]).lower() or  # address
-                    query in str(s[5]).lower() or # phone
-                   query in str(s[6]).lower()   # Email
-
-            ]
-            self.suppliers_tree.delete(*self.suppliers_tree.get_children())
-            for s in filtered:
-                self.suppliers_tree.insert("", "end", values=s)
-
-            self.update_status(f"{len(filtered)} supplier(s) matched")
-        except Exception as e:
-            messagebox.showerror("Error", f"Search failed: {str(e)}")
+    def _show_search_results(self, results):
+        self.suppliers_grid.set_rows(results)
+        if len(results) >= SEARCH_LIMIT:
+            self.update_status(f"Showing the first {len(results)} matching supplier(s)")
+        else:
+            self.update_status(f"{len(results)} supplier(s) matched")
 
     def create_suppliers_table(self):
         """Create suppliers table"""
-        table_frame = tk.Frame(self.content_frame, bg="#cef5cb")
-        table_frame.pack(fill="both", expand=True, padx=10, pady=10)
-
         columns = ("Supplier ID", "First Name", "Last Name", "Date of Birth", "Address", "Phone", "Email")
 
-        self.suppliers_tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=15)
-
         # Apply style for black header text
         style = ttk.Style()
         style.theme_use("clam")  # Use a theme that allows styling
         style.configure("Treeview.Heading", background="#7ecf78",foreground="black", font=("Segoe UI", 10, "bold"))
         style.configure("Treeview", font=("Segoe UI", 10), rowheight=28)
 
-        # Configure columns
+        # Only the visible rows are materialized; more are fetched as the user scrolls
         widths = [80, 120, 120, 100, 150, 120, 150]
-        for i, col in enumerate(columns):
-            self.suppliers_tree.heading(col, text=col)
-            self.suppliers_tree.column(col, width=widths[i], minwidth=50)
-
-        # Scrollbars
-        v_scroll = ttk.Scrollbar(table_frame, orient="vertical", command=self.suppliers_tree.yview)
-        h_scroll = ttk.Scrollbar(table_frame, orient="horizontal", command=self.suppliers_tree.xview)
-        self.suppliers_tree.configure(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
-
-        self.suppliers_tree.pack(side="left", fill="both", expand=True)
-        v_scroll.pack(side="right", fill="y")
-        h_scroll.pack(side="bottom", fill="x")
-
-        self.suppliers_tree.bind("<Double-1>", lambda e: self.edit_supplier())
+        self.suppliers_grid = VirtualGrid(self.app, self.content_frame, columns, widths,
+                                          fetch_page=self.supplier_ops.get_suppliers_page,
+                                          estimate_count=self.supplier_ops.estimate_supplier_count,
+                                          bg="#cef5cb")
+        self.suppliers_grid.bind("<Double-1>", lambda e: self.edit_supplier())
 
     def refresh_suppliers(self):
         """Refresh suppliers table"""
-        try:
-            if hasattr(self, 'suppliers_tree') and self.suppliers_tree:
-                for item in self.suppliers_tree.get_children():
-                    self.suppliers_tree.delete(item)
-
-                suppliers = self.supplier_ops.get_all_suppliers()
-                for supplier in suppliers:
-                    self.suppliers_tree.insert("", "end", values=supplier)
-
-                self.update_status(f"Loaded {len(suppliers)} suppliers")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to refresh suppliers: {str(e)}")
+        if self.suppliers_grid and self.suppliers_grid.tree.winfo_exists():
+            self.suppliers_grid.reload()
+            self.search.invalidate()
 
     def add_supplier(self):
         """Add new supplier"""
@@ -142,53 +112,127 @@ class SuppliersScreen:
         self.root.wait_window(dialog.dialog)
 
         if dialog.result:
-            if self.supplier_ops.add_supplier(dialog.result):
-                messagebox.showinfo("Success", "Supplier added successfully!")
-                self.refresh_suppliers()
-                self.update_status("Supplier added")
+            self.app.run_in_background(
+                self.supplier_ops.add_supplier, dialog.result,
+                on_success=lambda row: self._after_change(row, "Supplier added successfully!", "Supplier added"),
+                on_error=lambda e: self.app.show_error("Failed to add supplier", e),
+                cancellable=False)
+
+    def paste_suppliers(self):
+        """Bulk-add suppliers copied from a spreadsheet (a blank pid takes a new one)"""
+        fields = ("pid", "firstname", "lastname", "dateofb", "address", "phone", "email")
+        rows = read_clipboard_rows(self.root, fields, required=fields[1:], converters={"pid": int})
+        if rows and messagebox.askyesno("Confirm Paste", f"Add {len(rows)} supplier(s)?"):
+            self.app.run_in_background(
+                self.supplier_ops.add_many, rows,
+                on_success=lambda added: apply_batch_result(
+                    self.app, self.suppliers_grid, self.search, added,
+                    f"{len(added or [])} supplier(s) added!", "Suppliers added"),
+                on_error=lambda e: self.app.show_error("Failed to add suppliers", e),
+                cancellable=False)
+
+    def paste_supplier_edits(self):
+        """Bulk-update existing suppliers, keyed by pid, from rows copied from a spreadsheet"""
+        fields = ("pid", "firstname", "lastname", "dateofb", "address", "phone", "email")
+        rows = read_clipboard_rows(self.root, fields, required=fields, converters={"pid": int})
+        if rows and messagebox.askyesno("Confirm Paste", f"Update {len(rows)} supplier(s)?"):
+            self.app.run_in_background(
+                self.supplier_ops.update_many, rows,
+                on_success=lambda updated: apply_batch_result(
+                    self.app, self.suppliers_grid, self.search, updated,
+                    f"{len(updated or [])} of {len(rows)} supplier(s) updated!", "Suppliers updated"),
+                on_error=lambda e: self.app.show_error("Failed to update suppliers", e),
+                cancellable=False)
 
     def edit_supplier(self):
         """Edit selected supplier"""
-        if not hasattr(self, 'suppliers_tree') or not self.suppliers_tree:
+        if not self.suppliers_grid:
             return
 
-        selection = self.suppliers_tree.selection()
+        selection = self.suppliers_grid.selected_rows()
         if not selection:
             messagebox.showwarning("Warning", "Please select a supplier to edit")
             return
 
-        item = self.suppliers_tree.item(selection[0])
-        supplier_data = item['values']
-        supplier_id = supplier_data[0]
+        if len(selection) > 1:
+            messagebox.showwarning("Warning", "Select one row to edit")
+            return
+
+        supplier_data = selection[0]
+        supplier_id = supplier_data.pid
+
+        self.app.run_in_background(self.supplier_ops.get_supplier_details, supplier_id,
+                                   on_success=lambda detailed_data: self._edit_supplier_details(supplier_id,
+                                                                                                detailed_data),
+                                   on_error=lambda e: self.app.show_error("Failed to get supplier details", e))
 
-        detailed_data = self.supplier_ops.get_supplier_details(supplier_id)
-        if detailed_data:
+    def _edit_supplier_details(self, supplier_id, detailed_data):
+        """Open the edit dialog once the supplier's details have been loaded"""
+        if not detailed_data:
+            messagebox.showwarning("Warning", "Supplier not found; it may have been deleted by another user")
+        else:
             dialog = SupplierDialog(self.root, "Edit Supplier", detailed_data)
             self.root.wait_window(dialog.dialog)
 
             if dialog.result:
-                if self.supplier_ops.update_supplier(supplier_id, dialog.result):
-                    messagebox.showinfo("Success", "Supplier updated successfully!")
-                    self.refresh_suppliers()
-                    self.update_status("Supplier updated")
+                self.app.run_in_background(
+                    self.supplier_ops.update_supplier, supplier_id, dialog.result,
+                    on_success=lambda row: self._after_change(row, "Supplier updated successfully!", "Supplier updated"),
+                    on_error=lambda e: self.app.show_error("Failed to update supplier", e),
+                    cancellable=False)
 
     def delete_supplier(self):
         """Delete selected supplier"""
-        if not hasattr(self, 'suppliers_tree') or not self.suppliers_tree:
+        if not self.suppliers_grid:
             return
 
-        selection = self.suppliers_tree.selection()
+        selection = self.suppliers_grid.selected_rows()
         if not selection:
             messagebox.showwarning("Warning", "Please select a supplier to delete")
             return
 
-        item = self.suppliers_tree.item(selection[0])
-        supplier_data = item['values']
-        supplier_id = supplier_data[0]
-        supplier_name = f"{supplier_data[1]} {supplier_data[2]}"
+        if len(selection) > 1:
+            pids = [row.pid for row in selection]
+            if messagebox.askyesno("Confirm Delete", f"Delete {len(pids)} suppliers?"):
+                self.app.run_in_background(
+                    self.supplier_ops.delete_many, pids,
+                    on_success=lambda deleted: apply_batch_result(
+                        self.app, self.suppliers_grid, self.search, deleted,
+                        f"{len(deleted or [])} supplier(s) deleted!", "Suppliers deleted", deleted=True),
+                    on_error=lambda e: self.app.show_error("Failed to delete suppliers", e),
+                    cancellable=False)
+            return
+
+        supplier_data = selection[0]
+        supplier_id = supplier_data.pid
+        supplier_name = f"{supplier_data.firstname} {supplier_data.lastname}"
 
         if messagebox.askyesno("Confirm Delete", f"Delete supplier {supplier_name}?"):
-            if self.supplier_ops.delete_supplier(supplier_id):
-                messagebox.showinfo("Success", "Supplier deleted successfully!")
-                self.refresh_suppliers()
-                self.update_status("Supplier deleted")
\ No newline at end of file
+            self.app.run_in_background(
+                self.supplier_ops.delete_supplier, supplier_id,
+                on_success=lambda ok: self._after_change(ok, "Supplier deleted successfully!", "Supplier deleted",
+                                                         removed=supplier_id),
+                on_error=lambda e: self.app.show_error("Failed to delete supplier", e),
+                cancellable=False)
+
+    def _after_change(self, result, message, status, removed=None):
+        """Confirm a successful write and patch just the affected grid row.
+
+        `result` is the row returned by an add/edit, or True for a delete;
+        `removed` is the key of a deleted row (or of an edited row whose key
+        changed). A full reload stays on the Refresh button.
+        """
+        if not result:
+            messagebox.showwarning("Warning", "Supplier not found; it may have been deleted by another user")
+            return
+        messagebox.showinfo("Success", message)
+        # Dashboard counts are cached; make the next visit recount
+        self.app.dashboard_screen.stats_cache.invalidate()
+        if self.suppliers_grid and self.suppliers_grid.exists():
+            if isinstance(result, tuple):
+                self.search.row_changed(result, removed)
+                self.suppliers_grid.upsert_row(result, removed)
+            elif removed is not None:
+                self.search.row_removed(removed)
+                self.suppliers_grid.remove_row(removed)
+        self.update_status(status)
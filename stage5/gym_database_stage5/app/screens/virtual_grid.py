@@ -0,0 +1,381 @@
+# screens/virtual_grid.py - Treeview that only materializes the rows on screen
+import bisect
+import tkinter as tk
+from tkinter import ttk
+
+PAGE_SIZE = 200
+
+
+class _SortKey:
+    """Orders mixed/None column values without raising TypeError"""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        a, b = self.value, other.value
+        if a is None or b is None:
+            return a is None and b is not None
+        try:
+            return a < b
+        except TypeError:
+            return str(a) < str(b)
+
+
+class VirtualGrid:
+    """Scrollable grid over a compact row store.
+
+    Rows live in a plain list of tuples; the Treeview only ever holds the
+    rows in the viewport plus a small overscan. More pages are fetched via
+    fetch_page(after_row, limit) as the user scrolls towards the end.
+    """
+
+    def __init__(self, app, parent, columns, widths, fetch_page=None, estimate_count=None,
+                 key=lambda row: row[0], page_size=PAGE_SIZE, buffer=10, bg="#ffffff"):
+        self.app = app
+        self.columns = columns
+        self.fetch_page = fetch_page
+        self.estimate_count = estimate_count
+        self.key = key
+        self.page_size = page_size
+        self.buffer = buffer
+
+        # Backing store and view state
+        self.rows = []
+        self.first = 0
+        self.has_more = False
+        self.loading = False
+        self.last_fetched_row = None
+        self.total_estimate = None
+        # Bumped whenever the backing store is replaced; pages fetched before that are dropped
+        self._generation = 0
+        self.sort_column = None
+        self.sort_reverse = False
+        self.selected_keys = set()
+        self._keys = set()
+        self._pending_click = None
+        self._iids = []
+        self._iid_rows = {}
+
+        frame = tk.Frame(parent, bg=bg)
+        frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        self.footer = tk.Label(frame, text="", font=("Arial", 9), bg=bg, anchor="w")
+        self.footer.pack(side="bottom", fill="x")
+
+        self.tree = ttk.Treeview(frame, columns=columns, show="headings", height=15)
+        for i, col in enumerate(columns):
+            self.tree.heading(col, text=col, command=lambda c=i: self.sort_by(c))
+            self.tree.column(col, width=widths[i], minwidth=50)
+
+        self.v_scroll = ttk.Scrollbar(frame, orient="vertical", command=self._on_scrollbar)
+        h_scroll = ttk.Scrollbar(frame, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=h_scroll.set)
+
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.v_scroll.pack(side="right", fill="y")
+        h_scroll.pack(side="bottom", fill="x")
+
+        self.tree.bind("<Configure>", lambda e: self._render())
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<Button-1>", lambda e: self._note_click("replace"))
+        self.tree.bind("<Control-Button-1>", lambda e: self._note_click("extend"))
+        self.tree.bind("<Shift-Button-1>", lambda e: self._note_click("extend"))
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-1, "units"))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(1, "units"))
+        for key_name, step in (("<Up>", -1), ("<Down>", 1)):
+            self.tree.bind(key_name, lambda e, s=step: self._move_focus(s))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-1, "pages"))
+        self.tree.bind("<Next>", lambda e: self.scroll(1, "pages"))
+        # Jump to the top / to the last loaded row (which also fetches the next page)
+        self.tree.bind("<Home>", lambda e: self.jump_to(0))
+        self.tree.bind("<End>", lambda e: self.jump_to(len(self.rows)))
+
+    # Loading -------------------------------------------------------------
+
+    def reload(self):
+        """Drop the backing store and start again from the first page"""
+        self._generation += 1
+        self.rows = []
+        self.first = 0
+        self.has_more = True
+        self.loading = False
+        self.last_fetched_row = None
+        self.selected_keys.clear()
+        self._keys.clear()
+        self._fetch_more()
+        if self.estimate_count:
+            self.app.run_in_background(self.estimate_count, on_success=self._set_estimate)
+
+    def set_rows(self, rows):
+        """Show a fixed result set (e.g. search results) without paging"""
+        self._generation += 1
+        self.rows = list(rows)
+        self.first = 0
+        self.has_more = False
+        self.loading = False
+        self.selected_keys.clear()
+        self._keys = {self.key(row) for row in self.rows}
+        self._apply_sort()
+        self._render()
+
+    def _fetch_more(self):
+        if self.loading or not self.has_more or not self.fetch_page:
+            return
+        self.loading = True
+        generation = self._generation
+        # One extra row tells us whether yet another page exists
+        self.app.run_in_background(self.fetch_page, self.last_fetched_row, self.page_size + 1,
+                                   on_success=lambda rows: self._append_page(generation, rows),
+                                   on_error=lambda e: self._page_failed(generation, e))
+
+    def _append_page(self, generation, rows):
+        if generation != self._generation:
+            # Fetched for rows that reload()/set_rows() have since replaced
+            return
+        self.loading = False
+        self.has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if rows:
+            self.last_fetched_row = rows[-1]
+        # Rows patched in by upsert_row may show up again in a later page
+        rows = [row for row in rows if self.key(row) not in self._keys]
+        self._keys.update(self.key(row) for row in rows)
+        if self.sort_column is None:
+            self.rows.extend(rows)
+        else:
+            # Merge into the user's current sort order
+            keys = [self._sort_key(r) for r in self.rows]
+            for row in rows:
+                k = self._sort_key(row)
+                i = self._insert_point(keys, k)
+                keys.insert(i, k)
+                self.rows.insert(i, row)
+        self._render()
+
+    def _page_failed(self, generation, error):
+        if generation != self._generation:
+            return
+        # Stop paging; Refresh starts again from the first page
+        self.loading = False
+        self.has_more = False
+        self._update_footer()
+        self.app.show_error("Failed to load rows", error)
+
+    def _insert_point(self, keys, k):
+        if self.sort_reverse:
+            return self._reverse_insert_point(keys, k)
+        return bisect.bisect_right(keys, k)
+
+    def _reverse_insert_point(self, keys, k):
+        lo, hi = 0, len(keys)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if keys[mid] < k:
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def _set_estimate(self, total):
+        self.total_estimate = total
+        self._update_footer()
+
+    # Patching ------------------------------------------------------------
+
+    def upsert_row(self, row, old_key=None):
+        """Show an added/edited row without reloading; old_key is the row's key before an edit changed it"""
+        key = self.key(row)
+        old_key = key if old_key is None else old_key
+        index = self._index_of(old_key)
+        if index is not None and old_key == key and self.sort_column is None:
+            self.rows[index] = row
+        else:
+            if index is not None:
+                del self.rows[index]
+                self._keys.discard(old_key)
+            if self.sort_column is not None:
+                index = self._insert_point([self._sort_key(r) for r in self.rows], self._sort_key(row))
+            elif index is None:
+                # New rows go on top, where the user will see them
+                index = 0
+            self.rows.insert(index, row)
+        self._keys.add(key)
+
+        # Select the row and bring it into view
+        self.selected_keys = {key}
+        if not self.first <= index < self.first + self.visible_count:
+            self.first = min(index, self._max_first())
+        self._render()
+
+    def remove_row(self, key):
+        """Drop a deleted row without reloading"""
+        index = self._index_of(key)
+        if index is None:
+            return
+        del self.rows[index]
+        self._keys.discard(key)
+        self.selected_keys.discard(key)
+        self.first = min(self.first, self._max_first())
+        self._render()
+
+    def _index_of(self, key):
+        if key not in self._keys:
+            return None
+        for i, row in enumerate(self.rows):
+            if self.key(row) == key:
+                return i
+        return None
+
+    def exists(self):
+        return self.tree.winfo_exists()
+
+    # Viewport ------------------------------------------------------------
+
+    @property
+    def visible_count(self):
+        height = self.tree.winfo_height()
+        rowheight = int(ttk.Style().lookup("Treeview", "rowheight") or 25)
+        if height <= 1:
+            return int(self.tree.cget("height"))
+        # Leave room for the heading row
+        return max(1, (height - rowheight) // rowheight)
+
+    def _max_first(self):
+        return max(0, len(self.rows) - self.visible_count)
+
+    def scroll(self, amount, what="units"):
+        step = self.visible_count if what == "pages" else 1
+        self.first = min(max(0, self.first + amount * step), self._max_first())
+        self._render()
+        return "break"
+
+    def jump_to(self, index):
+        """Scroll so that row `index` of the loaded rows is on screen (clamped)"""
+        self.first = min(max(0, index), self._max_first())
+        self._render()
+        return "break"
+
+    def _on_scrollbar(self, *args):
+        total = max(len(self.rows), 1)
+        if args[0] == "moveto":
+            self.first = min(max(0, int(float(args[1]) * total)), self._max_first())
+            self._render()
+        elif args[0] == "scroll":
+            self.scroll(int(args[1]), args[2])
+
+    def _move_focus(self, step):
+        """Arrow keys: move the focus row, scrolling the window at its edges"""
+        if not self.rows:
+            return "break"
+        focus = self.tree.focus()
+        index = self._iid_rows.get(focus, self.first)
+        target = min(max(0, index + step), len(self.rows) - 1)
+        if target < self.first:
+            self.first = target
+        elif target >= self.first + self.visible_count:
+            self.first = min(max(0, target - self.visible_count + 1), self._max_first())
+        self.selected_keys = {self.key(self.rows[target])}
+        self._render()
+        for iid, i in self._iid_rows.items():
+            if i == target:
+                self.tree.focus(iid)
+        return "break"
+
+    def _render(self):
+        """Re-bind the Treeview's few items to the rows in the current window"""
+        count = min(self.visible_count + self.buffer, max(0, len(self.rows) - self.first))
+
+        while len(self._iids) < count:
+            self._iids.append(self.tree.insert("", "end"))
+        while len(self._iids) > count:
+            self.tree.delete(self._iids.pop())
+
+        self._iid_rows = {}
+        selected = []
+        ncols = len(self.columns)
+        for offset, iid in enumerate(self._iids):
+            index = self.first + offset
+            row = self.rows[index]
+            self.tree.item(iid, values=tuple("" if v is None else v for v in row[:ncols]))
+            self._iid_rows[iid] = index
+            if self.key(row) in self.selected_keys:
+                selected.append(iid)
+
+        self.tree.selection_set(selected)
+        self.tree.yview_moveto(0)
+
+        total = max(len(self.rows), 1)
+        self.v_scroll.set(self.first / total, min(1.0, (self.first + self.visible_count) / total))
+        self._update_footer()
+
+        # Prefetch once the viewport gets within `buffer` rows of the loaded end
+        if self.first + self.visible_count + self.buffer >= len(self.rows):
+            self._fetch_more()
+
+    def _update_footer(self):
+        if not self.rows:
+            text = "Loading..." if self.loading else "No rows"
+        else:
+            last = min(len(self.rows), self.first + self.visible_count)
+            if self.has_more and self.total_estimate is not None:
+                # Position within the whole table, not just the loaded part
+                text = (f"Rows {self.first + 1}–{last} of ≈{self.total_estimate} "
+                        f"({len(self.rows)} loaded)")
+            elif self.has_more:
+                text = f"Rows {self.first + 1}–{last} of {len(self.rows)} loaded so far"
+            else:
+                text = f"Rows {self.first + 1}–{last} of {len(self.rows)}"
+        self.footer.config(text=text)
+
+    # Sorting -------------------------------------------------------------
+
+    def _sort_key(self, row):
+        return _SortKey(row[self.sort_column])
+
+    def sort_by(self, column):
+        """Heading click: sort the loaded rows, toggling direction on repeat clicks"""
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+        for i, col in enumerate(self.columns):
+            arrow = (" ▼" if self.sort_reverse else " ▲") if i == column else ""
+            self.tree.heading(col, text=col + arrow)
+        self._apply_sort()
+        self.first = 0
+        self._render()
+
+    def _apply_sort(self):
+        if self.sort_column is not None:
+            self.rows.sort(key=self._sort_key, reverse=self.sort_reverse)
+
+    # Selection -----------------------------------------------------------
+
+    def _note_click(self, mode):
+        self._pending_click = mode
+
+    def _on_select(self, event=None):
+        """Mirror the Treeview selection into selected_keys, keeping off-screen selections.
+
+        Only a plain click replaces the selection outright; Ctrl/Shift clicks
+        and our own re-renders merge with what is selected off-screen.
+        """
+        visible_selected = {self.key(self.rows[self._iid_rows[iid]])
+                            for iid in self.tree.selection() if iid in self._iid_rows}
+        if self._pending_click == "replace":
+            self.selected_keys = visible_selected
+        else:
+            visible_keys = {self.key(self.rows[i]) for i in self._iid_rows.values()}
+            self.selected_keys = (self.selected_keys - visible_keys) | visible_selected
+        self._pending_click = None
+
+    def selected_rows(self):
+        """Rows (from the backing store) whose keys are selected, in display order"""
+        return [row for row in self.rows if self.key(row) in self.selected_keys]
+
+    def bind(self, sequence, func):
+        self.tree.bind(sequence, func, add="+")
@@ -1,6 +1,11 @@
 # screens/workers_screen.py
 import tkinter as tk
 from tkinter import ttk, messagebox
+from app.database import SEARCH_LIMIT
+from app.screens.batch_results import apply_batch_result
+from app.screens.bulk_paste import read_clipboard_rows
+from app.screens.search_controller import SearchController
+from app.screens.virtual_grid import VirtualGrid
 from app.operations.worker_operations import WorkerOperations, WorkerDialog
 
 
@@ -12,7 +17,8 @@ class WorkersScreen:
         self.update_status = app.update_status
         self.worker_ops = WorkerOperations()
         self.worker_search_var = None
-        self.workers_tree = None
+        self.search = None
+        self.workers_grid = None
 
     def show_workers_screen(self):
         """Show workers management screen"""
@@ -35,10 +41,16 @@ class WorkersScreen:
         self.worker_search_var = tk.StringVar()
         search_entry = tk.Entry(search_frame, textvariable=self.worker_search_var, width=30, font=("Arial", 10))
         search_entry.pack(side="left", padx=5)
-        search_entry.bind("<KeyRelease>", lambda e: self.search_workers())
+        self.search = SearchController(self.app, self.worker_search_var, self.worker_ops.search_workers,
+                                       self._show_search_results, lambda: self.workers_grid.reload(),
+                                       columns=(1, 2, 3, 4, 0, 5),
+                                       load_all=self.worker_ops.get_all_workers)
+        self.search.bind(search_entry)
 
-        tk.Button(search_frame, text="Clear", command=self.refresh_workers,
+        tk.Button(search_frame, text="Clear", command=self.search.clear,
                   font=("Arial", 10), bg="#878b9c", fg="white").pack(side="left", padx=5)
+        tk.Checkbutton(search_frame, text="Offline", variable=self.search.offline, command=self.search.run_now,
+                       font=("Arial", 10), bg="#d6e5ff").pack(side="left", padx=5)
 
         # Control buttons
         btn_frame = tk.Frame(header_frame, bg="#d3d8ed")
@@ -46,6 +58,8 @@ class WorkersScreen:
 
         buttons = [
             ("Add Worker", self.add_worker, "#121c45"),
+            ("Paste Rows", self.paste_workers, "#18245c"),
+            ("Paste Edits", self.paste_worker_edits, "#1b2a6b"),
             ("Edit Worker", self.edit_worker, "#20317a"),
             ("Delete Worker", self.delete_worker, "#2d44a6"),
             ("Refresh", self.refresh_workers, "#3b58d4")
@@ -63,9 +77,6 @@ class WorkersScreen:
 
     def create_workers_table(self):
         """Create workers table"""
-        table_frame = tk.Frame(self.content_frame, bg="#d6e5ff")
-        table_frame.pack(fill="both", expand=True, padx=10, pady=10)
-
         # Apply style for black header text
         style = ttk.Style()
         style.theme_use("clam")  # Use a theme that allows styling
@@ -74,69 +85,29 @@ class WorkersScreen:
 
         # Columns
         columns = ("PID", "First Name", "Last Name", "Job", "Contract", "Date of Deployment")
-        self.workers_tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=15)
-
-        # Configure columns
         widths = [80, 120, 120, 150, 120, 130]
-        for i, col in enumerate(columns):
-            self.workers_tree.heading(col, text=col)
-            self.workers_tree.column(col, width=widths[i], minwidth=50)
 
-        # Scrollbars
-        v_scroll = ttk.Scrollbar(table_frame, orient="vertical", command=self.workers_tree.yview)
-        h_scroll = ttk.Scrollbar(table_frame, orient="horizontal", command=self.workers_tree.xview)
-        self.workers_tree.configure(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
-
-        # Pack elements
-        self.workers_tree.pack(side="left", fill="both", expand=True)
-        v_scroll.pack(side="right", fill="y")
-        h_scroll.pack(side="bottom", fill="x")
+        # Only the visible rows are materialized; more are fetched as the user scrolls
+        self.workers_grid = VirtualGrid(self.app, self.content_frame, columns, widths,
+                                        fetch_page=self.worker_ops.get_workers_page,
+                                        estimate_count=self.worker_ops.estimate_worker_count,
+                                        bg="#d6e5ff")
 
         # Double-click to edit
-        self.workers_tree.bind("<Double-1>", lambda e: self.edit_worker())
-
-    def search_workers(self):
-        """Search workers by name or job"""
-        query_text = self.worker_search_var.get().strip().lower()
-        if not query_text:
-            self.refresh_workers()
-            return
-
-        try:
-            all_workers = self.worker_ops.get_all_workers()
-            filtered = [
-                worker for worker in all_workers
-                if query_text in str(worker[0]).lower() or
-                   query_text in str(worker[1]).lower() or  # first name
-                   query_text in str(worker[2]).lower() or  # last name
-                   query_text in str(worker[3]).lower() or
-                   query_text in str(worker[4]).lower() or
-                   query_text in str(worker[5]).lower()  # job
-            ]
-
-            self.workers_tree.delete(*self.workers_tree.get_children())
-            for worker in filtered:
-                self.workers_tree.insert("", "end", values=worker)
-
-            self.update_status(f"Found {len(filtered)} result(s) for '{query_text}'")
+        self.workers_grid.bind("<Double-1>", lambda e: self.edit_worker())
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Search failed: {str(e)}")
+    def _show_search_results(self, results):
+        self.workers_grid.set_rows(results)
+        if len(results) >= SEARCH_LIMIT:
+            self.update_status(f"Showing the first {len(results)} matching worker(s)")
+        else:
+            self.update_status(f"{len(results)} worker(s) matched")
 
     def refresh_workers(self):
         """Refresh workers table"""
-        try:
-            if hasattr(self, 'workers_tree') and self.workers_tree:
-                for item in self.workers_tree.get_children():
-                    self.workers_tree.delete(item)
-
-                workers = self.worker_ops.get_all_workers()
-                for worker in workers:
-                    self.workers_tree.insert("", "end", values=worker)
-
-                self.update_status(f"Loaded {len(workers)} workers")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to refresh workers: {str(e)}")
+        if self.workers_grid and self.workers_grid.tree.winfo_exists():
+            self.workers_grid.reload()
+            self.search.invalidate()
 
     def add_worker(self):
         """Add new worker"""
@@ -144,53 +115,129 @@ class WorkersScreen:
         self.root.wait_window(dialog.dialog)
 
         if dialog.result:
-            if self.worker_ops.add_worker(dialog.result):
-                messagebox.showinfo("Success", "Worker added successfully!")
-                self.refresh_workers()
-                self.update_status("Worker added")
+            self.app.run_in_background(
+                self.worker_ops.add_worker, dialog.result,
+                on_success=lambda row: self._after_change(row, "Worker added successfully!", "Worker added"),
+                on_error=lambda e: self.app.show_error("Failed to add worker", e),
+                cancellable=False)
+
+    def paste_workers(self):
+        """Bulk-add workers copied from a spreadsheet (a blank pid takes a new one)"""
+        fields = ("pid", "firstname", "lastname", "dateofb", "address", "phone", "email",
+                  "job", "contract", "dateofeployment")
+        rows = read_clipboard_rows(self.root, fields, required=fields[1:], converters={"pid": int})
+        if rows and messagebox.askyesno("Confirm Paste", f"Add {len(rows)} worker(s)?"):
+            self.app.run_in_background(
+                self.worker_ops.add_many, rows,
+                on_success=lambda added: apply_batch_result(
+                    self.app, self.workers_grid, self.search, added,
+                    f"{len(added or [])} worker(s) added!", "Workers added"),
+                on_error=lambda e: self.app.show_error("Failed to add workers", e),
+                cancellable=False)
+
+    def paste_worker_edits(self):
+        """Bulk-update existing workers, keyed by pid, from rows copied from a spreadsheet"""
+        fields = ("pid", "firstname", "lastname", "dateofb", "address", "phone", "email",
+                  "job", "contract", "dateofeployment")
+        rows = read_clipboard_rows(self.root, fields, required=fields, converters={"pid": int})
+        if rows and messagebox.askyesno("Confirm Paste", f"Update {len(rows)} worker(s)?"):
+            self.app.run_in_background(
+                self.worker_ops.update_many, rows,
+                on_success=lambda updated: apply_batch_result(
+                    self.app, self.workers_grid, self.search, updated,
+                    f"{len(updated or [])} of {len(rows)} worker(s) updated!", "Workers updated"),
+                on_error=lambda e: self.app.show_error("Failed to update workers", e),
+                cancellable=False)
 
     def edit_worker(self):
         """Edit selected worker"""
-        if not hasattr(self, 'workers_tree') or not self.workers_tree:
+        if not self.workers_grid:
             return
 
-        selection = self.workers_tree.selection()
+        selection = self.workers_grid.selected_rows()
         if not selection:
             messagebox.showwarning("Warning", "Please select a worker to edit")
             return
 
-        item = self.workers_tree.item(selection[0])
-        worker_data = item['values']
-        worker_pid = worker_data[0]
+        if len(selection) > 1:
+            messagebox.showwarning("Warning", "Select one row to edit")
+            return
+
+        worker_data = selection[0]
+        worker_pid = worker_data.pid
 
-        detailed_data = self.worker_ops.get_worker_details(worker_pid)
-        if detailed_data:
+        self.app.run_in_background(self.worker_ops.get_worker_details, worker_pid,
+                                   on_success=lambda detailed_data: self._edit_worker_details(worker_pid,
+                                                                                              detailed_data),
+                                   on_error=lambda e: self.app.show_error("Failed to get worker details", e))
+
+    def _edit_worker_details(self, worker_pid, detailed_data):
+        """Open the edit dialog once the worker's details have been loaded"""
+        if not detailed_data:
+            messagebox.showwarning("Warning", "Worker not found; it may have been deleted by another user")
+        else:
             dialog = WorkerDialog(self.root, "Edit Worker", detailed_data)
             self.root.wait_window(dialog.dialog)
 
             if dialog.result:
-                if self.worker_ops.update_worker(worker_pid, dialog.result):
-                    messagebox.showinfo("Success", "Worker updated successfully!")
-                    self.refresh_workers()
-                    self.update_status("Worker updated")
+                self.app.run_in_background(
+                    self.worker_ops.update_worker, worker_pid, dialog.result,
+                    on_success=lambda row: self._after_change(row, "Worker updated successfully!", "Worker updated"),
+                    on_error=lambda e: self.app.show_error("Failed to update worker", e),
+                    cancellable=False)
 
     def delete_worker(self):
         """Delete selected worker"""
-        if not hasattr(self, 'workers_tree') or not self.workers_tree:
+        if not self.workers_grid:
             return
 
-        selection = self.workers_tree.selection()
+        selection = self.workers_grid.selected_rows()
         if not selection:
             messagebox.showwarning("Warning", "Please select a worker to delete")
             return
 
-        item = self.workers_tree.item(selection[0])
-        worker_data = item['values']
-        worker_pid = worker_data[0]
-        worker_name = f"{worker_data[1]} {worker_data[2]}"
+        if len(selection) > 1:
+            pids = [row.pid for row in selection]
+            if messagebox.askyesno("Confirm Delete", f"Delete {len(pids)} workers?"):
+                self.app.run_in_background(
+                    self.worker_ops.delete_many, pids,
+                    on_success=lambda deleted: apply_batch_result(
+                        self.app, self.workers_grid, self.search, deleted,
+                        f"{len(deleted or [])} worker(s) deleted!", "Workers deleted", deleted=True),
+                    on_error=lambda e: self.app.show_error("Failed to delete workers", e),
+                    cancellable=False)
+            return
+
+        worker_data = selection[0]
+        worker_pid = worker_data.pid
+        worker_name = f"{worker_data.firstname} {worker_data.lastname}"
 
         if messagebox.askyesno("Confirm Delete", f"Delete worker {worker_name}?"):
-            if self.worker_ops.delete_worker(worker_pid):
-                messagebox.showinfo("Success", "Worker deleted successfully!")
-                self.refresh_workers()
-                self.update_status("Worker deleted")
\ No newline at end of file
+            self.app.run_in_background(
+                self.worker_ops.delete_worker, worker_pid,
+                on_success=lambda ok: self._after_change(ok, "Worker deleted successfully!", "Worker deleted",
+                                                         removed=worker_pid),
+                on_error=lambda e: self.app.show_error("Failed to delete worker", e),
+                cancellable=False)
+
+    def _after_change(self, result, message, status, removed=None):
+        """Confirm a successful write and patch just the affected grid row.
+
+        `result` is the row returned by an add/edit, or True for a delete;
+        `removed` is the key of a deleted row (or of an edited row whose key
+        changed). A full reload stays on the Refresh button.
+        """
+        if not result:
+            messagebox.showwarning("Warning", "Worker not found; it may have been deleted by another user")
+            return
+        messagebox.showinfo("Success", message)
+        # Dashboard counts are cached; make the next visit recount
+        self.app.dashboard_screen.stats_cache.invalidate()
+        if self.workers_grid and self.workers_grid.exists():
+            if isinstance(result, tuple):
+                self.search.row_changed(result, removed)
+                self.workers_grid.upsert_row(result, removed)
+            elif removed is not None:
+                self.search.row_removed(removed)
+                self.workers_grid.remove_row(removed)
+        self.update_status(status)
@@ -0,0 +1,73 @@
+# tools/bench_shift_inserts.py - Bulk shift-insert throughput benchmark
+#
+# Inserts synthetic shifts for existing hourly workers inside one transaction, times
+# them, and rolls everything back, so the database is left unchanged. Run it
+# before and after a migration that touches shift validation to compare:
+#
+#     python -m app.tools.bench_shift_inserts --rows 20000 --batch 1000
+import argparse
+import time
+from datetime import date, time as clock, timedelta
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from app.database import db_manager
+
+# Far enough in the past not to collide with real shifts
+BASE_DATE = date(1900, 1, 1)
+
+
+def shift_validation(cursor):
+    """Describe how overlaps are checked on shift right now"""
+    cursor.execute("SELECT 1 FROM pg_constraint WHERE conname = 'shift_no_overlap'")
+    if cursor.fetchone():
+        return "exclusion constraint (shift_no_overlap)"
+    cursor.execute("SELECT prosrc FROM pg_proc WHERE proname = 'validate_worker_shift'")
+    row = cursor.fetchone()
+    if row and 'overlap_count' in row[0]:
+        return "trigger overlap query (validate_worker_shift)"
+    return "primary key (pid, date) only"
+
+
+def synthetic_shifts(pids, rows):
+    """One 09:00-17:00 shift per worker per day, going forward from BASE_DATE"""
+    for i in range(rows):
+        yield (pids[i % len(pids)], BASE_DATE + timedelta(days=i // len(pids)), clock(9), clock(17))
+
+
+def run(rows, batch):
+    conn = psycopg2.connect(**db_manager.db_params)
+    try:
+        cursor = conn.cursor()
+        print(f"Overlap validation: {shift_validation(cursor)}")
+
+        # shift.pid references hourly, not worker: only hourly workers have shifts
+        cursor.execute("SELECT pid FROM hourly ORDER BY pid")
+        pids = [row[0] for row in cursor.fetchall()]
+        if not pids:
+            print("No hourly workers to attach shifts to")
+            return
+
+        started = time.perf_counter()
+        execute_values(cursor, "INSERT INTO shift (pid, date, clock_in, clock_out) VALUES %s",
+                       synthetic_shifts(pids, rows), page_size=batch)
+        elapsed = time.perf_counter() - started
+
+        print(f"Inserted {rows} shifts for {len(pids)} hourly workers in batches of {batch}")
+        print(f"Elapsed: {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time a bulk insert into shift (rolled back afterwards)")
+    parser.add_argument("--rows", type=int, default=20000, help="number of shifts to insert")
+    parser.add_argument("--batch", type=int, default=1000, help="rows per INSERT statement")
+    args = parser.parse_args()
+    run(args.rows, args.batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+# tools/copy_import.py - Bulk CSV import through COPY FROM STDIN
+#
+# Streams a CSV file into any table of the current schema. Each row is
+# checked and normalized against the table's column types (read from
+# information_schema), valid rows are sent in batches with COPY, and rows
+# that fail, locally or on the server, go to a reject file with the reason:
+#
+#     python -m app.tools.copy_import equipment_supplier equipment_suppliers.csv
+#
+# The stage-1 supplier feed still says supplier_id; it is mapped to pid and
+# shifted into the integrated ID range automatically (see LEGACY_HEADERS).
+import argparse
+import csv
+import io
+import os
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+import psycopg2
+from psycopg2 import sql
+
+from app.database import db_manager
+
+BATCH_SIZE = 5000
+
+# Accepted date/time spellings; the first one is what COPY receives
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d.%m.%Y', '%Y/%m/%d')
+TIME_FORMATS = ('%H:%M:%S', '%H:%M')
+TRUE_VALUES = {'t', 'true', 'y', 'yes', '1'}
+FALSE_VALUES = {'f', 'false', 'n', 'no', '0'}
+
+# Stage-1 CSV headers that were renamed during integration, and the offset
+# added to their IDs (Integrate.sql moved supplier IDs up by 1000)
+LEGACY_HEADERS = {
+    ('equipment_supplier', 'supplier_id'): ('pid', 1000),
+}
+
+
+class RowError(ValueError):
+    """A CSV value that cannot be loaded into its column"""
+
+
+class Column:
+    def __init__(self, name, data_type, nullable, max_length):
+        self.name = name
+        self.data_type = data_type
+        self.nullable = nullable
+        self.max_length = max_length
+
+    def convert(self, raw):
+        """Normalized COPY text for one CSV value (None for NULL)"""
+        value = raw.strip() if raw is not None else ''
+        if value == '':
+            if not self.nullable:
+                raise RowError(f"{self.name} is required")
+            return None
+
+        kind = self.data_type
+        try:
+            if kind in ('integer', 'bigint', 'smallint'):
+                return str(int(value))
+            if kind in ('numeric', 'real', 'double precision'):
+                return str(Decimal(value))
+            if kind == 'date':
+                return _parse(value, DATE_FORMATS).strftime('%Y-%m-%d')
+            if kind.startswith('time'):
+                return _parse(value, TIME_FORMATS).strftime('%H:%M:%S')
+            if kind == 'boolean':
+                if value.lower() in TRUE_VALUES:
+                    return 't'
+                if value.lower() in FALSE_VALUES:
+                    return 'f'
+                raise ValueError
+        except (ValueError, InvalidOperation):
+            raise RowError(f"{self.name}: {value!r} is not a valid {kind}")
+
+        if self.max_length is not None and len(value) > self.max_length:
+            raise RowError(f"{self.name}: longer than {self.max_length} characters")
+        return value
+
+
+def _parse(value, formats):
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    raise ValueError(value)
+
+
+def _copy_text(value):
+    """One field in COPY's text format"""
+    if value is None:
+        return r'\N'
+    return (value.replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def table_columns(cursor, table):
+    cursor.execute("""
+        SELECT column_name, data_type, is_nullable = 'YES', character_maximum_length
+        FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = %s
+        ORDER BY ordinal_position
+    """, (table,))
+    return {name: Column(name, data_type, nullable, max_length)
+            for name, data_type, nullable, max_length in cursor.fetchall()}
+
+
+class CopyImporter:
+    """Loads CSV rows into one table with COPY, collecting rejected rows"""
+
+    def __init__(self, conn, table, batch_size=BATCH_SIZE, renames=None, shifts=None):
+        self.conn = conn
+        self.table = table
+        self.batch_size = batch_size
+        self.renames = dict(renames or {})
+        self.shifts = dict(shifts or {})
+
+        self.loaded = 0
+        self.rejects = []
+        self.fieldnames = None
+        self.columns = None
+        self._copy_sql = None
+
+    def run(self, file):
+        """Import every row of an open CSV file; returns the number of rows loaded"""
+        cursor = self.conn.cursor()
+        all_columns = table_columns(cursor, self.table)
+        if not all_columns:
+            raise ValueError(f"Table {self.table} does not exist")
+
+        reader = csv.reader(file)
+        self.fieldnames = next(reader)
+        header = []
+        for h in (name.strip() for name in self.fieldnames):
+            if h not in self.renames and (self.table, h) in LEGACY_HEADERS:
+                column, offset = LEGACY_HEADERS[(self.table, h)]
+                self.renames[h] = column
+                self.shifts.setdefault(column, offset)
+            header.append(self.renames.get(h, h))
+        unknown = [h for h in header if h not in all_columns]
+        if unknown:
+            raise ValueError(f"{self.table} has no column(s): {', '.join(unknown)}")
+        self.columns = [all_columns[h] for h in header]
+
+        self._copy_sql = sql.SQL("COPY {} ({}) FROM STDIN").format(
+            sql.Identifier(self.table),
+            sql.SQL(', ').join(sql.Identifier(c.name) for c in self.columns)).as_string(self.conn)
+
+        batch = []
+        for line_no, raw in enumerate(reader, start=2):
+            try:
+                batch.append((line_no, raw, self._convert(raw)))
+            except RowError as e:
+                self.rejects.append((line_no, raw, str(e)))
+                continue
+            if len(batch) >= self.batch_size:
+                self._load(cursor, batch)
+                batch = []
+        if batch:
+            self._load(cursor, batch)
+        return self.loaded
+
+    def _convert(self, raw):
+        if len(raw) != len(self.columns):
+            raise RowError(f"expected {len(self.columns)} fields, found {len(raw)}")
+        values = []
+        for column, value in zip(self.columns, raw):
+            converted = column.convert(value)
+            if converted is not None and column.name in self.shifts:
+                converted = str(int(converted) + self.shifts[column.name])
+            values.append(converted)
+        return values
+
+    def _load(self, cursor, batch):
+        """COPY a batch; if the server rejects it, split it to find the offending rows"""
+        cursor.execute("SAVEPOINT copy_batch")
+        try:
+            buffer = io.StringIO("".join(
+                "\t".join(_copy_text(v) for v in values) + "\n" for _, _, values in batch))
+            cursor.copy_expert(self._copy_sql, buffer)
+        except psycopg2.Error as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT copy_batch")
+            if len(batch) == 1:
+                line_no, raw, _ = batch[0]
+                self.rejects.append((line_no, raw, (e.diag.message_primary or str(e)).strip()))
+                return
+            middle = len(batch) // 2
+            self._load(cursor, batch[:middle])
+            self._load(cursor, batch[middle:])
+            return
+        cursor.execute("RELEASE SAVEPOINT copy_batch")
+        self.loaded += len(batch)
+
+
+def write_rejects(path, fieldnames, rejects):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['line', *fieldnames, 'error'])
+        for line_no, raw, error in rejects:
+            writer.writerow([line_no, *raw, error])
+
+
+def _pairs(values, convert=str):
+    result = {}
+    for item in values or []:
+        key, _, value = item.partition('=')
+        result[key.strip()] = convert(value.strip())
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load a CSV file into a table with COPY")
+    parser.add_argument("table", help="target table, e.g. equipment_supplier")
+    parser.add_argument("csv_file")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="rows per COPY")
+    parser.add_argument("--rejects", help="where to write rejected rows (default: <csv>.rejects.csv)")
+    parser.add_argument("--rename", action="append", metavar="CSV_COLUMN=TABLE_COLUMN",
+                        help="map a CSV header to a table column (repeatable)")
+    parser.add_argument("--shift", action="append", metavar="COLUMN=N",
+                        help="add N to an integer column, e.g. pid=1000 for pre-integration supplier IDs")
+    parser.add_argument("--dry-run", action="store_true", help="validate and load, then roll back")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**db_manager.db_params)
+    try:
+        with open(args.csv_file, newline='', encoding='utf-8-sig') as f:
+            importer = CopyImporter(conn, args.table, args.batch,
+                                    renames=_pairs(args.rename), shifts=_pairs(args.shift, int))
+            started = time.perf_counter()
+            importer.run(f)
+            elapsed = time.perf_counter() - started
+
+        if args.dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    print(f"{args.table}: {importer.loaded} rows loaded, {len(importer.rejects)} rejected "
+          f"in {elapsed:.2f}s" + (" (dry run, rolled back)" if args.dry_run else ""))
+    if importer.rejects:
+        path = args.rejects or os.path.splitext(args.csv_file)[0] + ".rejects.csv"
+        write_rejects(path, importer.fieldnames, importer.rejects)
+        print(f"Rejected rows written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# tools/explain_indexes.py - Check that app queries use the migration indexes
+#
+# Runs EXPLAIN on the statements the screens actually send (imported from the
+# operations modules, with keys taken from real rows) and prints the scan each
+# table gets. Run it before and after a migration that adds an index:
+#
+#     python -m app.tools.explain_indexes
+#
+# On a small table the planner may still (correctly) prefer a sequential scan;
+# --no-seqscan discourages those to show that the index can serve the query.
+# The app runs these as prepared statements, which PostgreSQL may switch to a
+# generic plan; --generic-plan shows that plan instead.
+#
+# Statements inside the stored functions (shift summaries, order pricing,
+# maintenance status) are planned inside PL/pgSQL and cannot be EXPLAINed from
+# here; load auto_explain with log_nested_statements on to see those.
+import argparse
+import json
+
+import psycopg2
+
+from app.database import db_manager, contains_pattern, server_placeholders, SEARCH_LIMIT
+from app.operations.worker_operations import (
+    WORKERS_FIRST_PAGE_QUERY, WORKERS_NEXT_PAGE_QUERY, WORKERS_SEARCH_QUERY)
+from app.operations.supplier_operations import (
+    SUPPLIERS_FIRST_PAGE_QUERY, SUPPLIERS_NEXT_PAGE_QUERY, SUPPLIERS_SEARCH_QUERY)
+from app.operations.equipment_operations import (
+    EQUIPMENT_FIRST_PAGE_QUERY, EQUIPMENT_NEXT_PAGE_QUERY, EQUIPMENT_SEARCH_QUERY)
+from app.operations.equipment_supplier_operations import (
+    RELATIONSHIPS_FIRST_PAGE_QUERY, RELATIONSHIPS_NEXT_PAGE_QUERY, RELATIONSHIPS_SEARCH_QUERY,
+    PERSON_SUPPLIES_DELETE_QUERY)
+from app.screens.virtual_grid import PAGE_SIZE
+
+# Typed into the search boxes; three letters so the trigram indexes apply
+SEARCH_TEXT = "ell"
+
+
+def first_page_end(cursor, query):
+    """Last row of a grid's first page: the key its second page is fetched after"""
+    cursor.execute(query, {'limit': PAGE_SIZE})
+    rows = cursor.fetchall()
+    return rows[-1] if rows else None
+
+
+def checks(cursor):
+    """(description, query, params, indexes expected to serve it) for each statement checked"""
+    search = {'pattern': contains_pattern(SEARCH_TEXT), 'limit': SEARCH_LIMIT}
+    worker = first_page_end(cursor, WORKERS_FIRST_PAGE_QUERY)
+    supplier = first_page_end(cursor, SUPPLIERS_FIRST_PAGE_QUERY)
+    equipment = first_page_end(cursor, EQUIPMENT_FIRST_PAGE_QUERY)
+    relationship = first_page_end(cursor, RELATIONSHIPS_FIRST_PAGE_QUERY)
+
+    found = [
+        ("Relationships grid, first page", RELATIONSHIPS_FIRST_PAGE_QUERY, {'limit': PAGE_SIZE + 1},
+         {"idx_equipment_supplier_keyset"}),
+        ("Search workers", WORKERS_SEARCH_QUERY, search,
+         {"idx_person_pid_trgm", "idx_person_firstname_trgm", "idx_person_lastname_trgm",
+          "idx_worker_job_trgm", "idx_worker_contract_trgm", "idx_worker_dateofeployment_trgm"}),
+        ("Search suppliers", SUPPLIERS_SEARCH_QUERY, search,
+         {"idx_person_pid_trgm", "idx_person_firstname_trgm", "idx_person_lastname_trgm",
+          "idx_person_dateofb_trgm", "idx_person_address_trgm", "idx_person_phone_trgm",
+          "idx_person_email_trgm"}),
+        ("Search equipment", EQUIPMENT_SEARCH_QUERY, search,
+         {"idx_equipment_name_trgm", "idx_equipment_category_trgm", "idx_equipment_brand_trgm"}),
+        ("Search relationships", RELATIONSHIPS_SEARCH_QUERY, search,
+         {"idx_equipment_supplier_keyset", "idx_es_equipment_id_trgm", "idx_es_pid_trgm",
+          "idx_es_quantity_trgm", "idx_es_supply_date_trgm"}),
+    ]
+    # Second pages need a first page that was full
+    if worker:
+        found.append(("Workers grid, next page", WORKERS_NEXT_PAGE_QUERY,
+                      {'after_pid': worker[0], 'limit': PAGE_SIZE + 1}, {"worker_pkey"}))
+        found.append(("Delete a worker's supply rows", PERSON_SUPPLIES_DELETE_QUERY, (worker[0],),
+                      {"idx_equipment_supplier_pid"}))
+    if supplier:
+        found.append(("Suppliers grid, next page", SUPPLIERS_NEXT_PAGE_QUERY,
+                      {'after_pid': supplier[0], 'limit': PAGE_SIZE + 1}, {"supplier_pkey"}))
+    if equipment:
+        found.append(("Equipment grid, next page", EQUIPMENT_NEXT_PAGE_QUERY,
+                      {'after_id': equipment[0], 'limit': PAGE_SIZE + 1}, {"equipment_pkey"}))
+    if relationship:
+        equipment_id, _, _, pid, _, _, supply_date = relationship
+        found.append(("Relationships grid, next page", RELATIONSHIPS_NEXT_PAGE_QUERY,
+                      {'after_date': supply_date or 'infinity', 'after_equipment_id': equipment_id,
+                       'after_pid': pid, 'limit': PAGE_SIZE + 1},
+                      {"idx_equipment_supplier_keyset"}))
+    return found
+
+
+def explain(cursor, query, params, generic):
+    """EXPLAIN JSON plan of `query`; generic=True plans it as a prepared statement's generic plan"""
+    if not generic:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + query, params)
+    else:
+        # Prepared the way DatabaseManager prepares it
+        text, names = server_placeholders(query)
+        values = [params[n] for n in names] if names is not None else list(params or ())
+        cursor.execute(f"PREPARE explain_check AS {text}")
+        try:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) EXECUTE explain_check ({', '.join(['%s'] * len(values))})",
+                           values)
+        finally:
+            cursor.execute("DEALLOCATE explain_check")
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def scans(plan):
+    """(node type, relation, index) for every scan node in an EXPLAIN JSON plan"""
+    found = []
+    if 'Relation Name' in plan or 'Index Name' in plan:
+        found.append((plan['Node Type'], plan.get('Relation Name', ''), plan.get('Index Name')))
+    for child in plan.get('Plans', []):
+        found.extend(scans(child))
+    return found
+
+
+def run(no_seqscan, generic):
+    conn = psycopg2.connect(**db_manager.db_params)
+    try:
+        cursor = conn.cursor()
+        if no_seqscan:
+            cursor.execute("SET enable_seqscan = off")
+        if generic:
+            cursor.execute("SET plan_cache_mode = force_generic_plan")
+
+        all_checks = checks(cursor)
+        passed = 0
+        for description, query, params, indexes in all_checks:
+            nodes = scans(explain(cursor, query, params, generic))
+
+            uses_index = any(idx in indexes for _, _, idx in nodes)
+            passed += uses_index
+            print(f"[{'OK' if uses_index else '--'}] {description}")
+            for node_type, relation, idx in nodes:
+                print(f"       {node_type}" + (f" on {relation}" if relation else "") +
+                      (f" using {idx}" if idx else ""))
+
+        print(f"\n{passed}/{len(all_checks)} statements use their index")
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN the app's statements and report the scans used")
+    parser.add_argument("--no-seqscan", action="store_true",
+                        help="discourage sequential scans (shows the index is usable on small tables)")
+    parser.add_argument("--generic-plan", action="store_true",
+                        help="show the generic plan the prepared statements may switch to")
+    args = parser.parse_args()
+    run(args.no_seqscan, args.generic_plan)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+# tools/restore_dump.py - Parallel restore of a plain-format pg_dump file
+#
+# psql replays a plain dump one statement at a time. This tool splits the
+# dump into its entries (pg_dump's "-- Name: ...; Type: ..." headers) and
+# restores it in three phases:
+#
+#   1. schema      - tables, sequences, functions, views, on one connection
+#   2. data        - every table's COPY block, several tables at once
+#   3. post-data   - primary keys, unique constraints and indexes (one job per
+#                    table, in parallel), then foreign keys, then triggers
+#
+# Tables are loaded with no indexes, constraints or triggers in place, which is
+# how pg_dump orders a dump anyway; the tool just runs each phase concurrently.
+# Restore into an empty database:
+#
+#     createdb gym_staging
+#     python -m app.tools.restore_dump "../../שלב ד/backup/backup4" --dbname gym_staging --jobs 4
+import argparse
+import io
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+from psycopg2 import errors
+
+from app.database import db_manager
+
+JOBS = 4
+DEADLOCK_RETRIES = 3
+
+_HEADER = re.compile(r"^-- (?:Data for )?Name: (?P<name>.*?); Type: (?P<type>[^;]+); Schema: ")
+_OWNER = re.compile(r"^ALTER \w+(?: \w+)? .* OWNER TO .*;$")
+_TARGET = re.compile(r"(?:ALTER TABLE(?: ONLY)?| ON(?: ONLY)?|^COPY) ([\w.\"]+)", re.MULTILINE)
+
+# post-data entry types, in the order they are restored
+INDEX_TYPES = ('CONSTRAINT', 'INDEX')
+FK_TYPES = ('FK CONSTRAINT',)
+LATE_TYPES = ('TRIGGER', 'SEQUENCE SET', 'MATERIALIZED VIEW DATA', 'COMMENT', 'ACL', 'DEFAULT ACL')
+
+
+class Entry:
+    """One pg_dump TOC entry: its type, name and SQL (plus COPY data)"""
+
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.lines = []
+        self.copy = None
+        self.data = []
+
+    @property
+    def sql(self):
+        return "\n".join(self.lines).strip()
+
+    @property
+    def table(self):
+        """Table the entry acts on (for grouping post-data work)"""
+        match = _TARGET.search(self.copy or self.sql)
+        return match.group(1) if match else self.name
+
+
+def parse_dump(path):
+    """(session setting statements, entries) of a plain-format dump"""
+    preamble, entries = [], []
+    current = None
+    in_copy = False
+
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if in_copy:
+                if line == '\\.':
+                    in_copy = False
+                else:
+                    current.data.append(line)
+                continue
+
+            header = _HEADER.match(line)
+            if header:
+                current = Entry(header.group('type'), header.group('name'))
+                entries.append(current)
+            elif line.startswith('--') or line.startswith('\\') or not line.strip():
+                continue
+            elif current is None:
+                preamble.append(line)
+            elif line.startswith('COPY ') and line.endswith('FROM stdin;'):
+                current.copy = line
+                in_copy = True
+            else:
+                current.lines.append(line)
+
+    return preamble, entries
+
+
+class Restorer:
+    """Runs the restore phases over a set of connections"""
+
+    def __init__(self, db_params, settings, jobs=JOBS, no_owner=False):
+        self.db_params = db_params
+        self.settings = settings
+        self.jobs = jobs
+        self.no_owner = no_owner
+
+        self.timings = []
+        self.errors = []
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        """This thread's connection, with the dump's session settings applied"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = psycopg2.connect(**self.db_params)
+            conn.autocommit = True
+            for setting in self.settings:
+                try:
+                    conn.cursor().execute(setting)
+                except psycopg2.Error:
+                    pass  # e.g. a setting this server version does not know
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        for conn in self._connections:
+            conn.close()
+
+    def _statement(self, entry):
+        if not self.no_owner:
+            return entry.sql
+        return "\n".join(line for line in entry.lines if not _OWNER.match(line)).strip()
+
+    def _run(self, phase, label, entries):
+        """Execute entries in order in one transaction; record time or error"""
+        conn = self._connection()
+        started = time.perf_counter()
+        rows = 0
+        for attempt in range(DEADLOCK_RETRIES):
+            try:
+                with conn:
+                    cursor = conn.cursor()
+                    for entry in entries:
+                        if entry.copy and entry.data:
+                            cursor.copy_expert(entry.copy, io.StringIO("\n".join(entry.data) + "\n"))
+                            rows += max(cursor.rowcount, 0)
+                        statement = self._statement(entry)
+                        if statement:
+                            cursor.execute(statement)
+                break
+            except errors.DeadlockDetected:
+                rows = 0
+                if attempt == DEADLOCK_RETRIES - 1:
+                    self._failed(phase, label, "deadlock detected (gave up after retries)")
+                    return
+            except psycopg2.Error as e:
+                self._failed(phase, label, (e.pgerror or str(e)).strip())
+                return
+        with self._lock:
+            self.timings.append((phase, label, len(entries), rows, time.perf_counter() - started))
+
+    def _failed(self, phase, label, message):
+        with self._lock:
+            self.errors.append((phase, label, message))
+
+    def serial(self, phase, entries):
+        for entry in entries:
+            self._run(phase, f"{entry.kind} {entry.name}", [entry])
+
+    def parallel(self, pool, phase, groups):
+        """Run each {label: [entries]} group as its own job and wait for all of them"""
+        futures = [pool.submit(self._run, phase, label, entries) for label, entries in groups.items()]
+        for future in futures:
+            future.result()
+
+    def restore(self, entries):
+        pre = [e for e in entries if e.copy is None
+               and e.kind not in INDEX_TYPES + FK_TYPES + LATE_TYPES]
+        data = [e for e in entries if e.copy is not None]
+
+        # Schema runs on the main thread's connection before anything else
+        self.serial("schema", pre)
+        # One pool for every parallel phase, so each worker keeps its connection
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            # Biggest tables first, so they do not end up running alone at the end
+            self.parallel(pool, "data", OrderedDict(
+                (e.table, [e]) for e in sorted(data, key=lambda e: -len(e.data))))
+            self.parallel(pool, "indexes", _by_table(e for e in entries if e.kind in INDEX_TYPES))
+            self.parallel(pool, "foreign keys", _by_table(e for e in entries if e.kind in FK_TYPES))
+        self.serial("late", [e for e in entries if e.kind in LATE_TYPES])
+
+
+def _by_table(entries):
+    groups = OrderedDict()
+    for entry in entries:
+        groups.setdefault(entry.table, []).append(entry)
+    return groups
+
+
+def report(restorer, elapsed):
+    phases = OrderedDict()
+    for phase, label, count, rows, seconds in restorer.timings:
+        phases.setdefault(phase, []).append((label, count, rows, seconds))
+
+    for phase, items in phases.items():
+        total = sum(seconds for *_, seconds in items)
+        print(f"\n{phase} ({len(items)} jobs, {total:.2f}s of work)")
+        if phase in ("data", "indexes", "foreign keys"):
+            for label, count, rows, seconds in sorted(items, key=lambda i: -i[3]):
+                detail = f"{rows:>8} rows" if phase == "data" else f"{count:>3} objects"
+                print(f"  {label:<40} {detail}  {seconds:7.2f}s")
+
+    if restorer.errors:
+        print(f"\n{len(restorer.errors)} error(s):")
+        for phase, label, message in restorer.errors:
+            print(f"  [{phase}] {label}: {message}")
+    print(f"\nRestore finished in {elapsed:.2f}s with {restorer.jobs} connections")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Restore a plain pg_dump file using several connections")
+    parser.add_argument("dump", help="plain-format dump, e.g. 'שלב ד/backup/backup4'")
+    parser.add_argument("--dbname", help="target database (default: the app's database)")
+    parser.add_argument("--jobs", type=int, default=JOBS, help="number of parallel connections")
+    parser.add_argument("--no-owner", action="store_true",
+                        help="skip ALTER ... OWNER TO (when the dump's owner role does not exist here)")
+    args = parser.parse_args()
+
+    db_params = dict(db_manager.db_params)
+    if args.dbname:
+        db_params['database'] = args.dbname
+
+    started = time.perf_counter()
+    settings, entries = parse_dump(args.dump)
+    print(f"Parsed {len(entries)} entries from {args.dump} in {time.perf_counter() - started:.2f}s")
+
+    restorer = Restorer(db_params, settings, args.jobs, args.no_owner)
+    try:
+        restorer.restore(entries)
+    finally:
+        restorer.close()
+    report(restorer, time.perf_counter() - started)
+    if restorer.errors:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+-- Migration 001: Trigram indexes for the live search boxes
+-- Every column the screens search with ILIKE '%text%' gets a GIN trigram index,
+-- so each keystroke is one bitmap index scan instead of a full table read.
+-- Run once with: psql -d intagratedDBs -f migrations/001_search_trigram_indexes.sql
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- date::text depends on DateStyle, so it cannot be indexed directly.
+-- This fixed-format version is safe to mark IMMUTABLE.
+CREATE OR REPLACE FUNCTION date_text(d DATE)
+RETURNS TEXT AS $$
+    SELECT to_char(d, 'YYYY-MM-DD');
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- Equipment screen: name, category, brand
+CREATE INDEX IF NOT EXISTS idx_equipment_name_trgm ON equipment USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_equipment_category_trgm ON equipment USING gin (category gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_equipment_brand_trgm ON equipment USING gin (brand gin_trgm_ops);
+
+-- Workers / suppliers screens: person columns
+CREATE INDEX IF NOT EXISTS idx_person_pid_trgm ON person USING gin ((pid::text) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_person_firstname_trgm ON person USING gin (firstname gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_person_lastname_trgm ON person USING gin (lastname gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_person_fullname_trgm ON person USING gin ((firstname || ' ' || lastname) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_person_dateofb_trgm ON person USING gin (date_text(dateofb) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_person_address_trgm ON person USING gin (address gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_person_phone_trgm ON person USING gin ((phone::text) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_person_email_trgm ON person USING gin (email gin_trgm_ops);
+
+-- Workers screen: worker columns
+CREATE INDEX IF NOT EXISTS idx_worker_job_trgm ON worker USING gin (job gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_worker_contract_trgm ON worker USING gin (contract gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_worker_dateofeployment_trgm ON worker USING gin (date_text(dateofeployment) gin_trgm_ops);
+
+-- Relationships screen: ids, quantity and supply date
+CREATE INDEX IF NOT EXISTS idx_es_equipment_id_trgm ON equipment_supplier USING gin ((equipment_id::text) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_es_pid_trgm ON equipment_supplier USING gin ((pid::text) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_es_quantity_trgm ON equipment_supplier USING gin ((quantity::text) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_es_supply_date_trgm ON equipment_supplier USING gin (date_text(supply_date) gin_trgm_ops);
+
+ANALYZE equipment;
+ANALYZE person;
+ANALYZE worker;
+ANALYZE equipment_supplier;
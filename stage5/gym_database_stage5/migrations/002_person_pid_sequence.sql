@@ -0,0 +1,13 @@
+-- Migration 002: Sequence-backed person IDs
+-- Replaces the app's SELECT MAX(pid)+1, which scans person on every dialog
+-- open and hands the same PID to two clerks adding people at the same time.
+-- Run once with: psql -d intagratedDBs -f migrations/002_person_pid_sequence.sql
+
+CREATE SEQUENCE IF NOT EXISTS person_pid_seq;
+ALTER SEQUENCE person_pid_seq OWNED BY person.pid;
+
+-- Start right after the highest PID already in use
+SELECT setval('person_pid_seq', COALESCE(MAX(pid), 0) + 1, false) FROM person;
+
+-- Inserts that leave pid out get the next value automatically
+ALTER TABLE person ALTER COLUMN pid SET DEFAULT nextval('person_pid_seq');
@@ -0,0 +1,43 @@
+-- Migration 003: Drop the per-row overlap query from shift validation
+-- validate_worker_shift() ran a COUNT(*) overlap query and sent a NOTICE for
+-- every inserted or updated shift, which made bulk shift loads crawl. The query
+-- can never find anything: shift's primary key is (pid, date), so a worker has
+-- at most one shift per day, and clock_in/clock_out are times of that day with
+-- CHECK (clock_in < clock_out). The trigger keeps only the shift length checks.
+-- Measure with: python -m app.tools.bench_shift_inserts (before and after)
+-- Run once with: psql -d intagratedDBs -f migrations/003_shift_validation_length_only.sql
+
+-- An earlier version of this migration added a GiST exclusion constraint for
+-- overlaps; it duplicates the primary key and only slows inserts down
+ALTER TABLE shift DROP CONSTRAINT IF EXISTS shift_no_overlap;
+
+-- Length checks only: no query and no per-row notice
+CREATE OR REPLACE FUNCTION validate_worker_shift()
+RETURNS TRIGGER AS $$
+DECLARE
+    shift_hours NUMERIC;
+BEGIN
+    -- Validate shift times
+    IF NEW.clock_in >= NEW.clock_out THEN
+        RAISE EXCEPTION 'Invalid shift times: clock_in (%) must be before clock_out (%)',
+                       NEW.clock_in, NEW.clock_out;
+    END IF;
+
+    -- Check for reasonable shift length (max 16 hours, min 1 hour)
+    shift_hours := EXTRACT(EPOCH FROM (NEW.clock_out - NEW.clock_in)) / 3600;
+
+    IF shift_hours > 16 THEN
+        RAISE EXCEPTION 'Shift too long: % hours. Maximum 16 hours allowed',
+                       ROUND(shift_hours, 2);
+    END IF;
+
+    IF shift_hours < 1 THEN
+        RAISE EXCEPTION 'Shift too short: % hours. Minimum 1 hour required',
+                       ROUND(shift_hours, 2);
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+ANALYZE shift;
@@ -0,0 +1,17 @@
+-- Migration 004: Indexes on foreign-key columns
+-- PostgreSQL does not index the referencing side of a foreign key. Lookups and
+-- joins by these columns (deleting a worker's supply rows, pricing a supplier's
+-- orders, maintenance history per equipment) read the whole table without them.
+-- contract_job.contract_id and maintenance.contract_id are primary keys already.
+-- Verify with: python -m app.tools.explain_indexes
+-- Run once with: psql -d intagratedDBs -f migrations/004_foreign_key_indexes.sql
+
+-- equipment_supplier's primary key is (equipment_id, pid), which cannot serve pid alone
+CREATE INDEX IF NOT EXISTS idx_equipment_supplier_pid ON equipment_supplier (pid);
+
+CREATE INDEX IF NOT EXISTS idx_maintenance_equipment_id ON maintenance (equipment_id);
+CREATE INDEX IF NOT EXISTS idx_contract_job_pid ON contract_job (pid);
+
+ANALYZE equipment_supplier;
+ANALYZE maintenance;
+ANALYZE contract_job;
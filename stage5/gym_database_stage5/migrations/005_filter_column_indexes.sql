@@ -0,0 +1,16 @@
+-- Migration 005: Indexes on date columns the reports filter and sort by
+-- Shift dates, warranty expiry and supply dates are range-filtered by the
+-- reports and dashboard. Rows are not stored in date order (backups load
+-- shift by worker), so BRIN would not prune anything; these are B-trees.
+-- Verify with: python -m app.tools.explain_indexes
+-- Run once with: psql -d intagratedDBs -f migrations/005_filter_column_indexes.sql
+
+-- shift's primary key is (pid, date), which cannot serve a date range across workers
+CREATE INDEX IF NOT EXISTS idx_shift_date ON shift (date);
+
+CREATE INDEX IF NOT EXISTS idx_equipment_warranty_expiry ON equipment (warranty_expiry);
+CREATE INDEX IF NOT EXISTS idx_equipment_supplier_supply_date ON equipment_supplier (supply_date);
+
+ANALYZE shift;
+ANALYZE equipment;
+ANALYZE equipment_supplier;
@@ -0,0 +1,125 @@
+-- Migration 006: Materialized views behind the standard reports
+-- The four Standard Reports re-ran multi-join GROUP BY / STRING_AGG queries on
+-- every click. They now read these views, which are refreshed CONCURRENTLY (so
+-- reports keep working during a refresh) by refresh_report_views(). The app
+-- calls it when the Reports screen opens and every few minutes while it is
+-- shown; with pg_cron it can also be scheduled on the server:
+--     SELECT cron.schedule('*/5 * * * *', $$SELECT refresh_report_views()$$);
+-- Run once with: psql -d intagratedDBs -f migrations/006_report_materialized_views.sql
+
+-- Equipment by Person
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_equipment_by_person AS
+SELECT
+    p.pid,
+    p.firstname || ' ' || p.lastname as person_name,
+    CASE
+        WHEN w.pid IS NOT NULL THEN 'Worker'
+        WHEN s.pid IS NOT NULL THEN 'Supplier'
+        ELSE 'Person'
+    END as person_type,
+    COUNT(DISTINCT e.equipment_id) as equipment_count,
+    STRING_AGG(DISTINCT e.name, ', ') as equipment_list,
+    SUM(es.quantity) as total_quantity
+FROM person p
+LEFT JOIN worker w ON p.pid = w.pid
+LEFT JOIN supplier s ON p.pid = s.pid
+LEFT JOIN equipment_supplier es ON p.pid = es.pid
+LEFT JOIN equipment e ON es.equipment_id = e.equipment_id
+GROUP BY p.pid, p.firstname, p.lastname, w.pid, s.pid
+HAVING COUNT(DISTINCT e.equipment_id) > 0;
+
+CREATE UNIQUE INDEX IF NOT EXISTS mv_equipment_by_person_pid ON mv_equipment_by_person (pid);
+
+-- Person Summary
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_person_summary AS
+SELECT
+    p.pid,
+    p.firstname || ' ' || p.lastname as full_name,
+    p.dateofb,
+    p.phone,
+    p.email,
+    CASE
+        WHEN w.pid IS NOT NULL AND s.pid IS NOT NULL THEN 'Worker & Supplier'
+        WHEN w.pid IS NOT NULL THEN 'Worker'
+        WHEN s.pid IS NOT NULL THEN 'Supplier'
+        ELSE 'Person Only'
+    END as roles,
+    w.job,
+    w.contract,
+    COUNT(es.equipment_id) as equipment_relations
+FROM person p
+LEFT JOIN worker w ON p.pid = w.pid
+LEFT JOIN supplier s ON p.pid = s.pid
+LEFT JOIN equipment_supplier es ON p.pid = es.pid
+GROUP BY p.pid, p.firstname, p.lastname, p.dateofb, p.phone, p.email,
+         w.pid, s.pid, w.job, w.contract;
+
+CREATE UNIQUE INDEX IF NOT EXISTS mv_person_summary_pid ON mv_person_summary (pid);
+
+-- Equipment Stats (expired warranties are counted as of the last refresh)
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_equipment_stats AS
+SELECT
+    e.category,
+    COUNT(*) as equipment_count,
+    COUNT(DISTINCT es.pid) as people_involved,
+    SUM(es.quantity) as total_quantity_supplied,
+    MIN(e.purchase_date) as oldest_purchase,
+    MAX(e.purchase_date) as newest_purchase,
+    COUNT(CASE WHEN e.warranty_expiry < CURRENT_DATE THEN 1 END) as expired_warranty,
+    STRING_AGG(DISTINCT e.brand, ', ') as brands
+FROM equipment e
+LEFT JOIN equipment_supplier es ON e.equipment_id = es.equipment_id
+GROUP BY e.category;
+
+CREATE UNIQUE INDEX IF NOT EXISTS mv_equipment_stats_category ON mv_equipment_stats (category);
+
+-- Supply Timeline (every month; the report shows the latest 12)
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_supply_timeline AS
+SELECT
+    DATE_TRUNC('month', es.supply_date) as supply_month,
+    COUNT(*) as supply_count,
+    COUNT(DISTINCT es.equipment_id) as unique_equipment,
+    COUNT(DISTINCT es.pid) as unique_people,
+    SUM(es.quantity) as total_quantity,
+    STRING_AGG(DISTINCT e.category, ', ') as categories
+FROM equipment_supplier es
+JOIN equipment e ON es.equipment_id = e.equipment_id
+WHERE es.supply_date IS NOT NULL
+GROUP BY DATE_TRUNC('month', es.supply_date);
+
+CREATE UNIQUE INDEX IF NOT EXISTS mv_supply_timeline_month ON mv_supply_timeline (supply_month);
+
+-- When each view was last refreshed (shown on the Reports screen)
+CREATE TABLE IF NOT EXISTS report_refresh_log (
+    view_name TEXT PRIMARY KEY,
+    refreshed_at TIMESTAMPTZ NOT NULL
+);
+
+INSERT INTO report_refresh_log (view_name, refreshed_at) VALUES
+    ('mv_equipment_by_person', now()),
+    ('mv_person_summary', now()),
+    ('mv_equipment_stats', now()),
+    ('mv_supply_timeline', now())
+ON CONFLICT (view_name) DO NOTHING;
+
+-- Refresh every view older than max_age; returns how many were refreshed.
+-- A view another session is already refreshing is skipped.
+CREATE OR REPLACE FUNCTION refresh_report_views(max_age INTERVAL DEFAULT '0')
+RETURNS INTEGER AS $$
+DECLARE
+    v RECORD;
+    refreshed INTEGER := 0;
+BEGIN
+    FOR v IN
+        SELECT view_name FROM report_refresh_log
+        WHERE refreshed_at <= now() - max_age
+        ORDER BY view_name
+        FOR UPDATE SKIP LOCKED
+    LOOP
+        EXECUTE format('REFRESH MATERIALIZED VIEW CONCURRENTLY %I', v.view_name);
+        UPDATE report_refresh_log SET refreshed_at = now() WHERE view_name = v.view_name;
+        refreshed := refreshed + 1;
+    END LOOP;
+    RETURN refreshed;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,35 @@
+-- Migration 007: NOTIFY other clients when a pick-list table changes
+-- The app caches the equipment, supplier and worker lists its dialogs show
+-- (app/lookups.py) and LISTENs on 'lookup_changed'. These statement-level
+-- triggers send the changed table's name on commit, whichever client or tool
+-- made the change, so every open app drops just the affected lists. Without
+-- this migration the cached lists simply expire after a few minutes.
+-- Run once with: psql -d intagratedDBs -f migrations/007_lookup_change_notify.sql
+
+CREATE OR REPLACE FUNCTION notify_lookup_change() RETURNS trigger AS $$
+BEGIN
+    -- Identical notifications within one transaction are delivered once
+    PERFORM pg_notify('lookup_changed', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_equipment_lookup_change ON equipment;
+CREATE TRIGGER trg_equipment_lookup_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON equipment
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_lookup_change();
+
+DROP TRIGGER IF EXISTS trg_person_lookup_change ON person;
+CREATE TRIGGER trg_person_lookup_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON person
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_lookup_change();
+
+DROP TRIGGER IF EXISTS trg_supplier_lookup_change ON supplier;
+CREATE TRIGGER trg_supplier_lookup_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON supplier
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_lookup_change();
+
+DROP TRIGGER IF EXISTS trg_worker_lookup_change ON worker;
+CREATE TRIGGER trg_worker_lookup_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON worker
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_lookup_change();
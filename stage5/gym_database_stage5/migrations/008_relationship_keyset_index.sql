@@ -0,0 +1,13 @@
+-- Migration 008: Index for the relationships screen's keyset order
+-- The Supplier Equipment grid pages (and its search sorts) by
+--   COALESCE(supply_date, 'infinity'::date) DESC, equipment_id DESC, pid DESC
+-- No index matches that expression, so every page sorted the whole table to
+-- return its few rows. With this index a page is a short index range scan
+-- that starts just after the previous page's last row.
+-- Verify with: python -m app.tools.explain_indexes
+-- Run once with: psql -d intagratedDBs -f migrations/008_relationship_keyset_index.sql
+
+CREATE INDEX IF NOT EXISTS idx_equipment_supplier_keyset ON equipment_supplier
+    ((COALESCE(supply_date, 'infinity'::date)) DESC, equipment_id DESC, pid DESC);
+
+ANALYZE equipment_supplier;
@@ -1,3 +1,6 @@
+# Superseded for the integrated database (which uses pid, not supplier_id):
+# load the CSV with COPY instead, from stage5/gym_database_stage5:
+#     python -m app.tools.copy_import equipment_supplier equipment_suppliers.csv
 from datetime import datetime
 import csv
 
@@ -1,4 +1,44 @@
--- Function 1: Get worker shift summary (corrected for your schema)
+-- Function 1: Worker shift summaries (set-based)
+-- Hours, overtime (hours over 8 in a shift) and pay are computed with one
+-- aggregate over shift instead of a cursor loop per worker.
+
+-- Summary for many workers in one query: pass an array of worker IDs, or
+-- NULL for every worker. Workers with no shifts get zero totals.
+CREATE OR REPLACE FUNCTION get_worker_shift_summaries(worker_ids INTEGER[] DEFAULT NULL)
+RETURNS TABLE(
+    worker_id INTEGER,
+    worker_name TEXT,
+    total_shifts INTEGER,
+    total_hours NUMERIC,
+    overtime_hours NUMERIC,
+    total_pay NUMERIC
+) AS $$
+    SELECT t.pid,
+           t.worker_name,
+           t.total_shifts,
+           t.total_hours,
+           t.overtime_hours,
+           -- 15.00 regular wage, 22.50 overtime rate
+           (t.total_hours - t.overtime_hours) * 15.00 + t.overtime_hours * 22.50
+    FROM (
+        SELECT w.pid,
+               p.firstname || ' ' || p.lastname AS worker_name,
+               COUNT(s.pid)::INTEGER AS total_shifts,
+               COALESCE(SUM(s.hours), 0) AS total_hours,
+               COALESCE(SUM(GREATEST(s.hours - 8, 0)), 0) AS overtime_hours
+        FROM worker w
+        JOIN person p ON p.pid = w.pid
+        LEFT JOIN (
+            SELECT pid, EXTRACT(EPOCH FROM (clock_out - clock_in))::NUMERIC / 3600 AS hours
+            FROM shift
+        ) s ON s.pid = w.pid
+        WHERE worker_ids IS NULL OR w.pid = ANY(worker_ids)
+        GROUP BY w.pid, p.firstname, p.lastname
+    ) t
+    ORDER BY t.pid;
+$$ LANGUAGE sql STABLE;
+
+-- Summary for a single worker (raises if the worker does not exist)
 CREATE OR REPLACE FUNCTION get_worker_shift_summary(worker_id INTEGER)
 RETURNS TABLE(
     worker_name TEXT,
@@ -7,69 +47,17 @@ RETURNS TABLE(
     overtime_hours NUMERIC,
     total_pay NUMERIC
 ) AS $$
-DECLARE
-    worker_full_name TEXT;
-    worker_job TEXT;
-    shift_rec RECORD;
-    hourly_wage NUMERIC := 15.00; -- Default wage
-    overtime_rate NUMERIC := 22.50; -- Default overtime rate
-    shift_cursor CURSOR FOR 
-        SELECT date, clock_in, clock_out 
-        FROM shift 
-        WHERE pid = worker_id;
 BEGIN
-    -- Get worker information
-    SELECT p.firstname || ' ' || p.lastname, w.job
-    INTO worker_full_name, worker_job
-    FROM person p
-    JOIN worker w ON p.pid = w.pid
-    WHERE p.pid = worker_id;
-    
+    RETURN QUERY
+        SELECT s.worker_name, s.total_shifts, s.total_hours, s.overtime_hours, s.total_pay
+        FROM get_worker_shift_summaries(ARRAY[get_worker_shift_summary.worker_id]) s;
+
     IF NOT FOUND THEN
         RAISE EXCEPTION 'Worker with ID % not found', worker_id;
     END IF;
-    
-    -- Initialize counters
-    total_shifts := 0;
-    total_hours := 0;
-    overtime_hours := 0;
-    
-    -- Open explicit cursor and process shifts
-    OPEN shift_cursor;
-    LOOP
-        FETCH shift_cursor INTO shift_rec;
-        EXIT WHEN NOT FOUND;
-        
-        DECLARE
-            shift_hours NUMERIC;
-        BEGIN
-            -- Calculate hours for this shift
-            shift_hours := EXTRACT(EPOCH FROM (shift_rec.clock_out - shift_rec.clock_in)) / 3600;
-            
-            total_shifts := total_shifts + 1;
-            total_hours := total_hours + shift_hours;
-            
-            -- Calculate overtime (over 8 hours per shift)
-            IF shift_hours > 8 THEN
-                overtime_hours := overtime_hours + (shift_hours - 8);
-            END IF;
-        END;
-    END LOOP;
-    CLOSE shift_cursor;
-    
-    -- Calculate total pay
-    total_pay := (total_hours - overtime_hours) * hourly_wage + 
-                 overtime_hours * overtime_rate;
-    
-    -- Set the return value
-    worker_name := worker_full_name;
-    
-    RETURN NEXT;
-    
+
 EXCEPTION
-    WHEN NO_DATA_FOUND THEN
-        RAISE EXCEPTION 'No data found for worker ID %', worker_id;
     WHEN OTHERS THEN
         RAISE EXCEPTION 'Error processing worker shifts: %', SQLERRM;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql STABLE;
@@ -1,88 +1,114 @@
--- Procedure 2: Process equipment orders (FIXED)
+-- Procedure 2: Process equipment orders (set-based)
+-- Orders are priced with one query against a category price table; the
+-- result comes back as rows the caller can read, not as RAISE NOTICE output.
+
+-- Unit price per equipment category (categories not listed cost 100.00)
+CREATE TABLE IF NOT EXISTS equipment_category_price (
+    category VARCHAR(50) PRIMARY KEY,
+    unit_price NUMERIC(10,2) NOT NULL CHECK (unit_price >= 0)
+);
+
+INSERT INTO equipment_category_price (category, unit_price) VALUES
+    ('Strength', 200.00),
+    ('Cardio', 500.00),
+    ('Flexibility', 50.00)
+ON CONFLICT (category) DO NOTHING;
+
+-- Price the orders of one or many suppliers supplied on or after p_order_date
+-- (and before p_end_date, if given). Pass NULL for every supplier, e.g. for
+-- month-end processing. Each supplier gets its 'line' rows followed by one
+-- 'summary' row (total units, total cost and order count); suppliers that do
+-- not exist return no rows at all.
+CREATE OR REPLACE FUNCTION price_equipment_orders(
+    p_supplier_ids INTEGER[],
+    p_order_date DATE DEFAULT CURRENT_DATE,
+    p_end_date DATE DEFAULT NULL
+)
+RETURNS TABLE(
+    row_type TEXT,
+    supplier_id INTEGER,
+    supplier_name TEXT,
+    line_no INTEGER,
+    equipment_id INTEGER,
+    equipment_name TEXT,
+    category TEXT,
+    supply_date DATE,
+    quantity BIGINT,
+    unit_price NUMERIC,
+    line_total NUMERIC,
+    order_count INTEGER
+) AS $$
+    WITH suppliers AS (
+        SELECT p.pid, p.firstname || ' ' || p.lastname AS supplier_name
+        FROM person p
+        WHERE p.pid = ANY(p_supplier_ids)
+           OR (p_supplier_ids IS NULL AND EXISTS (SELECT 1 FROM supplier s WHERE s.pid = p.pid))
+    ), lines AS (
+        SELECT s.pid,
+               s.supplier_name,
+               ROW_NUMBER() OVER (PARTITION BY s.pid ORDER BY es.supply_date, es.equipment_id)::INTEGER AS line_no,
+               es.equipment_id,
+               e.name,
+               e.category,
+               es.supply_date,
+               es.quantity,
+               COALESCE(cp.unit_price, 100.00) AS unit_price
+        FROM suppliers s
+        JOIN equipment_supplier es ON es.pid = s.pid
+        JOIN equipment e ON e.equipment_id = es.equipment_id
+        LEFT JOIN equipment_category_price cp ON cp.category = e.category
+        WHERE es.supply_date >= p_order_date
+          AND (p_end_date IS NULL OR es.supply_date < p_end_date)
+    )
+    SELECT 'line', l.pid, l.supplier_name, l.line_no, l.equipment_id, l.name::TEXT, l.category::TEXT,
+           l.supply_date, l.quantity::BIGINT, l.unit_price, l.quantity * l.unit_price, NULL::INTEGER
+    FROM lines l
+    UNION ALL
+    SELECT 'summary', s.pid, s.supplier_name, NULL, NULL, NULL, NULL,
+           NULL, COALESCE(SUM(l.quantity), 0)::BIGINT, NULL,
+           COALESCE(SUM(l.quantity * l.unit_price), 0), COUNT(l.pid)::INTEGER
+    FROM suppliers s
+    LEFT JOIN lines l ON l.pid = s.pid
+    GROUP BY s.pid, s.supplier_name
+    ORDER BY 2, 1, 4;
+$$ LANGUAGE sql STABLE;
+
+-- psql front end: prints the priced orders of one supplier as notices
 CREATE OR REPLACE PROCEDURE process_equipment_orders(
     IN p_supplier_id INTEGER,
     IN p_order_date DATE DEFAULT CURRENT_DATE
 )
 LANGUAGE plpgsql AS $$
 DECLARE
-    supplier_name TEXT;
     order_rec RECORD;
-    total_cost NUMERIC := 0;
-    order_count INTEGER := 0;
-    
-    -- Cursor for pending orders
-    order_cursor CURSOR FOR
-        SELECT es.equipment_id, es.quantity, es.supply_date, e.name, e.category
-        FROM equipment_supplier es
-        JOIN equipment e ON es.equipment_id = e.equipment_id
-        WHERE es.pid = p_supplier_id 
-        AND es.supply_date >= p_order_date
-        ORDER BY es.supply_date;
 BEGIN
-    -- Get supplier name from person table
-    SELECT firstname || ' ' || lastname INTO supplier_name
-    FROM person 
-    WHERE pid = p_supplier_id;
-    
+    FOR order_rec IN
+        SELECT * FROM price_equipment_orders(ARRAY[p_supplier_id], p_order_date)
+    LOOP
+        IF order_rec.row_type = 'line' THEN
+            RAISE NOTICE 'Order %: % units of % (ID: %)',
+                         order_rec.line_no, order_rec.quantity,
+                         order_rec.equipment_name, order_rec.equipment_id;
+            RAISE NOTICE '  Category: % | Unit Price: $% | Total: $%',
+                         order_rec.category, order_rec.unit_price, order_rec.line_total;
+            RAISE NOTICE '  Supply Date: %', order_rec.supply_date;
+        ELSIF order_rec.order_count = 0 THEN
+            RAISE NOTICE 'No orders found for supplier % on or after %', p_supplier_id, p_order_date;
+        ELSE
+            RAISE NOTICE '========================================';
+            RAISE NOTICE 'SUMMARY for %:', order_rec.supplier_name;
+            RAISE NOTICE 'Total Orders Processed: %', order_rec.order_count;
+            RAISE NOTICE 'Total Cost: $%', order_rec.line_total;
+            RAISE NOTICE 'Average Order Value: $%', ROUND(order_rec.line_total / order_rec.order_count, 2);
+        END IF;
+    END LOOP;
+
     IF NOT FOUND THEN
         RAISE EXCEPTION 'Supplier with ID % not found', p_supplier_id;
     END IF;
-    
-    RAISE NOTICE 'Processing equipment orders for supplier: % (ID: %)', 
-                 supplier_name, p_supplier_id;
-    RAISE NOTICE 'Orders from date: %', p_order_date;
-    RAISE NOTICE '========================================';
-    
-    -- Process each order
-    FOR order_rec IN order_cursor LOOP
-        BEGIN
-            DECLARE
-                item_cost NUMERIC;
-                base_price NUMERIC;
-            BEGIN
-                -- Calculate cost based on equipment category
-                base_price := CASE 
-                    WHEN order_rec.category = 'Strength' THEN 200.00
-                    WHEN order_rec.category = 'Cardio' THEN 500.00
-                    WHEN order_rec.category = 'Flexibility' THEN 50.00
-                    ELSE 100.00
-                END;
-                
-                item_cost := order_rec.quantity * base_price;
-                total_cost := total_cost + item_cost;
-                order_count := order_count + 1;
-                
-                RAISE NOTICE 'Order %: % units of % (ID: %)', 
-                            order_count, 
-                            order_rec.quantity, 
-                            order_rec.name, 
-                            order_rec.equipment_id;
-                RAISE NOTICE '  Category: % | Unit Price: $% | Total: $%', 
-                            order_rec.category, base_price, item_cost;
-                RAISE NOTICE '  Supply Date: %', order_rec.supply_date;
-                RAISE NOTICE '  --------------------------------';
-            END;
-            
-        EXCEPTION
-            WHEN OTHERS THEN
-                RAISE NOTICE 'ERROR processing equipment ID %: %', order_rec.equipment_id, SQLERRM;
-                CONTINUE;
-        END;
-    END LOOP;
-    
-    -- Final summary
-    IF order_count = 0 THEN
-        RAISE NOTICE 'No orders found for supplier % on or after %', p_supplier_id, p_order_date;
-    ELSE
-        RAISE NOTICE '========================================';
-        RAISE NOTICE 'SUMMARY for %:', supplier_name;
-        RAISE NOTICE 'Total Orders Processed: %', order_count;
-        RAISE NOTICE 'Total Cost: $%', total_cost;
-        RAISE NOTICE 'Average Order Value: $%', ROUND(total_cost / order_count, 2);
-    END IF;
-    
+
 EXCEPTION
     WHEN OTHERS THEN
         RAISE EXCEPTION 'Error processing equipment orders: %', SQLERRM;
 END;
-$$;
\ No newline at end of file
+$$;
@@ -1,8 +1,13 @@
 -- Trigger 1: Worker shift validation
+-- Shifts of one worker cannot overlap: the primary key (pid, date) allows one
+-- shift per day and CHECK (clock_in < clock_out) keeps it inside that day, so
+-- the trigger only checks lengths.
+-- Databases that got the old shift_no_overlap constraint drop it with
+-- stage5 migrations/003_shift_validation_length_only.sql.
+
 CREATE OR REPLACE FUNCTION validate_worker_shift()
 RETURNS TRIGGER AS $$
 DECLARE
-    overlap_count INTEGER;
     shift_hours NUMERIC;
 BEGIN
     -- Calculate shift hours
@@ -25,24 +30,6 @@ BEGIN
                        ROUND(shift_hours, 2);
     END IF;
     
-    -- Check for overlapping shifts for the same worker on the same date
-    SELECT COUNT(*) INTO overlap_count
-    FROM shift s
-    WHERE s.pid = NEW.pid
-    AND s.date = NEW.date
-    AND s.clock_in < NEW.clock_out
-    AND s.clock_out > NEW.clock_in
-    AND (TG_OP = 'INSERT' OR s.pid != OLD.pid OR s.date != OLD.date);
-    
-    IF overlap_count > 0 THEN
-        RAISE EXCEPTION 'Shift overlap detected for worker % on %: % - %', 
-                       NEW.pid, NEW.date, NEW.clock_in, NEW.clock_out;
-    END IF;
-    
-    -- Success message
-    RAISE NOTICE 'Shift validated for worker %: % hours on %', 
-                 NEW.pid, ROUND(shift_hours, 2), NEW.date;
-    
     RETURN NEW;
 END;
 $$ LANGUAGE plpgsql;